@@ -1,14 +1,17 @@
 import logging
-from typing import Dict, Optional
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Tuple
 
+import orjson
 from fastapi import Request
-from xero_python.accounting import AccountingApi
-from xero_python.api_client import serialize
 
-from backend.api.xero_client import XeroClient
-from backend.auth.oauth import api_client
+from backend.api.local_store import LocalStore, local_store
+from backend.api.sync_engine import SyncEngine, sync_engine
+from backend.config import XERO_TAX_RATES_TTL
+from backend.models.invoice_models import LineItem
 
-xero_client = XeroClient()
 logger = logging.getLogger(__name__)
 
 
@@ -22,15 +25,147 @@ def store_account_id(request: Request, account_id: str):
     request.session["xero_bank_account_id"] = account_id
 
 
+@dataclass
+class ChartOfAccounts:
+    """One tenant's accounts as Xero sent them, indexed for lookups."""
+
+    version: Tuple[Optional[str], int]
+    by_id: Dict[str, dict] = field(default_factory=dict)
+    by_code: Dict[str, dict] = field(default_factory=dict)
+    by_type_status: Dict[Tuple[str, str], List[dict]] = field(
+        default_factory=lambda: defaultdict(list)
+    )
+    # Active tax types, None until loaded (see AccountsCache.get)
+    tax_types: Optional[FrozenSet[str]] = None
+    tax_types_loaded_at: float = 0.0
+
+    @classmethod
+    def build(cls, version, accounts: List[dict]) -> "ChartOfAccounts":
+        chart = cls(version)
+        for account in accounts:
+            chart.by_id[account["AccountID"].lower()] = account
+            if account.get("Code"):
+                chart.by_code[account["Code"]] = account
+            key = (account.get("Type"), account.get("Status"))
+            chart.by_type_status[key].append(account)
+        return chart
+
+    def get(self, account_id: str) -> Optional[dict]:
+        return self.by_id.get(account_id.lower())
+
+    def find(self, account_type: str, status: str = "ACTIVE") -> List[dict]:
+        return self.by_type_status.get((account_type, status), [])
+
+    def check_line_items(self, line_items: List[LineItem]) -> List[str]:
+        """Problems Xero would reject the line items for, one per message.
+
+        Tax types are only checked once they have been loaded.
+        """
+        errors = []
+        for number, item in enumerate(line_items, start=1):
+            account = self.by_code.get(item.account_code)
+            if account is None:
+                errors.append(
+                    f"Line {number}: account code {item.account_code!r} does not exist"
+                )
+            elif account.get("Status") != "ACTIVE":
+                errors.append(
+                    f"Line {number}: account {item.account_code!r} is "
+                    f"{str(account.get('Status')).lower()}"
+                )
+            if self.tax_types is not None and item.tax_type not in self.tax_types:
+                errors.append(
+                    f"Line {number}: tax type {item.tax_type!r} is not an active "
+                    "tax rate"
+                )
+        return errors
+
+
+class AccountsCache:
+    """Per-tenant chart of accounts held in memory.
+
+    Accounts come from the local sync store, which is refreshed
+    incrementally before each lookup (at most every
+    ``XERO_SYNC_MIN_INTERVAL``). The indexes are rebuilt only when the
+    stored accounts have changed, so validation, detail lookup and
+    bank-account listing are dictionary lookups. Tax rates, which Xero
+    does not sync incrementally, are loaded on demand and kept for
+    ``tax_rates_ttl`` seconds.
+    """
+
+    def __init__(
+        self,
+        store: LocalStore = local_store,
+        engine: SyncEngine = sync_engine,
+        tax_rates_ttl: float = XERO_TAX_RATES_TTL,
+    ):
+        self.store = store
+        self.engine = engine
+        self.tax_rates_ttl = tax_rates_ttl
+        self._charts: Dict[str, ChartOfAccounts] = {}
+        self.hits = 0
+        self.rebuilds = 0
+
+    async def _load(self, tenant_id: str, version) -> ChartOfAccounts:
+        accounts = []
+        async for batch in self.store.iter_json(tenant_id, "accounts"):
+            accounts.extend(orjson.loads(data) for data in batch)
+        self.rebuilds += 1
+        return ChartOfAccounts.build(version, accounts)
+
+    async def _load_tax_types(self, tenant_id: str, chart: ChartOfAccounts):
+        client = self.engine.client
+        try:
+            result = await client.read(
+                client.accounting_api.get_tax_rates, xero_tenant_id=tenant_id
+            )
+        except Exception as e:
+            logger.warning(f"Could not load tax rates for {tenant_id}: {str(e)}")
+            return
+        chart.tax_types = frozenset(
+            rate.tax_type for rate in result.tax_rates or [] if rate.status == "ACTIVE"
+        )
+        chart.tax_types_loaded_at = time.monotonic()
+
+    async def get(self, tenant_id: str, tax_rates: bool = False) -> ChartOfAccounts:
+        await self.engine.refresh(tenant_id, "accounts")
+        version = await self.store.version(tenant_id, "accounts")
+        chart = self._charts.get(tenant_id)
+        if chart is None or chart.version != version:
+            previous = chart
+            chart = self._charts[tenant_id] = await self._load(tenant_id, version)
+            if previous is not None:
+                chart.tax_types = previous.tax_types
+                chart.tax_types_loaded_at = previous.tax_types_loaded_at
+        else:
+            self.hits += 1
+        if tax_rates and (
+            chart.tax_types is None
+            or time.monotonic() - chart.tax_types_loaded_at > self.tax_rates_ttl
+        ):
+            await self._load_tax_types(tenant_id, chart)
+        return chart
+
+    def stats(self) -> dict:
+        return {
+            "tenants": len(self._charts),
+            "hits": self.hits,
+            "rebuilds": self.rebuilds,
+        }
+
+
+accounts_cache = AccountsCache()
+
+
 async def validate_account_id(tenant_id: str, account_id: str) -> bool:
-    """Validate that the account ID exists in the specified tenant."""
+    """Validate that the account ID is an active bank account of the tenant."""
     try:
-        accounting_api = AccountingApi(api_client)
-        accounts = accounting_api.get_accounts(
-            xero_tenant_id=tenant_id,
-            where=f'Status=="ACTIVE" AND Type=="BANK" AND AccountID=guid("{account_id}")',
+        account = (await accounts_cache.get(tenant_id)).get(account_id)
+        return (
+            account is not None
+            and account.get("Status") == "ACTIVE"
+            and account.get("Type") == "BANK"
         )
-        return len(accounts.accounts) > 0
     except Exception as e:
         logger.error(f"Error validating account ID: {str(e)}", exc_info=True)
         return False
@@ -39,13 +174,7 @@ async def validate_account_id(tenant_id: str, account_id: str) -> bool:
 async def get_account_details(tenant_id: str, account_id: str) -> Optional[Dict]:
     """Get detailed information about a specific bank account."""
     try:
-        accounting_api = AccountingApi(api_client)
-        accounts = accounting_api.get_accounts(
-            xero_tenant_id=tenant_id, where=f'AccountID=guid("{account_id}")'
-        )
-        if accounts.accounts:
-            return serialize(accounts.accounts[0])
-        return None
+        return (await accounts_cache.get(tenant_id)).get(account_id)
     except Exception as e:
         logger.error(f"Error getting account details: {str(e)}", exc_info=True)
         return None
@@ -0,0 +1,238 @@
+import asyncio
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import BinaryIO, List, Optional, Tuple
+
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from xero_python.api_client import serialize
+
+from backend.api.local_store import LocalStore, local_store
+from backend.api.responses import FastJSONResponse
+from backend.api.xero_client import xero_client
+from backend.config import (
+    XERO_ATTACHMENT_BATCH_LIMIT,
+    XERO_ATTACHMENT_CONCURRENCY,
+    XERO_ATTACHMENT_MAX_BYTES,
+)
+
+logger = logging.getLogger(__name__)
+
+# Bytes hashed per read while inspecting an upload
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class AttachmentTooLarge(Exception):
+    def __init__(self, file_name: str, max_bytes: int):
+        self.file_name = file_name
+        self.max_bytes = max_bytes
+        super().__init__(
+            f"Attachment {file_name} is larger than the {max_bytes} byte limit"
+        )
+
+
+# Room for multipart boundaries, part headers and form fields around a file
+FORM_OVERHEAD = 64 * 1024
+
+
+class UploadLimitMiddleware:
+    """Refuses attachment uploads over the size limit before they are parsed.
+
+    The multipart parser spools a whole body to disk before the route runs,
+    so the limit is enforced on the way in: a ``Content-Length`` above it is
+    answered with 413 without reading anything, and a body without one is
+    counted as it arrives and cut off with 413 once it goes over. A batch
+    may carry ``batch_limit`` files of ``max_bytes`` each.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_bytes: int = XERO_ATTACHMENT_MAX_BYTES,
+        batch_limit: int = XERO_ATTACHMENT_BATCH_LIMIT,
+    ):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.batch_limit = batch_limit
+
+    def _limit(self, scope: Scope) -> Optional[int]:
+        if scope["type"] != "http" or scope["method"] != "PUT":
+            return None
+        if scope["path"].startswith("/invoice-attachment/"):
+            return self.max_bytes + FORM_OVERHEAD
+        if scope["path"] == "/invoice-attachments":
+            return (self.max_bytes + FORM_OVERHEAD) * self.batch_limit
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        limit = self._limit(scope)
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        detail = f"Upload is larger than the {limit} byte limit"
+        length = Headers(scope=scope).get("content-length", "")
+        if length.isdigit() and int(length) > limit:
+            response = FastJSONResponse(status_code=413, content={"detail": detail})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Re-raised by FastAPI's body parsing as the response
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+@dataclass
+class InspectedFile:
+    """A file on disk (or in a spooled temp file) with its size and SHA-256."""
+
+    file: BinaryIO
+    file_name: str
+    size: int
+    sha256: str
+
+
+def _inspect(file: BinaryIO, file_name: str, max_bytes: int) -> InspectedFile:
+    digest = hashlib.sha256()
+    size = 0
+    file.seek(0)
+    while True:
+        chunk = file.read(HASH_CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise AttachmentTooLarge(file_name, max_bytes)
+        digest.update(chunk)
+    file.seek(0)
+    return InspectedFile(file, file_name, size, digest.hexdigest())
+
+
+async def inspect_file(
+    file: BinaryIO,
+    file_name: str,
+    max_bytes: int = XERO_ATTACHMENT_MAX_BYTES,
+    known_size: Optional[int] = None,
+) -> InspectedFile:
+    """Hash a file in chunks off the event loop, enforcing ``max_bytes``.
+
+    ``known_size`` (e.g. ``UploadFile.size``) rejects an oversized file
+    before any of it is read; otherwise reading stops at the limit.
+    """
+    if known_size is not None and known_size > max_bytes:
+        raise AttachmentTooLarge(file_name, max_bytes)
+    return await asyncio.get_running_loop().run_in_executor(
+        None, _inspect, file, file_name, max_bytes
+    )
+
+
+def _read(file: BinaryIO) -> bytes:
+    file.seek(0)
+    return file.read()
+
+
+class AttachmentUploader:
+    """Uploads invoice attachments, skipping content already on the invoice.
+
+    The SDK only accepts the body as ``bytes``, so a file is read into
+    memory just before it is sent and released straight after; at most
+    ``concurrency`` files are held at once. Uploads are keyed by the SHA-256
+    of their content: an identical file sent to the same invoice again is
+    answered from the local store, and the Xero idempotency key is derived
+    from the hash rather than the file name.
+    """
+
+    def __init__(
+        self,
+        store: LocalStore = local_store,
+        concurrency: int = XERO_ATTACHMENT_CONCURRENCY,
+    ):
+        self.store = store
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.uploaded = 0
+        self.deduplicated = 0
+
+    async def upload(
+        self, tenant_id: str, invoice_id: str, inspected: InspectedFile
+    ) -> dict:
+        """Upload a file unless it is already attached; returns the outcome."""
+        existing = await self.store.get_upload(
+            tenant_id, invoice_id, inspected.sha256
+        )
+        if existing is not None:
+            self.deduplicated += 1
+            logger.info(
+                f"Skipping upload of {inspected.file_name} to invoice {invoice_id}: "
+                "identical content already attached"
+            )
+            return {"status": "duplicate", "data": json.loads(existing)}
+
+        async with self._semaphore:
+            body = await asyncio.get_running_loop().run_in_executor(
+                None, _read, inspected.file
+            )
+            attachment = await xero_client.create_invoice_attachment_by_file_name(
+                tenant_id,
+                invoice_id=invoice_id,
+                file_name=inspected.file_name,
+                body=body,
+                include_online=True,
+                idempotency_key=f"attachment_{invoice_id}_{inspected.sha256}",
+            )
+            del body
+
+        data = serialize(attachment)
+        await self.store.record_upload(
+            tenant_id, invoice_id, inspected.sha256, json.dumps(data)
+        )
+        self.uploaded += 1
+        logger.info(
+            f"Uploaded {inspected.file_name} ({inspected.size} bytes) "
+            f"to invoice {invoice_id}"
+        )
+        return {"status": "uploaded", "data": data}
+
+    async def upload_many(
+        self, tenant_id: str, items: List[Tuple[int, str, InspectedFile]]
+    ) -> List[dict]:
+        """Upload ``(index, invoice_id, file)`` items concurrently.
+
+        Each item gets its own result, so one failed upload does not affect
+        the others.
+        """
+
+        async def upload_one(index: int, invoice_id: str, inspected: InspectedFile):
+            result = {
+                "index": index,
+                "invoice_id": invoice_id,
+                "file_name": inspected.file_name,
+            }
+            try:
+                result.update(await self.upload(tenant_id, invoice_id, inspected))
+            except Exception as e:
+                logger.error(
+                    f"Error uploading {inspected.file_name} to invoice {invoice_id}: "
+                    f"{str(e)}"
+                )
+                result.update(status="failed", error=str(e))
+            return result
+
+        return list(await asyncio.gather(*(upload_one(*item) for item in items)))
+
+    def stats(self) -> dict:
+        return {"uploaded": self.uploaded, "deduplicated": self.deduplicated}
+
+
+attachment_uploader = AttachmentUploader()
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+from typing import List, Optional
+
+import orjson
+from fastapi.responses import Response
+
+from backend.api.local_store import LocalStore, local_store
+from backend.api.passthrough import fetch_raw_page
+from backend.api.sync_engine import RESOURCES, SyncEngine, sync_engine
+from backend.config import XERO_BATCH_GET_CHUNK
+
+logger = logging.getLogger(__name__)
+
+
+class BatchGetter:
+    """Looks records up by id, from the local store first and then Xero.
+
+    If the collection has been synced before it is refreshed first (an
+    If-Modified-Since call at most every ``XERO_SYNC_MIN_INTERVAL``), so
+    stored records are current. Ids still missing are fetched with the list
+    endpoint's ``IDs`` parameter, ``chunk_size`` per call, and stored for
+    the next lookup: 50 unknown invoices cost one Xero call, not 50.
+    """
+
+    def __init__(
+        self,
+        store: LocalStore = local_store,
+        engine: SyncEngine = sync_engine,
+        chunk_size: int = XERO_BATCH_GET_CHUNK,
+    ):
+        self.store = store
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.requested = 0
+        self.local_hits = 0
+        self.fetched = 0
+        self.not_found = 0
+        self.xero_calls = 0
+
+    async def _fetch(self, tenant_id: str, resource: str, ids: List[str]):
+        spec = RESOURCES[resource]
+        client = self.engine.client
+        page = await fetch_raw_page(
+            getattr(client.accounting_api, spec.fetch),
+            tenant_id,
+            spec.envelope,
+            client=client,
+            i_ds=ids,
+            # Paged requests return invoices with their line items
+            page=1,
+            page_size=len(ids),
+        )
+        return page.records
+
+    async def get_many(
+        self, tenant_id: str, resource: str, ids: List[str]
+    ) -> List[Optional[str]]:
+        """Return each record's JSON in ``ids`` order; None if Xero has none."""
+        if await self.store.get_state(tenant_id, resource) is not None:
+            await self.engine.refresh(tenant_id, resource)
+
+        wanted = list(dict.fromkeys(ids))
+        found = await self.store.get_many(tenant_id, resource, wanted)
+        missing = [record_id for record_id in wanted if record_id not in found]
+        self.requested += len(ids)
+        self.local_hits += len(wanted) - len(missing)
+
+        if missing:
+            chunks = [
+                missing[start : start + self.chunk_size]
+                for start in range(0, len(missing), self.chunk_size)
+            ]
+            self.xero_calls += len(chunks)
+            pages = await asyncio.gather(
+                *(self._fetch(tenant_id, resource, chunk) for chunk in chunks)
+            )
+            records = [record for page in pages for record in page]
+            id_field = RESOURCES[resource].raw_id_field
+            for record in records:
+                found[record[id_field].lower()] = orjson.dumps(record).decode()
+            self.fetched += len(records)
+            if records:
+                await self.engine.store_raw(tenant_id, resource, records)
+
+        results = [found.get(record_id) for record_id in ids]
+        self.not_found += results.count(None)
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "requested": self.requested,
+            "local_hits": self.local_hits,
+            "fetched": self.fetched,
+            "not_found": self.not_found,
+            "xero_calls": self.xero_calls,
+        }
+
+
+def batch_response(
+    envelope: str, id_field: str, ids: List[str], records: List[Optional[str]]
+) -> Response:
+    """``{"<envelope>": [...]}`` in request order.
+
+    Ids without a record get ``{"<id_field>": id, "NotFound": true}``. Stored
+    records are written out as they are, without being decoded.
+    """
+    items = [
+        data
+        if data is not None
+        else orjson.dumps({id_field: record_id, "NotFound": True}).decode()
+        for record_id, data in zip(ids, records)
+    ]
+    body = f'{{"{envelope}":[{",".join(items)}]}}'
+    return Response(content=body.encode(), media_type="application/json")
+
+
+batch_getter = BatchGetter()
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import logging
+from collections import Counter, defaultdict
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+from backend.api.local_store import LocalStore, local_store
+from backend.api.passthrough import parse_ms_date
+from backend.api.sync_engine import SyncEngine, sync_engine
+
+logger = logging.getLogger(__name__)
+
+# Resources the summary is computed from
+DASHBOARD_RESOURCES = ("invoices", "contacts", "bank_transactions")
+
+
+def _money(value: Decimal) -> float:
+    return float(value.quantize(Decimal("0.01")))
+
+
+class DashboardSummaries:
+    """Per-tenant dashboard aggregates computed from the local sync store.
+
+    Each collection is read once, in batches, and folded into counters; the
+    raw records never reach the client. A summary is cached until the sync
+    engine reports a change to one of its resources (or an invoice is
+    created locally), and is recomputed on the first request of a new day
+    because the overdue totals depend on today's date. A per-tenant
+    generation counter stops a computation that raced an invalidation from
+    caching its result.
+    """
+
+    def __init__(
+        self, store: LocalStore = local_store, engine: SyncEngine = sync_engine
+    ):
+        self.store = store
+        self.engine = engine
+        self._summaries: Dict[str, Tuple[date, dict]] = {}
+        self._generations: Dict[str, int] = defaultdict(int)
+        self.hits = 0
+        self.misses = 0
+        engine.on_change(self._on_change)
+
+    def _on_change(self, tenant_id: str, resource: str):
+        if resource in DASHBOARD_RESOURCES:
+            self.invalidate(tenant_id)
+
+    def invalidate(self, tenant_id: Optional[str] = None):
+        """Drop one tenant's summary, or all of them when no tenant is given."""
+        if tenant_id is None:
+            self._summaries.clear()
+            for key in self._generations:
+                self._generations[key] += 1
+        else:
+            self._summaries.pop(tenant_id, None)
+            self._generations[tenant_id] += 1
+
+    async def get(self, tenant_id: str, refresh: bool = True) -> dict:
+        """Sync the dashboard resources and return the tenant's summary.
+
+        With ``refresh=False`` the summary is computed from the store as it
+        is, e.g. to publish it right after a sync has written to it.
+        """
+        if refresh:
+            await asyncio.gather(
+                *(
+                    self.engine.refresh(tenant_id, resource)
+                    for resource in DASHBOARD_RESOURCES
+                )
+            )
+
+        today = datetime.now(timezone.utc).date()
+        cached = self._summaries.get(tenant_id)
+        if cached is not None and cached[0] == today:
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        generation = self._generations[tenant_id]
+        summary = {
+            "invoices": await self._invoices(tenant_id, today),
+            "bank_transactions": await self._bank_transactions(tenant_id),
+            "contacts": await self._contacts(tenant_id),
+        }
+        if generation == self._generations[tenant_id]:
+            self._summaries[tenant_id] = (today, summary)
+        return summary
+
+    async def _records(self, tenant_id: str, resource: str):
+        async for batch in self.store.iter_json(tenant_id, resource):
+            for data in batch:
+                yield json.loads(data, parse_float=Decimal)
+
+    async def _invoices(self, tenant_id: str, today: date) -> dict:
+        statuses = Counter()
+        totals = {
+            "ACCREC": {"outstanding": Decimal(0), "overdue": Decimal(0)},
+            "ACCPAY": {"outstanding": Decimal(0), "overdue": Decimal(0)},
+        }
+        async for invoice in self._records(tenant_id, "invoices"):
+            statuses[invoice.get("Status")] += 1
+            bucket = totals.get(invoice.get("Type"))
+            if bucket is None or invoice.get("Status") != "AUTHORISED":
+                continue
+            amount_due = Decimal(invoice.get("AmountDue") or 0)
+            bucket["outstanding"] += amount_due
+            due_date = parse_ms_date(invoice.get("DueDate"))
+            if due_date is not None and due_date.date() < today:
+                bucket["overdue"] += amount_due
+
+        return {
+            "total": sum(statuses.values()),
+            "status_counts": dict(statuses),
+            "receivables": {k: _money(v) for k, v in totals["ACCREC"].items()},
+            "payables": {k: _money(v) for k, v in totals["ACCPAY"].items()},
+        }
+
+    async def _bank_transactions(self, tenant_id: str) -> dict:
+        total = 0
+        unreconciled = 0
+        by_month = Counter()
+        async for transaction in self._records(tenant_id, "bank_transactions"):
+            total += 1
+            if transaction.get("IsReconciled"):
+                continue
+            unreconciled += 1
+            transaction_date = parse_ms_date(transaction.get("Date"))
+            if transaction_date is not None:
+                by_month[transaction_date.strftime("%Y-%m")] += 1
+
+        return {
+            "total": total,
+            "unreconciled": unreconciled,
+            "unreconciled_by_month": [
+                {"month": month, "unreconciled_count": count}
+                for month, count in sorted(by_month.items())
+            ],
+        }
+
+    async def _contacts(self, tenant_id: str) -> dict:
+        counts = Counter()
+        async for contact in self._records(tenant_id, "contacts"):
+            # The store keeps archived contacts; they only count as archived
+            if contact.get("ContactStatus") == "ARCHIVED":
+                counts["archived"] += 1
+                continue
+            counts["total"] += 1
+            counts["active"] += contact.get("ContactStatus") == "ACTIVE"
+            counts["customers"] += bool(contact.get("IsCustomer"))
+            counts["suppliers"] += bool(contact.get("IsSupplier"))
+        return {
+            key: counts[key]
+            for key in ("total", "active", "customers", "suppliers", "archived")
+        }
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._summaries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+dashboard_summaries = DashboardSummaries()
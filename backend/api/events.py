@@ -0,0 +1,185 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Iterable, Optional, Set
+
+import orjson
+
+from backend.api.dashboard import (
+    DASHBOARD_RESOURCES,
+    DashboardSummaries,
+    dashboard_summaries,
+)
+from backend.api.sync_engine import SyncEngine, sync_engine
+from backend.config import (
+    EVENTS_BUFFER,
+    EVENTS_DEBOUNCE,
+    EVENTS_HEARTBEAT,
+    EVENTS_MAX_SUBSCRIBERS,
+)
+
+logger = logging.getLogger(__name__)
+
+KEEPALIVE = b": keepalive\n\n"
+# Tells EventSource how long to wait before reconnecting (milliseconds)
+RETRY = b"retry: 5000\n\n"
+
+
+def format_event(event: str, data) -> bytes:
+    """One server-sent event carrying ``data`` as JSON."""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+class TooManySubscribers(Exception):
+    """Raised when ``EVENTS_MAX_SUBSCRIBERS`` connections are already open."""
+
+
+class Subscription:
+    """One connection's bounded buffer of encoded events."""
+
+    def __init__(self, tenant_id: str, buffer: int):
+        self.tenant_id = tenant_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer)
+        self.dropped = 0
+
+    def put(self, message: bytes):
+        if self.queue.full():
+            # A slow reader loses the oldest messages, not the newest: each
+            # summary supersedes the previous one
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+
+class EventBroker:
+    """Pushes a tenant's data changes to its open ``/events`` connections.
+
+    The broker listens to the sync engine. Changes are collected for
+    ``debounce`` seconds, since one sync writes many pages. Then a
+    ``change`` event naming the resources, and a ``summary`` event with the
+    dashboard aggregates when they are affected, are encoded once and put
+    on every subscriber's buffer. Nothing is computed for tenants nobody
+    is listening to.
+
+    A connection costs a queue of at most ``buffer`` messages and a
+    coroutine waiting on it, so idle connections need no work beyond a
+    keep-alive comment every ``heartbeat`` seconds.
+    """
+
+    def __init__(
+        self,
+        engine: SyncEngine = sync_engine,
+        summaries: DashboardSummaries = dashboard_summaries,
+        buffer: int = EVENTS_BUFFER,
+        max_subscribers: int = EVENTS_MAX_SUBSCRIBERS,
+        heartbeat: float = EVENTS_HEARTBEAT,
+        debounce: float = EVENTS_DEBOUNCE,
+    ):
+        self.summaries = summaries
+        self.buffer = buffer
+        self.max_subscribers = max_subscribers
+        self.heartbeat = heartbeat
+        self.debounce = debounce
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._changed: Dict[str, Set[str]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        # Open subscriptions across all tenants
+        self.subscribers = 0
+        self.connections = 0
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.refused = 0
+        engine.on_change(self._on_change)
+
+    def subscribe(self, tenant_id: str) -> Subscription:
+        if self.subscribers >= self.max_subscribers:
+            self.refused += 1
+            raise TooManySubscribers(
+                f"{self.max_subscribers} event streams are already open"
+            )
+        subscription = Subscription(tenant_id, self.buffer)
+        self._subscribers[tenant_id].add(subscription)
+        self.subscribers += 1
+        self.connections += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscribers.get(subscription.tenant_id)
+        if subscriptions is None or subscription not in subscriptions:
+            return
+        subscriptions.remove(subscription)
+        self.subscribers -= 1
+        self.dropped += subscription.dropped
+        if not subscriptions:
+            del self._subscribers[subscription.tenant_id]
+
+    def publish(self, tenant_id: str, messages: Iterable[bytes]):
+        """Put already encoded events on every subscriber of the tenant."""
+        subscriptions = self._subscribers.get(tenant_id, ())
+        for message in messages:
+            self.published += 1
+            for subscription in subscriptions:
+                subscription.put(message)
+                self.delivered += 1
+
+    def _on_change(self, tenant_id: str, resource: str):
+        if tenant_id not in self._subscribers:
+            return
+        changed = self._changed.get(tenant_id)
+        if changed is None:
+            changed = self._changed[tenant_id] = set()
+            task = asyncio.get_running_loop().create_task(self._publish(tenant_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        changed.add(resource)
+
+    async def _publish(self, tenant_id: str):
+        await asyncio.sleep(self.debounce)
+        resources = sorted(self._changed.pop(tenant_id, ()))
+        messages = [format_event("change", {"resources": resources})]
+        affected = set(resources) & set(DASHBOARD_RESOURCES)
+        if affected and tenant_id in self._subscribers:
+            try:
+                summary = await self.summaries.get(tenant_id, refresh=False)
+                messages.append(format_event("summary", summary))
+            except Exception as e:
+                logger.warning(
+                    f"Could not compute dashboard summary for {tenant_id}: {str(e)}"
+                )
+        self.publish(tenant_id, messages)
+
+    async def stream(
+        self, subscription: Subscription, first: Optional[bytes] = None
+    ) -> AsyncIterator[bytes]:
+        """The body of one ``text/event-stream`` response."""
+        try:
+            yield RETRY + (first or b"")
+            while True:
+                try:
+                    yield await asyncio.wait_for(
+                        subscription.queue.get(), self.heartbeat
+                    )
+                except asyncio.TimeoutError:
+                    yield KEEPALIVE
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": self.subscribers,
+            "tenants": len(self._subscribers),
+            "connections": self.connections,
+            "refused": self.refused,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped
+            + sum(
+                subscription.dropped
+                for subscriptions in self._subscribers.values()
+                for subscription in subscriptions
+            ),
+        }
+
+
+event_broker = EventBroker()
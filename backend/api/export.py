@@ -0,0 +1,255 @@
+import asyncio
+import csv
+import io
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Tuple
+
+import orjson
+
+from backend.api.list_query import field_value
+from backend.api.passthrough import parse_ms_date
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # CSV only
+    pa = pq = None
+
+# Leading characters that make spreadsheets read a CSV cell as a formula
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+
+@dataclass(frozen=True)
+class Column:
+    """One exported column: its name, where it is read from and its type.
+
+    ``kind`` is one of ``str``, ``num``, ``bool``, ``date`` and ``time``;
+    ``line`` columns are read from the line item instead of the record.
+    """
+
+    name: str
+    path: str
+    kind: str = "str"
+    line: bool = False
+
+
+_LINE_COLUMNS = [
+    Column("LineItemID", "LineItemID", line=True),
+    Column("LineDescription", "Description", line=True),
+    Column("LineQuantity", "Quantity", "num", line=True),
+    Column("LineUnitAmount", "UnitAmount", "num", line=True),
+    Column("LineAccountCode", "AccountCode", line=True),
+    Column("LineTaxType", "TaxType", line=True),
+    Column("LineTaxAmount", "TaxAmount", "num", line=True),
+    Column("LineAmount", "LineAmount", "num", line=True),
+]
+
+EXPORT_COLUMNS: Dict[str, List[Column]] = {
+    "invoices": [
+        Column("InvoiceID", "InvoiceID"),
+        Column("InvoiceNumber", "InvoiceNumber"),
+        Column("Type", "Type"),
+        Column("Status", "Status"),
+        Column("ContactID", "Contact.ContactID"),
+        Column("ContactName", "Contact.Name"),
+        Column("Date", "Date", "date"),
+        Column("DueDate", "DueDate", "date"),
+        Column("Reference", "Reference"),
+        Column("CurrencyCode", "CurrencyCode"),
+        Column("SubTotal", "SubTotal", "num"),
+        Column("TotalTax", "TotalTax", "num"),
+        Column("Total", "Total", "num"),
+        Column("AmountDue", "AmountDue", "num"),
+        Column("AmountPaid", "AmountPaid", "num"),
+        Column("UpdatedDateUTC", "UpdatedDateUTC", "time"),
+        *_LINE_COLUMNS,
+    ],
+    "bank_transactions": [
+        Column("BankTransactionID", "BankTransactionID"),
+        Column("Type", "Type"),
+        Column("Status", "Status"),
+        Column("ContactID", "Contact.ContactID"),
+        Column("ContactName", "Contact.Name"),
+        Column("BankAccountID", "BankAccount.AccountID"),
+        Column("BankAccountCode", "BankAccount.Code"),
+        Column("Date", "Date", "date"),
+        Column("Reference", "Reference"),
+        Column("IsReconciled", "IsReconciled", "bool"),
+        Column("CurrencyCode", "CurrencyCode"),
+        Column("SubTotal", "SubTotal", "num"),
+        Column("TotalTax", "TotalTax", "num"),
+        Column("Total", "Total", "num"),
+        Column("UpdatedDateUTC", "UpdatedDateUTC", "time"),
+        *_LINE_COLUMNS,
+    ],
+}
+
+
+def _convert(value, kind: str):
+    if value is None:
+        return None
+    if kind == "date":
+        moment = parse_ms_date(value)
+        return moment.date() if moment else None
+    if kind == "time":
+        return parse_ms_date(value)
+    if kind == "num":
+        return float(value)
+    if kind == "bool":
+        return bool(value)
+    return str(value)
+
+
+def flatten(columns: List[Column], batch: List[str]) -> List[Tuple]:
+    """Rows of ``columns`` for stored records, one per line item.
+
+    A record without line items still gives one row, with empty line
+    columns.
+    """
+    rows = []
+    for data in batch:
+        record = orjson.loads(data)
+        head = [
+            None
+            if column.line
+            else _convert(field_value(record, column.path), column.kind)
+            for column in columns
+        ]
+        for item in record.get("LineItems") or [None]:
+            if item is None:
+                rows.append(tuple(head))
+                continue
+            rows.append(
+                tuple(
+                    _convert(item.get(column.path), column.kind)
+                    if column.line
+                    else value
+                    for column, value in zip(columns, head)
+                )
+            )
+    return rows
+
+
+def _csv_safe(row: Tuple) -> Tuple:
+    """Quote text cells a spreadsheet would run as formulas with ``'``."""
+    return tuple(
+        f"'{value}"
+        if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES)
+        else value
+        for value in row
+    )
+
+
+class _Sink(io.RawIOBase):
+    """File object collecting what a writer produces until it is drained."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _arrow_schema(columns: List[Column]):
+    types = {
+        "str": pa.string(),
+        "num": pa.float64(),
+        "bool": pa.bool_(),
+        "date": pa.date32(),
+        "time": pa.timestamp("ms", tz="UTC"),
+    }
+    return pa.schema([(column.name, types[column.kind]) for column in columns])
+
+
+class _Encoder:
+    """Turns batches of flattened rows into chunks of one output file."""
+
+    def __init__(self, fmt: str, columns: List[Column]):
+        self.fmt = fmt
+        self.columns = columns
+        self.sink = _Sink()
+        if fmt == "csv":
+            self.text = io.StringIO()
+            self.csv = csv.writer(self.text)
+            self.csv.writerow([column.name for column in columns])
+            return
+        self.schema = _arrow_schema(columns)
+        if fmt == "parquet":
+            self.writer = pq.ParquetWriter(self.sink, self.schema, compression="zstd")
+        else:
+            self.writer = pa.ipc.new_stream(self.sink, self.schema)
+
+    def _drain_text(self) -> bytes:
+        data = self.text.getvalue().encode()
+        self.text.seek(0)
+        self.text.truncate()
+        return data
+
+    def encode(self, rows: List[Tuple]) -> bytes:
+        if self.fmt == "csv":
+            self.csv.writerows(map(_csv_safe, rows))
+            return self._drain_text()
+        # One row group (Parquet) or record batch (Arrow) per stored batch
+        table = pa.Table.from_arrays(
+            [
+                pa.array([row[i] for row in rows], type=field.type)
+                for i, field in enumerate(self.schema)
+            ],
+            schema=self.schema,
+        )
+        self.writer.write_table(table)
+        return self.sink.drain()
+
+    def close(self) -> bytes:
+        if self.fmt == "csv":
+            # The header, if no rows were written
+            return self._drain_text()
+        self.writer.close()
+        return self.sink.drain()
+
+
+def export_available(fmt: str) -> bool:
+    return fmt == "csv" or pa is not None
+
+
+async def export_chunks(
+    resource: str, fmt: str, batches: AsyncIterator[List[str]]
+) -> AsyncIterator[bytes]:
+    """Encode stored records batch by batch as CSV, Parquet or Arrow.
+
+    Memory is bounded by one batch: each is flattened and encoded (off the
+    event loop) and sent before the next is read.
+    """
+    loop = asyncio.get_running_loop()
+    columns = EXPORT_COLUMNS[resource]
+    encoder = await loop.run_in_executor(None, _Encoder, fmt, columns)
+
+    def encode(batch: List[str]) -> bytes:
+        return encoder.encode(flatten(columns, batch))
+
+    async for batch in batches:
+        if batch:
+            data = await loop.run_in_executor(None, encode, batch)
+            if data:
+                yield data
+    yield await loop.run_in_executor(None, encoder.close)
@@ -0,0 +1,282 @@
+import hashlib
+import zlib
+from typing import List, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.api.local_store import LocalStore, local_store
+from backend.config import HTTP_COMPRESS_MIN_BYTES, HTTP_ETAG_MAX_BYTES
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Compression settings suited to responses built per request: brotli's and
+# zlib's maximum levels cost far more CPU for a few percent less output
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+# Open-ended streams, passed on untouched as each chunk is written
+UNBUFFERED_TYPES = ("text/event-stream",)
+_ENCODING_SUFFIXES = ("-br", "-gzip")
+_NOT_MODIFIED_DROP = ("content-length", "content-type", "content-encoding")
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    tag = tag.strip('"')
+    for suffix in _ENCODING_SUFFIXES:
+        if tag.endswith(suffix):
+            return tag[: -len(suffix)]
+    return tag
+
+
+def match_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """Return the tag from ``If-None-Match`` that matches ``etag``, if any.
+
+    Uses the weak comparison RFC 9110 prescribes for ``If-None-Match`` and
+    ignores the encoding suffix added to tags of compressed responses.
+    """
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+    wanted = _opaque(etag)
+    for tag in if_none_match.split(","):
+        if tag.strip() and _opaque(tag) == wanted:
+            return tag.strip()
+    return None
+
+
+async def collection_etag(
+    request: Request, tenant_id: str, resource: str, store: LocalStore = local_store
+) -> str:
+    """Weak ETag for a list served from the local store.
+
+    Derived from the newest ``UpdatedDateUTC`` and record count of the
+    stored collection (``LocalStore.version``) plus the query string, so a
+    poll can be answered with 304 before any record is read.
+    """
+    newest, count = await store.version(tenant_id, resource)
+    key = f"{tenant_id}|{resource}|{newest}|{count}|{request.url.query}"
+    return f'W/"{hashlib.blake2b(key.encode(), digest_size=16).hexdigest()}"'
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """A 304 response if the client already holds ``etag``, else None."""
+    matched = match_etag(request.headers.get("if-none-match"), etag)
+    if matched is None:
+        return None
+    return Response(
+        status_code=304, headers={"ETag": matched, "Cache-Control": "private, no-cache"}
+    )
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick ``br`` or ``gzip`` from an ``Accept-Encoding`` header."""
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class _Encoder:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        # Each chunk is flushed so a streamed body reaches the client as it
+        # is produced instead of when the compressor's window fills up
+        if self._brotli is not None:
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if final else self._brotli.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class HTTPCacheMiddleware:
+    """ETags, conditional GETs and gzip/brotli compression for GET responses.
+
+    A 200 response whose route did not set an ``ETag`` gets a strong one
+    hashed from its body, if the body is at most ``etag_max_bytes``; routes
+    that can tell cheaply whether their data changed set a weak one
+    themselves (see ``collection_etag``). A request whose ``If-None-Match``
+    matches is answered with 304 and no body. JSON and text bodies of at
+    least ``minimum_size`` bytes are compressed when the client accepts it.
+    A body larger than what has to be held is passed on, compressed chunk by
+    chunk, as it is produced.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = HTTP_COMPRESS_MIN_BYTES,
+        etag_max_bytes: int = HTTP_ETAG_MAX_BYTES,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.etag_max_bytes = etag_max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        responder = _Responder(self, Headers(scope=scope), send)
+        await self.app(scope, receive, responder.send)
+
+
+class _Responder:
+    def __init__(self, middleware: HTTPCacheMiddleware, request: Headers, send: Send):
+        self.minimum_size = middleware.minimum_size
+        self.etag_max_bytes = middleware.etag_max_bytes
+        self.if_none_match = request.get("if-none-match")
+        self.accept_encoding = request.get("accept-encoding", "")
+        self._send = send
+        self.start: Optional[Message] = None
+        self.headers: Optional[MutableHeaders] = None
+        self.mode = "pass"
+        self.encoding: Optional[str] = None
+        self.encoder: Optional[_Encoder] = None
+        self.buffer: List[bytes] = []
+        self.buffered = 0
+        self.limit = 0
+
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            await self._on_start(message)
+        elif message["type"] == "http.response.body":
+            await self._on_body(message)
+        else:
+            await self._send(message)
+
+    async def _on_start(self, message: Message):
+        headers = MutableHeaders(scope=message)
+        if message["status"] != 200:
+            await self._send(message)
+            return
+        content_type = headers.get("content-type", "")
+        if content_type.startswith(UNBUFFERED_TYPES):
+            await self._send(message)
+            return
+        compressible = content_type.startswith(COMPRESSIBLE_TYPES)
+        if compressible and "content-encoding" not in headers:
+            headers.add_vary_header("Accept-Encoding")
+            self.encoding = choose_encoding(self.accept_encoding)
+        etag = headers.get("etag")
+        if etag is not None:
+            headers.setdefault("cache-control", "private, no-cache")
+            matched = match_etag(self.if_none_match, etag)
+            if matched is not None:
+                self.mode = "discard"
+                await self._send_not_modified(message, headers, matched)
+                return
+        if etag is None and compressible:
+            self.limit = self.etag_max_bytes
+        elif self.encoding is not None:
+            self.limit = self.minimum_size
+        else:
+            await self._send(message)
+            return
+        self.start, self.headers, self.mode = message, headers, "buffer"
+
+    async def _on_body(self, message: Message):
+        if self.mode == "pass":
+            await self._send(message)
+            return
+        if self.mode == "discard":
+            return
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.mode == "stream":
+            data = self.encoder.compress(body, not more_body) if self.encoder else body
+            if data or not more_body:
+                await self._send(
+                    {"type": "http.response.body", "body": data, "more_body": more_body}
+                )
+            return
+
+        if not more_body:
+            if self.buffer:
+                self.buffer.append(body)
+                body = b"".join(self.buffer)
+                self.buffer = []
+            await self._finish(body)
+            return
+        self.buffer.append(body)
+        self.buffered += len(body)
+        if self.buffered > self.limit:
+            await self._start_streaming()
+
+    async def _send_not_modified(
+        self, message: Message, headers: MutableHeaders, etag: str
+    ):
+        for name in _NOT_MODIFIED_DROP:
+            if name in headers:
+                del headers[name]
+        headers["etag"] = etag
+        message["status"] = 304
+        await self._send(message)
+        await self._send({"type": "http.response.body", "body": b""})
+
+    def _encode_headers(self):
+        self.headers["content-encoding"] = self.encoding
+        etag = self.headers.get("etag")
+        if etag is not None and not etag.startswith("W/"):
+            # A compressed body is a different representation of the resource
+            self.headers["etag"] = f'{etag[:-1]}-{self.encoding}"'
+
+    async def _finish(self, body: bytes):
+        headers = self.headers
+        if "etag" not in headers and len(body) <= self.etag_max_bytes:
+            digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+            headers["etag"] = f'"{digest}"'
+            headers.setdefault("cache-control", "private, no-cache")
+            matched = match_etag(self.if_none_match, headers["etag"])
+            if matched is not None:
+                await self._send_not_modified(self.start, headers, matched)
+                return
+        if self.encoding is not None and len(body) >= self.minimum_size:
+            self._encode_headers()
+            body = _Encoder(self.encoding).compress(body, final=True)
+        headers["content-length"] = str(len(body))
+        await self._send(self.start)
+        await self._send({"type": "http.response.body", "body": body})
+
+    async def _start_streaming(self):
+        if "content-length" in self.headers:
+            del self.headers["content-length"]
+        if self.encoding is not None:
+            self._encode_headers()
+            self.encoder = _Encoder(self.encoding)
+        self.mode = "stream"
+        await self._send(self.start)
+        body = b"".join(self.buffer)
+        self.buffer = []
+        if self.encoder is not None:
+            body = self.encoder.compress(body, final=False)
+        await self._send(
+            {"type": "http.response.body", "body": body, "more_body": True}
+        )
@@ -0,0 +1,289 @@
+import asyncio
+import hashlib
+import json
+import logging
+import uuid
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from pydantic import ValidationError
+from xero_python.accounting import Contact as XeroContact
+from xero_python.accounting import CurrencyCode
+from xero_python.accounting import Invoice as XeroInvoice
+from xero_python.accounting import LineItem as XeroLineItem
+
+from backend.api.account_utils import ChartOfAccounts, accounts_cache
+from backend.api.sync_engine import sync_engine
+from backend.api.xero_client import xero_client
+from backend.config import XERO_BULK_CHUNK_SIZE, XERO_BULK_CONCURRENCY
+from backend.models.invoice_models import Invoice
+
+logger = logging.getLogger(__name__)
+
+# Xero rejects idempotency keys longer than this
+IDEMPOTENCY_KEY_MAX_LENGTH = 128
+
+ParsedInvoice = Tuple[int, Union[Invoice, Exception]]
+
+
+def chunk_key(batch_key: str, items: List[Tuple[int, Invoice]]) -> str:
+    """Idempotency key of one chunk, derived from the invoices it holds.
+
+    Chunk positions shift when failed invoices are fixed and the batch is
+    resent, so the key hashes each invoice's input index and full content:
+    an unchanged chunk gets the same key (and Xero replays its response),
+    while a chunk with a corrected invoice gets a new one and is sent again.
+    """
+    digest = hashlib.sha256()
+    for index, invoice in items:
+        digest.update(f"{index}:{invoice.model_dump_json()}\n".encode())
+    return f"{batch_key}-{digest.hexdigest()[:32]}"
+
+
+async def invoice_chart(tenant_id: str) -> Optional[ChartOfAccounts]:
+    """The chart of accounts to check invoices against, or None.
+
+    Without one (the accounts could not be loaded) invoices are sent
+    unchecked.
+    """
+    try:
+        return await accounts_cache.get(tenant_id, tax_rates=True)
+    except Exception as e:
+        # Xero validates the invoices anyway
+        logger.warning(f"Sending invoices unchecked, no chart of accounts: {e}")
+        return None
+
+
+def to_xero_invoice(invoice: Invoice) -> XeroInvoice:
+    """Convert a validated request invoice into the SDK model."""
+    return XeroInvoice(
+        type=invoice.type,
+        contact=XeroContact(contact_id=invoice.contact.contact_id),
+        line_items=[
+            XeroLineItem(
+                description=item.description,
+                quantity=item.quantity,
+                unit_amount=item.unit_amount,
+                account_code=item.account_code,
+                tax_type=item.tax_type,
+            )
+            for item in invoice.line_items
+        ],
+        date=invoice.date,
+        due_date=invoice.due_date,
+        invoice_number=invoice.invoice_number,
+        status=invoice.status,
+        currency_code=CurrencyCode(invoice.currency_code),
+        reference=invoice.reference,
+    )
+
+
+def _parse(index: int, data) -> ParsedInvoice:
+    try:
+        return index, Invoice.model_validate(data)
+    except ValidationError as e:
+        return index, e
+
+
+async def parse_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedInvoice]:
+    """Parse an NDJSON body line by line, validating each invoice on its own.
+
+    Only one line is held in memory at a time; a line that is not valid JSON
+    or not a valid invoice is yielded as its exception instead of aborting
+    the upload.
+    """
+    buffer = b""
+    index = 0
+
+    def parse_line(line: bytes) -> ParsedInvoice:
+        try:
+            return _parse(index, json.loads(line))
+        except ValueError as e:
+            return index, e
+
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield parse_line(line)
+                index += 1
+    if buffer.strip():
+        yield parse_line(buffer)
+
+
+async def parse_json_list(items: Iterable) -> AsyncIterator[ParsedInvoice]:
+    """Validate the invoices of an already decoded JSON body one by one."""
+    for index, data in enumerate(items):
+        yield _parse(index, data)
+
+
+def _failure(index: int, invoice: Optional[Invoice], *errors: str) -> dict:
+    return {
+        "index": index,
+        "invoice_number": invoice.invoice_number if invoice else None,
+        "status": "failed",
+        "errors": list(errors),
+    }
+
+
+class BulkInvoiceCreator:
+    """Creates large invoice batches in Xero-sized chunks.
+
+    Invoices are read from an async iterator and sent ``chunk_size`` at a
+    time with ``summarize_errors=False``, so Xero saves the valid invoices
+    of a chunk and reports the invalid ones individually. At most
+    ``concurrency`` chunks are in flight; reading the input waits for a free
+    slot, so a large upload is never held in memory as a whole. Every chunk
+    carries its own idempotency key (``chunk_key``) derived from the batch
+    key and its invoices, which makes it safe to resend a batch under the
+    same key after a failure. Line items are checked against the tenant's
+    cached chart of accounts and tax rates first; an invoice that fails the
+    check is not sent.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = XERO_BULK_CHUNK_SIZE,
+        concurrency: int = XERO_BULK_CONCURRENCY,
+    ):
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+
+    async def create(
+        self,
+        tenant_id: str,
+        invoices: AsyncIterator[ParsedInvoice],
+        batch_key: Optional[str] = None,
+        on_progress: Optional[Callable[[int], Awaitable]] = None,
+    ) -> dict:
+        """Create every invoice and return a summary with per-invoice results.
+
+        ``on_progress`` is awaited with the number of invoices submitted so
+        far each time a chunk completes.
+        """
+        batch_key = batch_key or str(uuid.uuid4())
+        chart = await invoice_chart(tenant_id)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results: List[dict] = []
+        tasks: List[asyncio.Task] = []
+        chunk: List[Tuple[int, Invoice]] = []
+        submitted = 0
+
+        async def submit(items: List[Tuple[int, Invoice]]):
+            nonlocal submitted
+            try:
+                chunk_results = await self._create_chunk(
+                    tenant_id, items, chunk_key(batch_key, items)
+                )
+            finally:
+                semaphore.release()
+            submitted += len(items)
+            if on_progress is not None:
+                await on_progress(submitted)
+            return chunk_results
+
+        def flush():
+            nonlocal chunk
+            tasks.append(asyncio.create_task(submit(chunk)))
+            chunk = []
+
+        try:
+            async for index, item in invoices:
+                if isinstance(item, Exception):
+                    results.append(_failure(index, None, str(item)))
+                    continue
+                errors = chart.check_line_items(item.line_items) if chart else []
+                if errors:
+                    results.append(_failure(index, item, *errors))
+                    continue
+                chunk.append((index, item))
+                if len(chunk) == self.chunk_size:
+                    await semaphore.acquire()
+                    flush()
+            if chunk:
+                await semaphore.acquire()
+                flush()
+            for chunk_results in await asyncio.gather(*tasks):
+                results.extend(chunk_results)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        results.sort(key=lambda result: result["index"])
+        created = sum(1 for result in results if result["status"] == "created")
+        logger.info(
+            f"Bulk invoice batch {batch_key} for tenant {tenant_id}: "
+            f"{created} created, {len(results) - created} failed"
+        )
+        return {
+            "batch_key": batch_key,
+            "total": len(results),
+            "created": created,
+            "failed": len(results) - created,
+            "results": results,
+        }
+
+    async def _create_chunk(
+        self, tenant_id: str, items: List[Tuple[int, Invoice]], idempotency_key: str
+    ) -> List[dict]:
+        request_body = {"Invoices": [to_xero_invoice(invoice) for _, invoice in items]}
+        try:
+            response = await xero_client.create_invoices(
+                tenant_id,
+                invoices=request_body,
+                summarize_errors=False,
+                idempotency_key=idempotency_key[-IDEMPOTENCY_KEY_MAX_LENGTH:],
+            )
+        except Exception as e:
+            logger.error(f"Invoice chunk {idempotency_key} failed: {str(e)}")
+            return [_failure(index, invoice, str(e)) for index, invoice in items]
+
+        results = []
+        saved = []
+        returned = response.invoices or []
+        # Xero answers in request order, one invoice per submitted invoice
+        for (index, invoice), created in zip(items, returned):
+            if created.has_errors:
+                errors = [error.message for error in created.validation_errors or []]
+                results.append(
+                    {
+                        "index": index,
+                        "invoice_number": invoice.invoice_number,
+                        "status": "failed",
+                        "errors": errors,
+                    }
+                )
+            else:
+                saved.append(created)
+                results.append(
+                    {
+                        "index": index,
+                        "invoice_number": invoice.invoice_number,
+                        "status": "created",
+                        "invoice_id": created.invoice_id,
+                    }
+                )
+
+        for index, invoice in items[len(returned) :]:
+            results.append(_failure(index, invoice, "No result returned by Xero"))
+
+        if saved:
+            try:
+                await sync_engine.store_records(tenant_id, "invoices", saved)
+            except Exception as e:
+                logger.warning(f"Failed to store created invoices locally: {str(e)}")
+        return results
+
+
+bulk_invoice_creator = BulkInvoiceCreator()
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import uuid
+from contextlib import ExitStack, suppress
+from typing import AsyncIterator, BinaryIO, Iterable, List, Tuple
+
+from backend.api.attachments import InspectedFile, attachment_uploader
+from backend.api.invoice_bulk import bulk_invoice_creator, parse_ndjson
+from backend.api.job_queue import Job, job_queue
+from backend.api.rate_limiter import LOW_PRIORITY, RateLimitExceeded
+from backend.api.sync_engine import RESOURCES, sync_engine
+from backend.config import XERO_JOB_SPOOL_DIR, XERO_JOB_SPOOL_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+# Bytes read per step when spooling or replaying a file
+SPOOL_CHUNK_SIZE = 64 * 1024
+
+
+def new_spool_path(suffix: str = "") -> str:
+    """Return a fresh path in the spool directory for a job's input."""
+    os.makedirs(XERO_JOB_SPOOL_DIR, exist_ok=True)
+    return os.path.join(XERO_JOB_SPOOL_DIR, f"{uuid.uuid4()}{suffix}")
+
+
+class SpoolTooLarge(Exception):
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        super().__init__(f"Request body is larger than the {max_bytes} byte limit")
+
+
+async def spool_stream(
+    chunks: AsyncIterator[bytes],
+    path: str,
+    max_bytes: int = XERO_JOB_SPOOL_MAX_BYTES,
+) -> int:
+    """Write a request body to ``path``; returns the number of lines written.
+
+    Raises ``SpoolTooLarge`` (and removes the partial file) once the body
+    exceeds ``max_bytes``.
+    """
+    loop = asyncio.get_running_loop()
+    lines = 0
+    size = 0
+    last = b"\n"
+    try:
+        with open(path, "wb") as spool:
+            async for chunk in chunks:
+                if chunk:
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise SpoolTooLarge(max_bytes)
+                    await loop.run_in_executor(None, spool.write, chunk)
+                    lines += chunk.count(b"\n")
+                    last = chunk[-1:]
+    except BaseException:
+        with suppress(OSError):
+            os.remove(path)
+        raise
+    return lines + (last != b"\n")
+
+
+async def spool_json_lines(items: Iterable, path: str) -> int:
+    """Write decoded JSON items to ``path`` as NDJSON; returns the item count."""
+    body = "".join(json.dumps(item) + "\n" for item in items).encode()
+    await asyncio.get_running_loop().run_in_executor(None, _write, path, body)
+    return body.count(b"\n")
+
+
+async def spool_file(source: BinaryIO, path: str):
+    """Copy an uploaded file object to ``path`` off the event loop."""
+
+    def copy():
+        source.seek(0)
+        with open(path, "wb") as spool:
+            shutil.copyfileobj(source, spool, SPOOL_CHUNK_SIZE)
+
+    await asyncio.get_running_loop().run_in_executor(None, copy)
+
+
+def _write(path: str, body: bytes):
+    with open(path, "wb") as spool:
+        spool.write(body)
+
+
+async def _read_chunks(path: str) -> AsyncIterator[bytes]:
+    loop = asyncio.get_running_loop()
+    with open(path, "rb") as spool:
+        while True:
+            chunk = await loop.run_in_executor(None, spool.read, SPOOL_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+@job_queue.handler("bulk_invoices")
+async def run_bulk_invoices(job: Job):
+    """Create the invoices spooled as NDJSON at ``params["path"]``."""
+    total = job.params.get("total")
+
+    async def report(done: int):
+        await job_queue.progress(job, done, total)
+
+    # The job id doubles as the batch key, so a job resumed after a restart
+    # resends its chunks with the same idempotency keys.
+    return await bulk_invoice_creator.create(
+        job.tenant_id,
+        parse_ndjson(_read_chunks(job.params["path"])),
+        batch_key=job.id,
+        on_progress=report,
+    )
+
+
+async def queue_attachment_uploads(
+    tenant_id: str, items: List[Tuple[int, str, InspectedFile]]
+) -> Job:
+    """Spool inspected uploads to disk and queue them as one job."""
+    spooled = []
+    for index, invoice_id, inspected in items:
+        path = new_spool_path()
+        await spool_file(inspected.file, path)
+        spooled.append(
+            {
+                "index": index,
+                "invoice_id": invoice_id,
+                "file_name": inspected.file_name,
+                "size": inspected.size,
+                "sha256": inspected.sha256,
+                "path": path,
+            }
+        )
+    return await job_queue.submit(
+        "invoice_attachments",
+        tenant_id,
+        {"items": spooled, "spool": [item["path"] for item in spooled]},
+    )
+
+
+@job_queue.handler("invoice_attachments")
+async def run_invoice_attachments(job: Job):
+    """Upload the files spooled by ``queue_attachment_uploads``."""
+    items = job.params["items"]
+    with ExitStack() as stack:
+        uploads = [
+            (
+                item["index"],
+                item["invoice_id"],
+                InspectedFile(
+                    stack.enter_context(open(item["path"], "rb")),
+                    item["file_name"],
+                    item["size"],
+                    item["sha256"],
+                ),
+            )
+            for item in items
+        ]
+        results = await attachment_uploader.upload_many(job.tenant_id, uploads)
+    await job_queue.progress(job, len(items), len(items))
+    return {"results": results}
+
+
+@job_queue.handler("sync")
+async def run_sync(job: Job):
+    """Pull changes for one or all resources at low priority.
+
+    Low-priority calls are shed when a tenant is close to its limits; the
+    job then waits for the suggested time and carries on, so interactive
+    requests keep their share of the quota.
+    """
+    only = job.params.get("resource")
+    resources = [only] if only else list(RESOURCES)
+    changed = {}
+    for done, resource in enumerate(resources):
+        while True:
+            try:
+                changed[resource] = await sync_engine.sync(
+                    job.tenant_id,
+                    resource,
+                    force=job.params.get("force", False),
+                    priority=LOW_PRIORITY,
+                )
+                break
+            except RateLimitExceeded as e:
+                logger.info(f"Sync job {job.id} waiting {e.retry_after:.0f}s: {e}")
+                await asyncio.sleep(e.retry_after)
+        await job_queue.progress(job, done + 1, len(resources))
+    return {"changed": changed}
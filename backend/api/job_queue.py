@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from backend.api.job_store import JobStore
+from backend.api.responses import FastJSONResponse
+from backend.auth.token_store import acting_as, current_user
+from backend.config import XERO_JOB_DB, XERO_JOB_HISTORY, XERO_JOB_WORKERS
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    tenant_id: Optional[str]
+    params: dict
+    user_id: Optional[str] = None
+    status: str = QUEUED
+    progress: dict = field(default_factory=lambda: {"done": 0, "total": None})
+    result: Optional[object] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    cancel_requested: bool = field(default=False, repr=False)
+
+    def to_dict(self) -> dict:
+        job = asdict(self)
+        job.pop("cancel_requested")
+        return job
+
+
+def accepted_response(job: Job, **extra) -> FastJSONResponse:
+    """202 response pointing the client at the job's status endpoint."""
+    status_url = f"/jobs/{job.id}"
+    return FastJSONResponse(
+        status_code=202,
+        content={
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": status_url,
+            **extra,
+        },
+        headers={"Location": status_url},
+    )
+
+
+class JobQueue:
+    """In-process queue running long Xero operations on worker tasks.
+
+    Handlers are registered per job kind with ``handler`` and receive the
+    ``Job``; they report progress through ``progress`` and return a
+    JSON-serializable result. ``workers`` jobs run at once, and the calls
+    they make still go through the gateway's rate-limit scheduler, so the
+    queue drains as fast as Xero allows. Finished jobs stay in memory up to
+    ``history`` entries.
+
+    With a ``JobStore`` every state change is persisted; on ``start`` jobs
+    that were queued or running when the process stopped are queued again.
+    Files listed in a job's ``params["spool"]`` are deleted once the job
+    has finished, and kept until then so a resumed job can read them.
+
+    A job runs as the user who submitted it, so its Xero calls use their
+    token even after a restart.
+    """
+
+    def __init__(
+        self,
+        workers: int = XERO_JOB_WORKERS,
+        store: Optional[JobStore] = None,
+        history: int = XERO_JOB_HISTORY,
+    ):
+        self.workers = workers
+        self.store = store
+        self.history = history
+        self._handlers: Dict[str, Callable[[Job], Awaitable]] = {}
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._running: Dict[str, asyncio.Task] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+
+    def handler(self, kind: str):
+        """Decorator registering the coroutine function that runs ``kind`` jobs."""
+
+        def register(func):
+            self._handlers[kind] = func
+            return func
+
+        return register
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        if self.store is not None:
+            for saved in await self.store.load(QUEUED, RUNNING):
+                job = Job(**saved)
+                job.status = QUEUED
+                self._jobs[job.id] = job
+                self._queue.put_nowait(job.id)
+                logger.info(f"Resuming {job.kind} job {job.id}")
+        self._worker_tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+
+    async def stop(self):
+        """Stop the workers; unfinished jobs stay queued in the store."""
+        tasks = self._worker_tasks + list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker_tasks = []
+        if self.store is not None:
+            self.store.close()
+
+    async def submit(self, kind: str, tenant_id: Optional[str], params: dict) -> Job:
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = Job(
+            id=str(uuid.uuid4()),
+            kind=kind,
+            tenant_id=tenant_id,
+            params=params,
+            user_id=current_user.get(),
+        )
+        self._jobs[job.id] = job
+        await self._save(job)
+        self._queue.put_nowait(job.id)
+        logger.info(f"Queued {kind} job {job.id} for tenant {tenant_id}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def find(self, job_id: str) -> Optional[Job]:
+        """Look a job up in memory, then in the store for older jobs."""
+        job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            saved = await self.store.get(job_id)
+            if saved is not None:
+                job = Job(**saved)
+        return job
+
+    def list(
+        self, tenant_id: Optional[str] = None, user_id: Optional[str] = None
+    ) -> List[Job]:
+        return [
+            job
+            for job in reversed(self._jobs.values())
+            if (tenant_id is None or job.tenant_id == tenant_id)
+            and (user_id is None or job.user_id == user_id)
+        ]
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job; finished jobs are left as they are."""
+        job = self._jobs.get(job_id)
+        if job is None or job.status in FINISHED:
+            return job
+        job.cancel_requested = True
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+        else:
+            await self._finish(job, CANCELLED)
+        return job
+
+    async def progress(self, job: Job, done: int, total: Optional[int] = None):
+        job.progress = {"done": done, "total": total}
+        await self._save(job)
+
+    async def _worker(self):
+        while True:
+            job = self._jobs.get(await self._queue.get())
+            if job is None or job.status != QUEUED:
+                continue
+            await self._run(job)
+
+    async def _run(self, job: Job):
+        handler = self._handlers.get(job.kind)
+        if handler is None:
+            # e.g. a job persisted by a version that had other handlers
+            await self._finish(job, FAILED, error=f"Unknown job kind: {job.kind}")
+            return
+        job.status = RUNNING
+        await self._save(job)
+        with acting_as(job.user_id):
+            task = asyncio.create_task(handler(job))
+        self._running[job.id] = task
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if not job.cancel_requested:
+                # The queue is stopping; leave the job to be resumed.
+                raise
+            await self._finish(job, CANCELLED)
+        except Exception as e:
+            logger.error(f"{job.kind} job {job.id} failed: {str(e)}", exc_info=True)
+            await self._finish(job, FAILED, error=str(e))
+        else:
+            await self._finish(job, SUCCEEDED, result=result)
+        finally:
+            self._running.pop(job.id, None)
+
+    async def _finish(self, job: Job, status: str, result=None, error=None):
+        job.status = status
+        job.result = result
+        job.error = error
+        await self._save(job)
+        for path in job.params.get("spool", []):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        logger.info(f"{job.kind} job {job.id} {status}")
+        self._trim()
+
+    def _trim(self):
+        finished = [
+            job_id for job_id, job in self._jobs.items() if job.status in FINISHED
+        ]
+        for job_id in finished[: max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    async def _save(self, job: Job):
+        job.updated_at = time.time()
+        if self.store is not None:
+            await self.store.save(job.to_dict())
+
+    def stats(self) -> dict:
+        counts = {status: 0 for status in (QUEUED, RUNNING) + FINISHED}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return counts
+
+
+job_queue = JobQueue(store=JobStore(XERO_JOB_DB) if XERO_JOB_DB else None)
@@ -0,0 +1,128 @@
+import asyncio
+import functools
+import json
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    tenant_id TEXT,
+    user_id TEXT,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status);
+"""
+
+COLUMNS = (
+    "id",
+    "kind",
+    "tenant_id",
+    "user_id",
+    "params",
+    "status",
+    "progress",
+    "result",
+    "error",
+    "created_at",
+    "updated_at",
+)
+JSON_COLUMNS = ("params", "progress", "result")
+
+
+class JobStore:
+    """SQLite persistence for the job queue, so jobs survive a restart.
+
+    Follows ``LocalStore``: one dedicated thread owns the connection and
+    every call is dispatched to it from the event loop. Jobs are saved as
+    plain dicts with their JSON fields encoded.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-store")
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "user_id" not in columns:
+                # Databases created before jobs recorded their user
+                conn.execute("ALTER TABLE jobs ADD COLUMN user_id TEXT")
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args)
+        )
+
+    def _save(self, job: dict):
+        row = [
+            json.dumps(job[column]) if column in JSON_COLUMNS else job[column]
+            for column in COLUMNS
+        ]
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in COLUMNS)})",
+                row,
+            )
+
+    async def save(self, job: dict):
+        await self._run(self._save, job)
+
+    @staticmethod
+    def _decode(row) -> dict:
+        job = dict(zip(COLUMNS, row))
+        for column in JSON_COLUMNS:
+            job[column] = json.loads(job[column]) if job[column] else None
+        return job
+
+    def _load(self, statuses: tuple) -> List[dict]:
+        rows = self._connect().execute(
+            f"SELECT {', '.join(COLUMNS)} FROM jobs "
+            f"WHERE status IN ({', '.join('?' for _ in statuses)}) "
+            "ORDER BY created_at",
+            statuses,
+        ).fetchall()
+        return [self._decode(row) for row in rows]
+
+    async def load(self, *statuses: str) -> List[dict]:
+        """Return the saved jobs in the given states, oldest first."""
+        return await self._run(self._load, statuses)
+
+    def _get(self, job_id: str) -> Optional[dict]:
+        row = self._connect().execute(
+            f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return self._decode(row) if row else None
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self._run(self._get, job_id)
+
+    def close(self):
+        def _close():
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+        self._executor.submit(_close).result()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,427 @@
+import re
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import AsyncIterator, List, Optional, Tuple
+
+import orjson
+from fastapi import HTTPException, Query
+
+from backend.api.local_store import LocalStore
+from backend.api.passthrough import parse_ms_date
+from backend.config import XERO_PAGE_SIZE
+
+_FIELD = re.compile(r"^[A-Za-z][A-Za-z0-9]*(\.[A-Za-z][A-Za-z0-9]*)*$")
+_ORDER = re.compile(r"^\s*(?P<field>[A-Za-z0-9.]+)(?:\s+(?P<dir>ASC|DESC))?\s*$", re.I)
+# Characters that could end a string literal or start an escape in Xero's
+# filter language; string values containing them are refused, not escaped
+_UNSAFE = re.compile(r'["\\\x00-\x1f]')
+
+STATUSES = {
+    "invoices": {"DRAFT", "SUBMITTED", "AUTHORISED", "PAID", "VOIDED", "DELETED"},
+    "contacts": {"ACTIVE", "ARCHIVED", "GDPRREQUEST"},
+    "bank_transactions": {"AUTHORISED", "DELETED", "VOIDED"},
+}
+# Record fields each filter applies to, per resource
+_STATUS_FIELD = {
+    "invoices": "Status",
+    "contacts": "ContactStatus",
+    "bank_transactions": "Status",
+}
+# Scalar fields a list can be ordered by, per resource
+ORDER_FIELDS = {
+    "invoices": [
+        "InvoiceID",
+        "InvoiceNumber",
+        "Reference",
+        "Type",
+        "Status",
+        "Contact.Name",
+        "Date",
+        "DueDate",
+        "CurrencyCode",
+        "SubTotal",
+        "TotalTax",
+        "Total",
+        "AmountDue",
+        "AmountPaid",
+        "AmountCredited",
+        "UpdatedDateUTC",
+    ],
+    "contacts": [
+        "ContactID",
+        "ContactNumber",
+        "AccountNumber",
+        "ContactStatus",
+        "Name",
+        "FirstName",
+        "LastName",
+        "EmailAddress",
+        "IsSupplier",
+        "IsCustomer",
+        "UpdatedDateUTC",
+    ],
+    "bank_transactions": [
+        "BankTransactionID",
+        "Reference",
+        "Type",
+        "Status",
+        "Contact.Name",
+        "BankAccount.Name",
+        "Date",
+        "IsReconciled",
+        "CurrencyCode",
+        "SubTotal",
+        "TotalTax",
+        "Total",
+        "UpdatedDateUTC",
+    ],
+}
+_PAGE_SIZE_MAX = 1000
+
+
+def guid(value) -> uuid.UUID:
+    """Parse a GUID, raising ValueError for anything else."""
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
+
+def where_literal(value) -> str:
+    """Render a Python value as a literal of Xero's ``where`` language."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, uuid.UUID):
+        return f'Guid("{value}")'
+    if isinstance(value, (date, datetime)):
+        return f"DateTime({value.year}, {value.month:02d}, {value.day:02d})"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, str):
+        if _UNSAFE.search(value):
+            raise ValueError(f"Unsupported character in filter value {value!r}")
+        return f'"{value}"'
+    raise TypeError(f"Cannot use {type(value).__name__} in a where clause")
+
+
+class Where:
+    """Builds a Xero ``where`` expression from typed conditions.
+
+    Field names are checked against a strict pattern and values are
+    rendered by ``where_literal``, so request data never reaches the
+    expression as raw text::
+
+        Where().eq("Status", "ACTIVE").eq("AccountID", guid(account_id)).build()
+    """
+
+    OPERATORS = {"eq": "==", "ne": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+    def __init__(self):
+        self._clauses: List[str] = []
+
+    def add(self, name: str, operator: str, value) -> "Where":
+        if not _FIELD.match(name):
+            raise ValueError(f"Invalid field name {name!r}")
+        self._clauses.append(f"{name}{self.OPERATORS[operator]}{where_literal(value)}")
+        return self
+
+    def eq(self, name: str, value) -> "Where":
+        return self.add(name, "eq", value)
+
+    def any_of(self, name: str, values) -> "Where":
+        """``name`` equal to one of ``values``."""
+        values = list(values)
+        if len(values) == 1:
+            return self.eq(name, values[0])
+        if values:
+            alternatives = Where()
+            for value in values:
+                alternatives.eq(name, value)
+            self._clauses.append(f"({' OR '.join(alternatives._clauses)})")
+        return self
+
+    def build(self) -> Optional[str]:
+        return " AND ".join(self._clauses) or None
+
+
+def field_value(record: dict, path: str):
+    """Value at a dotted ``path`` such as ``Contact.ContactID``, or None."""
+    value = record
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _sort_key(value):
+    """Sort key of a present value that never compares different types.
+
+    Numbers sort before dates and dates before other strings.
+    """
+    if isinstance(value, (bool, int, float)):
+        return (0, value)
+    if isinstance(value, str):
+        moment = parse_ms_date(value)
+        if moment is not None:
+            return (1, moment)
+        return (2, value)
+    return (3, orjson.dumps(value))
+
+
+@dataclass
+class ListQuery:
+    """Filters, order and paging requested for a list endpoint.
+
+    ``xero_kwargs`` turns them into SDK arguments for requests that go to
+    Xero (``raw=true``); ``select`` applies the same filters to the local
+    store, where the modified-since filter runs in SQLite and the others
+    on the decoded records.
+    """
+
+    resource: str
+    statuses: List[str] = field(default_factory=list)
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    contact_id: Optional[uuid.UUID] = None
+    is_reconciled: Optional[bool] = None
+    modified_since: Optional[datetime] = None
+    order: Optional[Tuple[str, bool]] = None
+    page: int = 1
+    page_size: Optional[int] = None
+
+    @property
+    def filters_records(self) -> bool:
+        return bool(
+            self.statuses
+            or self.date_from
+            or self.date_to
+            or self.contact_id
+            or self.is_reconciled is not None
+        )
+
+    def where(self) -> Where:
+        where = Where()
+        if self.statuses and self.resource != "invoices":
+            where.any_of(_STATUS_FIELD[self.resource], self.statuses)
+        if self.date_from:
+            where.add("Date", "gte", self.date_from)
+        if self.date_to:
+            where.add("Date", "lte", self.date_to)
+        if self.contact_id and self.resource != "invoices":
+            where.eq("Contact.ContactID", self.contact_id)
+        if self.is_reconciled is not None:
+            where.eq("IsReconciled", self.is_reconciled)
+        return where
+
+    def xero_kwargs(self) -> dict:
+        """SDK arguments for one page of the filtered collection.
+
+        Invoices are filtered with the dedicated ``statuses`` and
+        ``contact_i_ds`` arguments, which Xero serves faster than the
+        equivalent ``where`` conditions.
+        """
+        kwargs = {"page": self.page, "page_size": self.page_size or XERO_PAGE_SIZE}
+        where = self.where().build()
+        if where:
+            kwargs["where"] = where
+        if self.order:
+            name, descending = self.order
+            kwargs["order"] = f"{name} DESC" if descending else name
+        if self.modified_since:
+            kwargs["if_modified_since"] = self.modified_since
+        if self.resource == "contacts" and "ARCHIVED" in self.statuses:
+            kwargs["include_archived"] = True
+        if self.resource == "invoices":
+            if self.statuses:
+                kwargs["statuses"] = self.statuses
+            if self.contact_id:
+                kwargs["contact_i_ds"] = [str(self.contact_id)]
+        return kwargs
+
+    def matches(self, record: dict) -> bool:
+        status = field_value(record, _STATUS_FIELD[self.resource])
+        if self.statuses and status not in self.statuses:
+            return False
+        if self.date_from or self.date_to:
+            moment = parse_ms_date(field_value(record, "Date"))
+            if moment is None:
+                return False
+            if self.date_from and moment.date() < self.date_from:
+                return False
+            if self.date_to and moment.date() > self.date_to:
+                return False
+        if self.contact_id:
+            contact_id = field_value(record, "Contact.ContactID") or ""
+            if contact_id.lower() != str(self.contact_id):
+                return False
+        if self.is_reconciled is not None:
+            if bool(field_value(record, "IsReconciled")) != self.is_reconciled:
+                return False
+        return True
+
+    def _stored_since(self) -> Optional[str]:
+        moment = self.modified_since
+        if moment is None:
+            return None
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+        return moment.isoformat()
+
+    async def select(
+        self, store: LocalStore, tenant_id: str
+    ) -> AsyncIterator[List[str]]:
+        """Yield the stored JSON records that match, in batches.
+
+        Without an order, matches stream batch by batch and paging stops
+        reading once the page is full; with one, the matches are sorted in
+        memory before the page is cut.
+        """
+        batches = store.iter_json(
+            tenant_id, self.resource, modified_since=self._stored_since()
+        )
+        if self.page_size:
+            skip, limit = (self.page - 1) * self.page_size, self.page_size
+        else:
+            skip, limit = 0, None
+
+        if self.order is None:
+            async for batch in batches:
+                if self.filters_records:
+                    batch = [data for data in batch if self.matches(orjson.loads(data))]
+                if skip:
+                    dropped = min(skip, len(batch))
+                    batch, skip = batch[dropped:], skip - dropped
+                if limit is not None:
+                    batch, limit = batch[:limit], limit - min(limit, len(batch))
+                if batch:
+                    yield batch
+                if limit == 0:
+                    return
+            return
+
+        name, descending = self.order
+        keyed, missing = [], []
+        async for batch in batches:
+            for data in batch:
+                record = orjson.loads(data)
+                if self.matches(record):
+                    value = field_value(record, name)
+                    if value is None:
+                        missing.append(data)
+                    else:
+                        keyed.append((_sort_key(value), data))
+        keyed.sort(key=lambda item: item[0], reverse=descending)
+        # Records without the field come last in either direction
+        ordered = [data for _, data in keyed] + missing
+        end = None if limit is None else skip + limit
+        yield ordered[skip:end]
+
+
+def _parse_order(resource: str, order: Optional[str]) -> Optional[Tuple[str, bool]]:
+    if not order:
+        return None
+    match = _ORDER.match(order)
+    if match is None or not _FIELD.match(match.group("field")):
+        raise HTTPException(
+            status_code=400, detail='order must look like "Date" or "Date DESC"'
+        )
+    fields = {name.lower(): name for name in ORDER_FIELDS[resource]}
+    name = fields.get(match.group("field").lower())
+    if name is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot order by {match.group('field')}; expected one of "
+            f"{', '.join(ORDER_FIELDS[resource])}",
+        )
+    return name, (match.group("dir") or "").upper() == "DESC"
+
+
+def _parse_statuses(resource: str, status: Optional[List[str]]) -> List[str]:
+    statuses = []
+    for item in status or []:
+        statuses.extend(s.strip().upper() for s in item.split(",") if s.strip())
+    unknown = sorted(set(statuses) - STATUSES[resource])
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown status {', '.join(unknown)}; expected one of "
+            f"{', '.join(sorted(STATUSES[resource]))}",
+        )
+    return statuses
+
+
+_STATUS = Query(None, description="Status to keep; repeat or comma-separate")
+_MODIFIED_SINCE = Query(None, description="Only records updated at or after this")
+_ORDER_QUERY = Query(None, description='Sort field and direction, e.g. "Date DESC"')
+_PAGE = Query(1, ge=1, description="Page to return when page_size is set")
+_PAGE_SIZE = Query(
+    None, ge=1, le=_PAGE_SIZE_MAX, description="Records per page; all when unset"
+)
+_DATE_FROM = Query(None, description="Only records dated on or after this day")
+_DATE_TO = Query(None, description="Only records dated on or before this day")
+_CONTACT_ID = Query(None, description="Only records for this contact")
+
+
+def invoice_query(
+    status: Optional[List[str]] = _STATUS,
+    date_from: Optional[date] = _DATE_FROM,
+    date_to: Optional[date] = _DATE_TO,
+    contact_id: Optional[uuid.UUID] = _CONTACT_ID,
+    modified_since: Optional[datetime] = _MODIFIED_SINCE,
+    order: Optional[str] = _ORDER_QUERY,
+    page: int = _PAGE,
+    page_size: Optional[int] = _PAGE_SIZE,
+) -> ListQuery:
+    return ListQuery(
+        "invoices",
+        statuses=_parse_statuses("invoices", status),
+        date_from=date_from,
+        date_to=date_to,
+        contact_id=contact_id,
+        modified_since=modified_since,
+        order=_parse_order("invoices", order),
+        page=page,
+        page_size=page_size,
+    )
+
+
+def contact_query(
+    status: Optional[List[str]] = _STATUS,
+    modified_since: Optional[datetime] = _MODIFIED_SINCE,
+    order: Optional[str] = _ORDER_QUERY,
+    page: int = _PAGE,
+    page_size: Optional[int] = _PAGE_SIZE,
+) -> ListQuery:
+    return ListQuery(
+        "contacts",
+        # Like Xero, list active contacts unless asked for other statuses
+        statuses=_parse_statuses("contacts", status) or ["ACTIVE"],
+        modified_since=modified_since,
+        order=_parse_order("contacts", order),
+        page=page,
+        page_size=page_size,
+    )
+
+
+def bank_transaction_query(
+    status: Optional[List[str]] = _STATUS,
+    date_from: Optional[date] = _DATE_FROM,
+    date_to: Optional[date] = _DATE_TO,
+    contact_id: Optional[uuid.UUID] = _CONTACT_ID,
+    is_reconciled: Optional[bool] = Query(None, description="Reconciled or not"),
+    modified_since: Optional[datetime] = _MODIFIED_SINCE,
+    order: Optional[str] = _ORDER_QUERY,
+    page: int = _PAGE,
+    page_size: Optional[int] = _PAGE_SIZE,
+) -> ListQuery:
+    return ListQuery(
+        "bank_transactions",
+        statuses=_parse_statuses("bank_transactions", status),
+        date_from=date_from,
+        date_to=date_to,
+        contact_id=contact_id,
+        is_reconciled=is_reconciled,
+        modified_since=modified_since,
+        order=_parse_order("bank_transactions", order),
+        page=page,
+        page_size=page_size,
+    )
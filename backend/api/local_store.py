@@ -0,0 +1,279 @@
+import asyncio
+import functools
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from backend.config import XERO_SYNC_DB
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    tenant_id TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    updated_utc TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (tenant_id, resource, record_id)
+);
+CREATE INDEX IF NOT EXISTS records_updated
+    ON records (tenant_id, resource, updated_utc);
+CREATE TABLE IF NOT EXISTS sync_state (
+    tenant_id TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    high_water TEXT,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (tenant_id, resource)
+);
+CREATE TABLE IF NOT EXISTS attachment_uploads (
+    tenant_id TEXT NOT NULL,
+    invoice_id TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    data TEXT NOT NULL,
+    uploaded_at REAL NOT NULL,
+    PRIMARY KEY (tenant_id, invoice_id, sha256)
+);
+CREATE TABLE IF NOT EXISTS tenant_users (
+    tenant_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    seen_at REAL NOT NULL
+);
+"""
+
+
+class LocalStore:
+    """Per-tenant SQLite copy of Xero records, stored as serialized JSON.
+
+    All database work runs on a single dedicated thread, so the event loop
+    never blocks on disk I/O and the connection is never shared between
+    threads. Rows keep the JSON produced by ``serialize()`` so they can be
+    written to a response without being decoded again.
+    """
+
+    def __init__(self, path: str = XERO_SYNC_DB):
+        self.path = path
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="local-store"
+        )
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args)
+        )
+
+    def _upsert(self, tenant_id: str, resource: str, rows: List[Tuple]):
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT INTO records (tenant_id, resource, record_id, updated_utc, data) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (tenant_id, resource, record_id) DO UPDATE SET "
+                "updated_utc = excluded.updated_utc, data = excluded.data",
+                [(tenant_id, resource, *row) for row in rows],
+            )
+
+    async def upsert(
+        self, tenant_id: str, resource: str, rows: Iterable[Tuple[str, str, str]]
+    ):
+        """Insert or replace ``(record_id, updated_utc, json)`` rows."""
+        rows = list(rows)
+        if rows:
+            await self._run(self._upsert, tenant_id, resource, rows)
+
+    def _fetch_batch(
+        self,
+        tenant_id: str,
+        resource: str,
+        after: str,
+        size: int,
+        modified_since: Optional[str],
+    ):
+        return self._connect().execute(
+            "SELECT record_id, data FROM records "
+            "WHERE tenant_id = ? AND resource = ? AND record_id > ? "
+            "AND (? IS NULL OR updated_utc >= ?) "
+            "ORDER BY record_id LIMIT ?",
+            (tenant_id, resource, after, modified_since, modified_since, size),
+        ).fetchall()
+
+    async def iter_json(
+        self,
+        tenant_id: str,
+        resource: str,
+        batch_size: int = 500,
+        modified_since: Optional[str] = None,
+    ) -> AsyncIterator[List[str]]:
+        """Yield the stored JSON documents of a resource in batches.
+
+        Batches are read with keyset pagination, so memory stays bounded by
+        ``batch_size`` no matter how many records the tenant has. With
+        ``modified_since`` (naive UTC, ISO format) only records updated at
+        or after it are read.
+        """
+        after = ""
+        while True:
+            batch = await self._run(
+                self._fetch_batch,
+                tenant_id,
+                resource,
+                after,
+                batch_size,
+                modified_since,
+            )
+            if not batch:
+                return
+            after = batch[-1][0]
+            yield [data for _, data in batch]
+
+    def _get_many(self, tenant_id: str, resource: str, ids: List[str]):
+        found = {}
+        conn = self._connect()
+        # Stay below SQLite's limit on bound parameters
+        for start in range(0, len(ids), 500):
+            chunk = ids[start : start + 500]
+            found.update(
+                conn.execute(
+                    "SELECT record_id, data FROM records "
+                    "WHERE tenant_id = ? AND resource = ? "
+                    f"AND record_id IN ({', '.join('?' * len(chunk))})",
+                    (tenant_id, resource, *chunk),
+                ).fetchall()
+            )
+        return found
+
+    async def get_many(
+        self, tenant_id: str, resource: str, ids: List[str]
+    ) -> Dict[str, str]:
+        """Return the stored JSON of the given records, keyed by id."""
+        if not ids:
+            return {}
+        return await self._run(self._get_many, tenant_id, resource, ids)
+
+    def _get_state(self, tenant_id: str, resource: str):
+        return self._connect().execute(
+            "SELECT high_water, synced_at FROM sync_state "
+            "WHERE tenant_id = ? AND resource = ?",
+            (tenant_id, resource),
+        ).fetchone()
+
+    async def get_state(
+        self, tenant_id: str, resource: str
+    ) -> Optional[Tuple[Optional[str], float]]:
+        """Return ``(high_water, synced_at)`` or None if never synced."""
+        return await self._run(self._get_state, tenant_id, resource)
+
+    def _set_state(self, tenant_id: str, resource: str, high_water: Optional[str]):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO sync_state (tenant_id, resource, high_water, synced_at) "
+                "VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (tenant_id, resource) DO UPDATE SET "
+                "high_water = excluded.high_water, synced_at = excluded.synced_at",
+                (tenant_id, resource, high_water, time.time()),
+            )
+
+    async def set_state(self, tenant_id: str, resource: str, high_water: Optional[str]):
+        await self._run(self._set_state, tenant_id, resource, high_water)
+
+    def _count(self, tenant_id: str, resource: str) -> int:
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM records WHERE tenant_id = ? AND resource = ?",
+            (tenant_id, resource),
+        ).fetchone()[0]
+
+    async def count(self, tenant_id: str, resource: str) -> int:
+        return await self._run(self._count, tenant_id, resource)
+
+    def _version(self, tenant_id: str, resource: str):
+        return self._connect().execute(
+            "SELECT MAX(updated_utc), COUNT(*) FROM records "
+            "WHERE tenant_id = ? AND resource = ?",
+            (tenant_id, resource),
+        ).fetchone()
+
+    async def version(self, tenant_id: str, resource: str) -> Tuple[Optional[str], int]:
+        """Return the newest ``updated_utc`` and the number of stored records.
+
+        Both are read from the ``records_updated`` index; together they
+        change whenever a record of the resource is added or updated.
+        """
+        return await self._run(self._version, tenant_id, resource)
+
+    def _get_upload(self, tenant_id: str, invoice_id: str, sha256: str):
+        row = self._connect().execute(
+            "SELECT data FROM attachment_uploads "
+            "WHERE tenant_id = ? AND invoice_id = ? AND sha256 = ?",
+            (tenant_id, invoice_id, sha256),
+        ).fetchone()
+        return row[0] if row else None
+
+    async def get_upload(
+        self, tenant_id: str, invoice_id: str, sha256: str
+    ) -> Optional[str]:
+        """Return the stored JSON of an attachment uploaded with this content."""
+        return await self._run(self._get_upload, tenant_id, invoice_id, sha256)
+
+    def _record_upload(self, tenant_id: str, invoice_id: str, sha256: str, data: str):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO attachment_uploads "
+                "(tenant_id, invoice_id, sha256, data, uploaded_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (tenant_id, invoice_id, sha256, data, time.time()),
+            )
+
+    async def record_upload(
+        self, tenant_id: str, invoice_id: str, sha256: str, data: str
+    ):
+        await self._run(self._record_upload, tenant_id, invoice_id, sha256, data)
+
+    def _set_tenant_user(self, tenant_id: str, user_id: str):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO tenant_users (tenant_id, user_id, seen_at) "
+                "VALUES (?, ?, ?)",
+                (tenant_id, user_id, time.time()),
+            )
+
+    async def set_tenant_user(self, tenant_id: str, user_id: str):
+        """Remember ``user_id`` as a user whose token can reach the tenant."""
+        await self._run(self._set_tenant_user, tenant_id, user_id)
+
+    def _tenant_user(self, tenant_id: str):
+        row = self._connect().execute(
+            "SELECT user_id FROM tenant_users WHERE tenant_id = ?", (tenant_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    async def tenant_user(self, tenant_id: str) -> Optional[str]:
+        """The user that last synced the tenant, for work without a session."""
+        return await self._run(self._tenant_user, tenant_id)
+
+    def close(self):
+        def _close():
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+        self._executor.submit(_close).result()
+        self._executor.shutdown(wait=True)
+
+
+local_store = LocalStore()
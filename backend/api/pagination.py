@@ -0,0 +1,136 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Awaitable, Callable, Hashable, List, Optional
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+from backend.api.responses import FieldPath, project_encoded
+from backend.api.single_flight import SingleFlight, freeze
+from backend.config import XERO_PAGE_SIZE
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {"json": "application/json", "ndjson": "application/x-ndjson"}
+
+# List bodies being built, shared by identical requests that arrive meanwhile
+list_responses = SingleFlight()
+
+
+def _has_more(result, records: List, page: int, page_size: int) -> bool:
+    """Decide whether another page should be requested after ``page``."""
+    pagination = getattr(result, "pagination", None)
+    page_count = getattr(pagination or result, "page_count", None)
+    if page_count:
+        return page < page_count
+    return len(records) >= page_size
+
+
+async def iter_pages(
+    fetch: Callable[..., Awaitable],
+    tenant_id: str,
+    collection: str,
+    page_size: int = XERO_PAGE_SIZE,
+    **kwargs,
+) -> AsyncIterator[List]:
+    """Yield every page of a paged Xero collection.
+
+    ``fetch`` is a gateway method such as ``xero_client.get_invoices`` and
+    ``collection`` the attribute holding the records (``"invoices"``). The
+    request for page N+1 is issued as soon as page N arrives, so the Xero
+    round trip overlaps with whatever the consumer does with the current
+    page. At most two pages are held in memory at any time.
+    """
+
+    def request(page: int):
+        return asyncio.ensure_future(
+            fetch(tenant_id, page=page, page_size=page_size, **kwargs)
+        )
+
+    page = 1
+    pending = request(page)
+    try:
+        while pending is not None:
+            result = await pending
+            records = getattr(result, collection) or []
+            pending = None
+            if _has_more(result, records, page, page_size):
+                page += 1
+                pending = request(page)
+            yield records
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+async def _json_array_chunks(
+    envelope: str, batches: AsyncIterator[List[str]]
+) -> AsyncIterator[bytes]:
+    yield f'{{"{envelope}":['.encode()
+    separator = ""
+    async for batch in batches:
+        if batch:
+            yield (separator + ",".join(batch)).encode()
+            separator = ","
+    yield b"]}"
+
+
+async def _projected(
+    batches: AsyncIterator[List[str]], fields: List[FieldPath]
+) -> AsyncIterator[List[str]]:
+    async for batch in batches:
+        yield project_encoded(batch, fields)
+
+
+async def _ndjson_chunks(batches: AsyncIterator[List[str]]) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        if batch:
+            yield ("\n".join(batch) + "\n").encode()
+
+
+def request_key(request: Request, tenant_id: str) -> Hashable:
+    """Identify a list request by tenant, path and query, in any param order."""
+    return (
+        tenant_id,
+        request.url.path,
+        freeze(sorted(request.query_params.multi_items())),
+    )
+
+
+async def encoded_response(
+    batches: AsyncIterator[List[str]],
+    envelope: str,
+    stream: bool = False,
+    fmt: str = "json",
+    fields: Optional[List[FieldPath]] = None,
+    share_key: Optional[Hashable] = None,
+) -> Response:
+    """Build a list response from batches of already JSON-encoded records.
+
+    The records are written out as they are, without decoding them. With
+    ``stream`` the body is sent batch by batch as a chunked JSON document
+    (``{"<envelope>": [...]}``) or as NDJSON. Memory use is then bounded by
+    one batch. ``fields`` (see ``parse_fields``) trims each record down to
+    the given keys; only then are records decoded and re-encoded.
+
+    A body that is not streamed is built once for all concurrent requests
+    with the same ``share_key`` (see ``request_key``); the others do not
+    read ``batches`` at all.
+    """
+    if fields:
+        batches = _projected(batches, fields)
+    if fmt == "ndjson":
+        chunks = _ndjson_chunks(batches)
+    else:
+        chunks = _json_array_chunks(envelope, batches)
+    if stream:
+        return StreamingResponse(chunks, media_type=MEDIA_TYPES[fmt])
+
+    async def render() -> bytes:
+        return b"".join([chunk async for chunk in chunks])
+
+    if share_key is None:
+        content = await render()
+    else:
+        content = await list_responses.do(share_key, render)
+    return Response(content=content, media_type=MEDIA_TYPES[fmt])
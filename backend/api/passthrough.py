@@ -0,0 +1,94 @@
+import asyncio
+import json
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable, List, Optional
+
+from fastapi.responses import StreamingResponse
+from urllib3 import HTTPResponse
+
+from backend.api.xero_client import XeroClient, xero_client
+
+# Bytes read from Xero per step when streaming a response body
+RAW_CHUNK_SIZE = 64 * 1024
+
+_MS_DATE = re.compile(r"/Date\((-?\d+)")
+
+
+@dataclass
+class RawPage:
+    """One page of a Xero collection decoded to plain dicts, without SDK models."""
+
+    records: List[dict]
+    page_count: Optional[int] = None
+
+
+def parse_ms_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse Xero's ``/Date(1723161600000+0000)/`` as a naive UTC datetime."""
+    match = _MS_DATE.match(value or "")
+    if match is None:
+        return None
+    moment = datetime.fromtimestamp(int(match.group(1)) / 1000, timezone.utc)
+    return moment.replace(tzinfo=None)
+
+
+async def iter_body(response: HTTPResponse) -> AsyncIterator[bytes]:
+    """Read an unread SDK response in chunks, off the event loop.
+
+    The connection goes back to the pool once the body has been read; if
+    the reader stops early it is closed instead of being reused.
+    """
+    loop = asyncio.get_running_loop()
+    finished = False
+    try:
+        while True:
+            chunk = await loop.run_in_executor(None, response.read, RAW_CHUNK_SIZE)
+            if not chunk:
+                finished = True
+                return
+            yield chunk
+    finally:
+        if not finished:
+            response.close()
+        response.release_conn()
+
+
+async def read_body(response: HTTPResponse) -> bytes:
+    return b"".join([chunk async for chunk in iter_body(response)])
+
+
+def decode_page(body: bytes, envelope: str) -> RawPage:
+    data = json.loads(body)
+    pagination = data.get("pagination") or {}
+    return RawPage(data.get(envelope) or [], pagination.get("pageCount"))
+
+
+async def fetch_raw_page(
+    func: Callable,
+    tenant_id: str,
+    envelope: str,
+    client: XeroClient = xero_client,
+    **kwargs,
+) -> RawPage:
+    """Call an SDK list method and decode Xero's JSON with ``json.loads`` only.
+
+    This skips building the SDK's model objects and serializing them back,
+    which is where most of the CPU of a large read goes.
+    """
+    response = await client.call_raw(func, xero_tenant_id=tenant_id, **kwargs)
+    body = await read_body(response)
+    return await asyncio.get_running_loop().run_in_executor(
+        None, decode_page, body, envelope
+    )
+
+
+async def passthrough_response(
+    func: Callable, tenant_id: str, client: XeroClient = xero_client, **kwargs
+) -> StreamingResponse:
+    """Stream Xero's response to an SDK call to the client byte for byte."""
+    response = await client.call_raw(func, xero_tenant_id=tenant_id, **kwargs)
+    return StreamingResponse(
+        iter_body(response),
+        media_type=response.headers.get("Content-Type", "application/json"),
+    )
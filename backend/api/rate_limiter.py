@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from backend.config import (
+    XERO_LOW_PRIORITY_DAY_RESERVE,
+    XERO_LOW_PRIORITY_MAX_DEFER,
+    XERO_LOW_PRIORITY_MINUTE_RESERVE,
+    XERO_MAX_CONCURRENCY,
+    XERO_TENANT_BURST,
+    XERO_TENANT_CONCURRENCY,
+    XERO_TENANT_DAY_LIMIT,
+    XERO_TENANT_MINUTE_LIMIT,
+)
+
+logger = logging.getLogger(__name__)
+
+HIGH_PRIORITY = "high"
+LOW_PRIORITY = "low"
+
+
+class RateLimitExceeded(Exception):
+    """Raised when low-priority work is shed to protect a tenant's quota."""
+
+    def __init__(self, tenant_id: Optional[str], retry_after: float, reason: str):
+        self.tenant_id = tenant_id
+        self.retry_after = retry_after
+        self.reason = reason
+        super().__init__(
+            f"Rate limit reserve reached for tenant {tenant_id} ({reason}), "
+            f"retry after {retry_after:.0f}s"
+        )
+
+
+class TokenBucket:
+    """Token bucket holding up to ``capacity`` tokens, refilled at ``rate``/s.
+
+    ``reserve`` always takes a token, letting the balance go negative, and
+    returns how long the caller has to wait before its token is available.
+    Waiters therefore line up in reservation order.
+    """
+
+    def __init__(self, capacity: int, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self._updated = now
+
+    def available(self) -> float:
+        self._refill()
+        return self.tokens
+
+    def delay_until(self, tokens: float) -> float:
+        """Seconds until the balance reaches ``tokens``."""
+        self._refill()
+        return max(0.0, (tokens - self.tokens) / self.rate)
+
+    def reserve(self) -> float:
+        self._refill()
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate)
+
+    def cap(self, remaining: int):
+        """Never believe we have more tokens than Xero says are left."""
+        self._refill()
+        self.tokens = min(self.tokens, float(remaining))
+
+
+class TenantLimits:
+    """Client-side view of one tenant's Xero quotas."""
+
+    def __init__(
+        self,
+        minute_limit: int,
+        burst: int,
+        day_limit: int,
+        concurrency: int,
+        period: float,
+    ):
+        # A full bucket plus one period of refill never exceeds minute_limit,
+        # so the bucket also honours Xero's rolling (not fixed) minute window.
+        self.minute = TokenBucket(burst, (minute_limit - burst) / period)
+        self.day = TokenBucket(day_limit, day_limit / (24 * 60 * 60))
+        self.concurrency = asyncio.Semaphore(concurrency)
+        self.blocked_until = 0.0
+        self.calls = 0
+        self.throttled = 0
+        self.deferred = 0
+        self.shed = 0
+
+    def blocked_for(self) -> float:
+        return max(0.0, self.blocked_until - time.monotonic())
+
+
+class XeroScheduler:
+    """Central admission control for every Xero API call.
+
+    Each tenant gets a minute token bucket, a tracked daily allowance and a
+    concurrency cap matching Xero's published limits. The minute bucket
+    holds ``burst`` tokens and refills at ``minute_limit - burst`` per
+    period, so no rolling minute ever sees more than ``minute_limit``
+    calls. The buckets are
+    corrected from the ``X-MinLimit-Remaining``/``X-DayLimit-Remaining``
+    headers of each response, and a 429 blocks the tenant for its
+    ``Retry-After``. A request first queues on its tenant's semaphore and
+    only then on the app-wide one, so a single busy tenant holds at most
+    ``tenant_concurrency`` places in the shared FIFO queue and cannot starve
+    the others.
+
+    Low-priority work never dips into the last ``minute_reserve`` bucket
+    tokens or ``day_reserve`` daily calls: it is deferred while the bucket
+    refills and
+    shed with ``RateLimitExceeded`` if that would take longer than
+    ``max_defer`` seconds.
+
+    ``period`` is the length of the minute window in seconds; it only
+    differs from 60 when load-testing against ``backend/tools/fake_xero.py``
+    with a compressed clock.
+    """
+
+    def __init__(
+        self,
+        minute_limit: int = XERO_TENANT_MINUTE_LIMIT,
+        burst: int = XERO_TENANT_BURST,
+        day_limit: int = XERO_TENANT_DAY_LIMIT,
+        tenant_concurrency: int = XERO_TENANT_CONCURRENCY,
+        app_concurrency: int = XERO_MAX_CONCURRENCY,
+        minute_reserve: int = XERO_LOW_PRIORITY_MINUTE_RESERVE,
+        day_reserve: int = XERO_LOW_PRIORITY_DAY_RESERVE,
+        max_defer: float = XERO_LOW_PRIORITY_MAX_DEFER,
+        period: float = 60.0,
+    ):
+        self.minute_limit = minute_limit
+        self.burst = min(burst, minute_limit)
+        self.day_limit = day_limit
+        self.tenant_concurrency = tenant_concurrency
+        self.minute_reserve = minute_reserve
+        self.day_reserve = day_reserve
+        self.max_defer = max_defer
+        self.period = period
+        self._app_concurrency = asyncio.Semaphore(app_concurrency)
+        self._tenants: Dict[str, TenantLimits] = {}
+
+    def _limits(self, tenant_id: str) -> TenantLimits:
+        limits = self._tenants.get(tenant_id)
+        if limits is None:
+            limits = TenantLimits(
+                self.minute_limit,
+                self.burst,
+                self.day_limit,
+                self.tenant_concurrency,
+                self.period,
+            )
+            self._tenants[tenant_id] = limits
+        return limits
+
+    async def _admit(self, tenant_id: str, limits: TenantLimits, priority: str):
+        """Wait until the tenant may make one more call, or shed the call."""
+        if priority == LOW_PRIORITY:
+            if limits.day.available() <= self.day_reserve:
+                limits.shed += 1
+                raise RateLimitExceeded(tenant_id, 3600, "daily reserve")
+            wait = max(
+                limits.blocked_for(),
+                limits.minute.delay_until(self.minute_reserve + 1),
+            )
+            if wait > self.max_defer:
+                limits.shed += 1
+                raise RateLimitExceeded(tenant_id, wait, "minute reserve")
+            if wait > 0:
+                limits.deferred += 1
+                await asyncio.sleep(wait)
+
+        blocked = limits.blocked_for()
+        if blocked > 0:
+            await asyncio.sleep(blocked)
+        wait = limits.minute.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        # The daily allowance is only tracked; interactive calls are not held
+        # back for hours, Xero's own 429 is the backstop there.
+        limits.day.reserve()
+        limits.calls += 1
+
+    @asynccontextmanager
+    async def slot(self, tenant_id: Optional[str], priority: str = HIGH_PRIORITY):
+        """Hold a call slot for ``tenant_id`` for the duration of the block.
+
+        Calls without a tenant (e.g. the identity connections endpoint) are
+        only subject to the app-wide concurrency cap.
+        """
+        if tenant_id is None:
+            async with self._app_concurrency:
+                yield
+            return
+
+        limits = self._limits(tenant_id)
+        async with limits.concurrency:
+            await self._admit(tenant_id, limits, priority)
+            async with self._app_concurrency:
+                yield
+
+    def observe(self, tenant_id: Optional[str], headers):
+        """Update a tenant's quota from Xero's rate-limit response headers."""
+        if tenant_id is None or not headers:
+            return
+        limits = self._limits(tenant_id)
+        minute_remaining = headers.get("X-MinLimit-Remaining")
+        if minute_remaining is not None:
+            limits.minute.cap(int(minute_remaining))
+        day_remaining = headers.get("X-DayLimit-Remaining")
+        if day_remaining is not None:
+            limits.day.cap(int(day_remaining))
+
+    def throttled(self, tenant_id: Optional[str], headers) -> float:
+        """Record a 429 and return the number of seconds to back off."""
+        retry_after = 1.0
+        problem = None
+        if headers:
+            retry_after = float(headers.get("Retry-After") or retry_after)
+            problem = headers.get("X-Rate-Limit-Problem")
+        logger.warning(
+            f"Xero throttled tenant {tenant_id} ({problem}), retry after {retry_after}s"
+        )
+        if tenant_id is not None:
+            limits = self._limits(tenant_id)
+            limits.throttled += 1
+            limits.blocked_until = max(
+                limits.blocked_until, time.monotonic() + retry_after
+            )
+            if problem == "minute":
+                limits.minute.cap(0)
+            elif problem == "daily":
+                limits.day.cap(0)
+        self.observe(tenant_id, headers)
+        return retry_after
+
+    def stats(self) -> dict:
+        return {
+            tenant_id: {
+                "minute_tokens": round(limits.minute.available(), 2),
+                "day_tokens": round(limits.day.available(), 2),
+                "blocked_for": round(limits.blocked_for(), 2),
+                "calls": limits.calls,
+                "throttled": limits.throttled,
+                "deferred": limits.deferred,
+                "shed": limits.shed,
+            }
+            for tenant_id, limits in self._tenants.items()
+        }
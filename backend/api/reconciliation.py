@@ -0,0 +1,307 @@
+import asyncio
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import orjson
+
+from backend.api.local_store import LocalStore, local_store
+from backend.api.passthrough import parse_ms_date
+from backend.api.sync_engine import SyncEngine, sync_engine
+from backend.config import RECONCILE_DATE_WINDOW, RECONCILE_MAX_CANDIDATES
+
+logger = logging.getLogger(__name__)
+
+# Bank transaction types and the invoice type they settle
+DIRECTIONS = {"RECEIVE": "ACCREC", "SPEND": "ACCPAY"}
+# Weights of the match criteria in a suggestion's score (they sum to 1)
+WEIGHTS = {"amount": 0.4, "contact": 0.3, "reference": 0.2, "date": 0.1}
+# Days apart within which a date counts as a reason for a match
+CLOSE_DAYS = 7
+# Bits of the sort key holding the day number; the amount in cents sits above
+DAY_BITS = 20
+_EPOCH = datetime(1900, 1, 1)
+_NOT_ALNUM = re.compile(r"[^0-9A-Z]")
+
+
+def _day(value: Optional[str]) -> int:
+    moment = parse_ms_date(value)
+    return (moment - _EPOCH).days if moment is not None else -1
+
+
+def _cents(value) -> int:
+    return int(round(float(value or 0) * 100))
+
+
+def _normalize(value: Optional[str]) -> str:
+    """Upper-case letters and digits only, so "inv-0012 " matches "INV0012"."""
+    return _NOT_ALNUM.sub("", (value or "").upper())
+
+
+@dataclass
+class _Side:
+    """Column arrays of one side of the match, one entry per record."""
+
+    cents: np.ndarray
+    day: np.ndarray
+    contact: np.ndarray
+    currency: np.ndarray
+    reference: np.ndarray
+    number: Optional[np.ndarray] = None
+
+
+def _codes(*columns: List[str]) -> List[np.ndarray]:
+    """Encode string columns as integers shared across the columns.
+
+    Empty strings become -1, so they never count as equal values.
+    """
+    values, inverse = np.unique(
+        np.array([value for column in columns for value in column], dtype=object),
+        return_inverse=True,
+    )
+    inverse = inverse.reshape(-1).astype(np.int64)
+    if len(values) and values[0] == "":
+        inverse -= 1
+    codes, start = [], 0
+    for column in columns:
+        codes.append(inverse[start : start + len(column)])
+        start += len(column)
+    return codes
+
+
+def _pair_ranges(lo: np.ndarray, hi: np.ndarray):
+    """Expand ``[lo, hi)`` ranges into (range index, position) pairs."""
+    counts = hi - lo
+    total = int(counts.sum())
+    owner = np.repeat(np.arange(len(lo)), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, np.repeat(lo, counts) + offsets
+
+
+@dataclass
+class MatchOptions:
+    amount_tolerance: float = 0.0
+    date_window: int = RECONCILE_DATE_WINDOW
+    max_candidates: int = RECONCILE_MAX_CANDIDATES
+    min_score: float = 0.5
+    limit: int = 3
+
+
+def match(transactions: _Side, invoices: _Side, options: MatchOptions):
+    """Score transaction/invoice pairs; returns ``(tx, inv, score, flags)``.
+
+    Invoices are sorted by ``(cents << DAY_BITS) + day``, so each transaction's
+    candidates with a given amount and a date in the window are one
+    ``searchsorted`` range. Every amount within the tolerance is one
+    vectorized pass; no step loops over records in Python.
+    """
+    window = options.date_window
+    tolerance = int(round(options.amount_tolerance * 100))
+    keys = (invoices.cents << DAY_BITS) + invoices.day
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+
+    tx_parts, inv_parts = [], []
+    for delta in range(-tolerance, tolerance + 1):
+        base = (transactions.cents + delta) << DAY_BITS
+        lo = np.searchsorted(keys, base + np.maximum(transactions.day - window, 0))
+        hi = np.searchsorted(keys, base + transactions.day + window, side="right")
+        hi = np.minimum(hi, lo + options.max_candidates)
+        owner, position = _pair_ranges(lo, hi)
+        tx_parts.append(owner)
+        inv_parts.append(order[position])
+    tx = np.concatenate(tx_parts)
+    inv = np.concatenate(inv_parts)
+
+    same_currency = transactions.currency[tx] == invoices.currency[inv]
+    tx, inv = tx[same_currency], inv[same_currency]
+
+    amount_gap = np.abs(transactions.cents[tx] - invoices.cents[inv])
+    amount = 1.0 - amount_gap / (tolerance + 1)
+    contact = (transactions.contact[tx] == invoices.contact[inv]) & (
+        invoices.contact[inv] >= 0
+    )
+    reference = _reference_matches(transactions, invoices, tx, inv)
+    days = np.abs(transactions.day[tx] - invoices.day[inv])
+    date = 1.0 - days / (window + 1)
+
+    score = (
+        WEIGHTS["amount"] * amount
+        + WEIGHTS["contact"] * contact
+        + WEIGHTS["reference"] * reference
+        + WEIGHTS["date"] * date
+    )
+    keep = score >= options.min_score
+    tx, inv, score = tx[keep], inv[keep], score[keep]
+    flags = np.stack(
+        [
+            amount_gap[keep] == 0,
+            contact[keep],
+            reference[keep],
+            days[keep] <= CLOSE_DAYS,
+        ]
+    )
+
+    # Best first within each transaction, then the first ``limit`` of each
+    ranked = np.lexsort((-score, tx))
+    tx, inv, score, flags = tx[ranked], inv[ranked], score[ranked], flags[:, ranked]
+    starts = np.searchsorted(tx, tx, side="left")
+    top = np.arange(len(tx)) - starts < options.limit
+    return tx[top], inv[top], score[top], flags[:, top]
+
+
+def _reference_matches(transactions: _Side, invoices: _Side, tx, inv) -> np.ndarray:
+    """The transaction's reference contains the invoice number or reference."""
+    text = transactions.reference[tx]
+    found = np.zeros(len(tx), dtype=bool)
+    for column in (invoices.number, invoices.reference):
+        wanted = column[inv]
+        present = np.char.str_len(wanted) > 0
+        found |= present & (np.char.find(text, wanted) >= 0)
+    return found
+
+
+class ReconciliationMatcher:
+    """Proposes invoices that unreconciled bank transactions may settle.
+
+    Transactions and outstanding invoices are read from the local sync
+    store after an incremental refresh and turned into NumPy columns; the
+    matching itself (``match``) runs as sorted-array searches and vector
+    arithmetic off the event loop, so tens of thousands of records on each
+    side take seconds, not the hours nested loops would.
+
+    A candidate must have the opposite type (receive money for sales
+    invoices, spend money for bills), the same currency, an amount within
+    the tolerance of the amount due and a date within ``date_window`` days
+    of the invoice date. It is scored on amount, contact, reference (the
+    transaction's reference containing the invoice number or reference)
+    and date closeness.
+    """
+
+    def __init__(
+        self, store: LocalStore = local_store, engine: SyncEngine = sync_engine
+    ):
+        self.store = store
+        self.engine = engine
+        self.runs = 0
+        self.suggested = 0
+
+    async def _records(self, tenant_id: str, resource: str, keep) -> List[dict]:
+        records = []
+        async for batch in self.store.iter_json(tenant_id, resource):
+            for data in batch:
+                record = orjson.loads(data)
+                if keep(record):
+                    records.append(record)
+        return records
+
+    async def suggest(self, tenant_id: str, options: MatchOptions) -> List[dict]:
+        await asyncio.gather(
+            self.engine.refresh(tenant_id, "bank_transactions"),
+            self.engine.refresh(tenant_id, "invoices"),
+        )
+        transactions = await self._records(
+            tenant_id,
+            "bank_transactions",
+            lambda record: not record.get("IsReconciled")
+            and record.get("Status") == "AUTHORISED"
+            and record.get("Type") in DIRECTIONS
+            and _day(record.get("Date")) >= 0,
+        )
+        invoices = await self._records(
+            tenant_id,
+            "invoices",
+            lambda record: record.get("Status") == "AUTHORISED"
+            and (record.get("AmountDue") or 0) > 0
+            and _day(record.get("Date")) >= 0,
+        )
+        suggestions = await asyncio.get_running_loop().run_in_executor(
+            None, self._suggest, transactions, invoices, options
+        )
+        self.runs += 1
+        self.suggested += len(suggestions)
+        return suggestions
+
+    def _suggest(
+        self, transactions: List[dict], invoices: List[dict], options: MatchOptions
+    ) -> List[dict]:
+        suggestions = []
+        for tx_type, invoice_type in DIRECTIONS.items():
+            side_tx = [r for r in transactions if r.get("Type") == tx_type]
+            side_inv = [r for r in invoices if r.get("Type") == invoice_type]
+            if side_tx and side_inv:
+                suggestions.extend(self._match_side(side_tx, side_inv, options))
+        suggestions.sort(key=lambda item: -item["Matches"][0]["Score"])
+        return suggestions
+
+    def _match_side(
+        self, transactions: List[dict], invoices: List[dict], options: MatchOptions
+    ) -> List[dict]:
+        tx_contact, inv_contact = _codes(
+            [(r.get("Contact") or {}).get("ContactID") or "" for r in transactions],
+            [(r.get("Contact") or {}).get("ContactID") or "" for r in invoices],
+        )
+        tx_currency, inv_currency = _codes(
+            [r.get("CurrencyCode") or "" for r in transactions],
+            [r.get("CurrencyCode") or "" for r in invoices],
+        )
+        tx_side = _Side(
+            cents=np.array([_cents(r.get("Total")) for r in transactions], np.int64),
+            day=np.array([_day(r.get("Date")) for r in transactions], np.int64),
+            contact=tx_contact,
+            currency=tx_currency,
+            reference=np.array([_normalize(r.get("Reference")) for r in transactions]),
+        )
+        inv_side = _Side(
+            cents=np.array([_cents(r.get("AmountDue")) for r in invoices], np.int64),
+            day=np.array([_day(r.get("Date")) for r in invoices], np.int64),
+            contact=inv_contact,
+            currency=inv_currency,
+            reference=np.array([_normalize(r.get("Reference")) for r in invoices]),
+            number=np.array([_normalize(r.get("InvoiceNumber")) for r in invoices]),
+        )
+        tx, inv, score, flags = match(tx_side, inv_side, options)
+
+        grouped: Dict[int, dict] = {}
+        for i, j, value, reasons in zip(
+            tx.tolist(), inv.tolist(), score.tolist(), flags.T.tolist()
+        ):
+            suggestion = grouped.get(i)
+            if suggestion is None:
+                transaction = transactions[i]
+                suggestion = grouped[i] = {
+                    "BankTransactionID": transaction.get("BankTransactionID"),
+                    "Date": transaction.get("Date"),
+                    "Total": transaction.get("Total"),
+                    "Reference": transaction.get("Reference"),
+                    "Contact": (transaction.get("Contact") or {}).get("Name"),
+                    "Matches": [],
+                }
+            invoice = invoices[j]
+            suggestion["Matches"].append(
+                {
+                    "InvoiceID": invoice.get("InvoiceID"),
+                    "InvoiceNumber": invoice.get("InvoiceNumber"),
+                    "Date": invoice.get("Date"),
+                    "AmountDue": invoice.get("AmountDue"),
+                    "Contact": (invoice.get("Contact") or {}).get("Name"),
+                    "Score": round(value, 3),
+                    "Reasons": [
+                        name
+                        for name, matched in zip(
+                            ("amount", "contact", "reference", "date"), reasons
+                        )
+                        if matched
+                    ],
+                }
+            )
+        return list(grouped.values())
+
+    def stats(self) -> dict:
+        return {"runs": self.runs, "suggested": self.suggested}
+
+
+reconciliation_matcher = ReconciliationMatcher()
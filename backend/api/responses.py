@@ -0,0 +1,65 @@
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+import orjson
+from fastapi.responses import JSONResponse
+
+FieldPath = Tuple[str, ...]
+
+
+def _default(value):
+    # The SDK parses amounts as Decimal; the frontend expects JSON numbers
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    """Encode ``content`` with orjson, writing Decimals as numbers."""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """``JSONResponse`` encoded with orjson; the default for every route."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[FieldPath]]:
+    """Split a ``fields=`` value such as ``"Status,Contact.ContactID"``.
+
+    Returns None when every field should be kept.
+    """
+    if not fields:
+        return None
+    paths = [tuple(field.strip().split(".")) for field in fields.split(",")]
+    return [path for path in paths if all(path)] or None
+
+
+def project(record: dict, paths: List[FieldPath]) -> dict:
+    """Keep only the given fields of ``record``.
+
+    Dotted paths reach into nested objects (not into lists); fields missing
+    from the record are left out.
+    """
+    projected = {}
+    for path in paths:
+        value = record
+        for key in path:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            target = projected
+            for key in path[:-1]:
+                target = target.setdefault(key, {})
+            target[path[-1]] = value
+    return projected
+
+
+def project_encoded(batch: List[str], paths: List[FieldPath]) -> List[str]:
+    """Project a batch of JSON-encoded records, keeping them encoded."""
+    return [
+        orjson.dumps(project(orjson.loads(data), paths)).decode() for data in batch
+    ]
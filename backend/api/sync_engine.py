@@ -0,0 +1,269 @@
+import asyncio
+import functools
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from xero_python.api_client import serialize
+
+from backend.api.local_store import LocalStore, local_store
+from backend.api.pagination import iter_pages
+from backend.api.passthrough import fetch_raw_page, parse_ms_date
+from backend.api.rate_limiter import HIGH_PRIORITY
+from backend.api.single_flight import SingleFlight
+from backend.api.xero_client import XeroClient, xero_client
+from backend.auth.token_store import current_user
+from backend.config import XERO_SYNC_MIN_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SyncResource:
+    """How one Xero collection is fetched and keyed in the local store."""
+
+    fetch: str
+    id_field: str
+    envelope: str
+    # The id as it is named in Xero's JSON
+    raw_id_field: str
+    paged: bool = True
+    # Ask for archived records too, so archiving shows up as a status change
+    include_archived: bool = False
+
+
+RESOURCES: Dict[str, SyncResource] = {
+    "invoices": SyncResource("get_invoices", "invoice_id", "Invoices", "InvoiceID"),
+    "contacts": SyncResource(
+        "get_contacts", "contact_id", "Contacts", "ContactID", include_archived=True
+    ),
+    "bank_transactions": SyncResource(
+        "get_bank_transactions",
+        "bank_transaction_id",
+        "BankTransactions",
+        "BankTransactionID",
+    ),
+    "accounts": SyncResource(
+        "get_accounts", "account_id", "Accounts", "AccountID", paged=False
+    ),
+}
+
+
+def _to_utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class SyncEngine:
+    """Keeps the local store up to date with Xero using If-Modified-Since.
+
+    For each tenant and resource the engine remembers the highest
+    ``UpdatedDateUTC`` it has seen. The first sync pulls everything; later
+    syncs send that high-water mark as ``If-Modified-Since`` and only
+    receive records changed since, which are upserted into the store.
+    Deleted, voided and archived records are kept with the status Xero
+    reports, so readers filter by status rather than by presence.
+    Pages are fetched raw and stored as Xero sent them, without being
+    turned into SDK models and serialized back.
+    Concurrent syncs of the same tenant/resource share one pull, and a sync
+    completed less than ``min_interval`` seconds ago is not repeated.
+
+    Callbacks registered with ``on_change`` are called with
+    ``(tenant_id, resource)`` whenever records of a resource were written.
+    The user a sync ran as is remembered per tenant, so work that arrives
+    without a session (webhooks) can sync the tenant with their token.
+    """
+
+    def __init__(
+        self,
+        store: LocalStore = local_store,
+        client: XeroClient = xero_client,
+        min_interval: float = XERO_SYNC_MIN_INTERVAL,
+    ):
+        self.store = store
+        self.client = client
+        self.min_interval = min_interval
+        self.flights = SingleFlight()
+        self._listeners = []
+
+    def on_change(self, listener):
+        """Register a callback invoked after records of a resource change."""
+        self._listeners.append(listener)
+        return listener
+
+    def _notify(self, tenant_id: str, resource: str):
+        for listener in self._listeners:
+            listener(tenant_id, resource)
+
+    async def store_records(
+        self, tenant_id: str, resource: str, records
+    ) -> Optional[datetime]:
+        """Upsert SDK model objects; returns their newest ``UpdatedDateUTC``.
+
+        Route handlers that create records in Xero use this to make them
+        visible locally without waiting for the next sync.
+        """
+        spec = RESOURCES[resource]
+        newest = None
+        rows = []
+        for record in records:
+            updated = _to_utc_naive(getattr(record, "updated_date_utc", None))
+            if updated is not None and (newest is None or updated > newest):
+                newest = updated
+            rows.append(
+                (
+                    getattr(record, spec.id_field),
+                    updated.isoformat() if updated else None,
+                    json.dumps(serialize(record)),
+                )
+            )
+        if rows:
+            await self.store.upsert(tenant_id, resource, rows)
+            self._notify(tenant_id, resource)
+        return newest
+
+    async def store_raw(
+        self, tenant_id: str, resource: str, records: List[dict]
+    ) -> Optional[datetime]:
+        """Upsert records decoded from Xero's JSON; returns the newest update."""
+        spec = RESOURCES[resource]
+
+        def to_rows():
+            newest = None
+            rows = []
+            for record in records:
+                updated = parse_ms_date(record.get("UpdatedDateUTC"))
+                if updated is not None and (newest is None or updated > newest):
+                    newest = updated
+                rows.append(
+                    (
+                        record[spec.raw_id_field],
+                        updated.isoformat() if updated else None,
+                        json.dumps(record),
+                    )
+                )
+            return newest, rows
+
+        newest, rows = await asyncio.get_running_loop().run_in_executor(
+            None, to_rows
+        )
+        if rows:
+            await self.store.upsert(tenant_id, resource, rows)
+            self._notify(tenant_id, resource)
+        return newest
+
+    async def sync(
+        self,
+        tenant_id: str,
+        resource: str,
+        force: bool = False,
+        priority: str = HIGH_PRIORITY,
+    ) -> int:
+        """Pull changes for one resource; returns the number of records stored.
+
+        Concurrent calls for the same tenant and resource share one pull.
+        """
+        return await self.flights.do(
+            (tenant_id, resource),
+            lambda: self._sync(tenant_id, resource, force, priority),
+        )
+
+    async def _sync(self, tenant_id: str, resource: str, force: bool, priority: str):
+        spec = RESOURCES[resource]
+        state = await self.store.get_state(tenant_id, resource)
+        high_water = None
+        if state is not None:
+            high_water, synced_at = state
+            if not force and time.time() - synced_at < self.min_interval:
+                return 0
+
+        kwargs = {"priority": priority}
+        if spec.include_archived:
+            kwargs["include_archived"] = True
+        if high_water:
+            kwargs["if_modified_since"] = datetime.fromisoformat(high_water)
+
+        fetch = functools.partial(self._fetch_raw, spec)
+        if spec.paged:
+            pages = iter_pages(fetch, tenant_id, "records", **kwargs)
+        else:
+            pages = self._single_page(fetch, tenant_id, "records", kwargs)
+
+        changed = 0
+        newest = datetime.fromisoformat(high_water) if high_water else None
+        async for records in pages:
+            page_newest = await self.store_raw(tenant_id, resource, records)
+            if page_newest is not None and (newest is None or page_newest > newest):
+                newest = page_newest
+            changed += len(records)
+
+        await self.store.set_state(
+            tenant_id, resource, newest.isoformat() if newest else None
+        )
+        user_id = current_user.get()
+        if user_id is not None:
+            await self.store.set_tenant_user(tenant_id, user_id)
+        if changed:
+            logger.info(f"Synced {changed} {resource} for tenant {tenant_id}")
+        return changed
+
+    async def refresh(self, tenant_id: str, resource: str):
+        """Sync before serving from the store, tolerating Xero outages.
+
+        If the sync fails but the tenant has been synced before, the stored
+        records are served as they are and the failure is only logged.
+        """
+        try:
+            await self.sync(tenant_id, resource)
+        except Exception as e:
+            if await self.store.get_state(tenant_id, resource) is None:
+                raise
+            logger.warning(
+                f"Serving stored {resource} for tenant {tenant_id}, sync failed: {str(e)}"
+            )
+
+    async def _fetch_raw(self, spec: SyncResource, tenant_id: str, **kwargs):
+        return await fetch_raw_page(
+            getattr(self.client.accounting_api, spec.fetch),
+            tenant_id,
+            spec.envelope,
+            client=self.client,
+            **kwargs,
+        )
+
+    @staticmethod
+    async def _single_page(fetch, tenant_id: str, collection: str, kwargs: dict):
+        result = await fetch(tenant_id, **kwargs)
+        yield getattr(result, collection) or []
+
+    async def sync_all(self, tenant_id: str, force: bool = False, **kwargs) -> dict:
+        """Sync every resource for a tenant concurrently."""
+        counts = await asyncio.gather(
+            *(
+                self.sync(tenant_id, resource, force=force, **kwargs)
+                for resource in RESOURCES
+            )
+        )
+        return dict(zip(RESOURCES, counts))
+
+    async def status(self, tenant_id: str) -> dict:
+        status = {}
+        for resource in RESOURCES:
+            state = await self.store.get_state(tenant_id, resource)
+            status[resource] = {
+                "records": await self.store.count(tenant_id, resource),
+                "high_water": state[0] if state else None,
+                "synced_at": datetime.fromtimestamp(state[1], timezone.utc).isoformat()
+                if state
+                else None,
+            }
+        return status
+
+
+sync_engine = SyncEngine()
@@ -1,18 +1,134 @@
+import asyncio
 import logging
-from typing import Optional
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
 
 from fastapi import Request
-from xero_python.identity import IdentityApi
 
-from backend.auth.oauth import api_client, obtain_xero_oauth2_token
+from backend.api.xero_client import xero_client
+from backend.auth.oauth import obtain_xero_oauth2_token, on_token_change
+from backend.auth.token_store import current_user
+from backend.config import TENANT_CACHE_STALE_TTL, TENANT_CACHE_TTL
 
 logger = logging.getLogger(__name__)
 
+
+class ConnectionCache:
+    """In-memory TTL cache for Xero connections and organisation metadata.
+
+    Entries younger than ``ttl`` are served directly. Once an entry expires
+    it is still served for up to ``stale_ttl`` seconds while a single
+    background task refreshes it; after that a caller waits for a reload.
+    ``invalidate`` drops one entry (or all of them) and bumps that key's
+    (or the global) generation counter, so that loads started before the
+    invalidation cannot write old data back; loads of other keys are kept.
+    """
+
+    def __init__(
+        self, ttl: float = TENANT_CACHE_TTL, stale_ttl: float = TENANT_CACHE_STALE_TTL
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: Dict[str, Tuple[float, object]] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._generation = 0
+        self._key_generations: Dict[str, int] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refresh_errors = 0
+
+    async def get(self, key: str, loader: Callable[[], Awaitable]):
+        """Return the cached value for ``key``, loading it if necessary."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            loaded_at, value = entry
+            age = time.monotonic() - loaded_at
+            if age < self.ttl:
+                self.hits += 1
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._refresh_in_background(key, loader)
+                return value
+
+        self.misses += 1
+        return await self._load(key, loader)
+
+    def _generation_of(self, key: str) -> Tuple[int, int]:
+        return self._generation, self._key_generations.get(key, 0)
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable]):
+        generation = self._generation_of(key)
+        value = await loader()
+        if generation == self._generation_of(key):
+            self._entries[key] = (time.monotonic(), value)
+        return value
+
+    def _refresh_in_background(self, key: str, loader: Callable[[], Awaitable]):
+        if key in self._refreshing:
+            return
+
+        async def refresh():
+            try:
+                await self._load(key, loader)
+            except Exception as e:
+                self.refresh_errors += 1
+                logger.warning(f"Background refresh of {key} failed: {str(e)}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(refresh())
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drop one entry, or every entry when no key is given."""
+        if key is None:
+            self._generation += 1
+            self._entries.clear()
+        else:
+            self._key_generations[key] = self._key_generations.get(key, 0) + 1
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refresh_errors": self.refresh_errors,
+        }
+
+
+connection_cache = ConnectionCache()
+
+
+def _connections_key() -> str:
+    return f"connections:{current_user.get()}"
+
+
+@on_token_change
+def invalidate_connection_cache(token):
+    """Connections depend on the user, so drop theirs when their token changes."""
+    connection_cache.invalidate(_connections_key())
+
+
+async def get_connections():
+    """Get the current user's Xero connections, from the cache when possible."""
+    return await connection_cache.get(_connections_key(), xero_client.get_connections)
+
+
+async def get_organisation(tenant_id: str):
+    """Get a tenant's organisation details, served from the cache when possible."""
+    return await connection_cache.get(
+        f"organisation:{tenant_id}",
+        lambda: xero_client.get_organisations(tenant_id),
+    )
+
+
 async def get_xero_tenant_id(request: Request):
     """Get the Xero tenant ID from the session."""
     stored_tenant_id = get_stored_tenant_id(request)
     if stored_tenant_id:
-        logger.info(f"Retrieved tenant ID from session: {stored_tenant_id}")
         return stored_tenant_id
 
     logger.warning("No tenant ID found in session, attempting to fetch from Xero API")
@@ -21,9 +137,8 @@ async def get_xero_tenant_id(request: Request):
         logger.error("Failed to obtain Xero OAuth2 token")
         return None
 
-    identity_api = IdentityApi(api_client)
     try:
-        connections = identity_api.get_connections()
+        connections = await get_connections()
         for connection in connections:
             if connection.tenant_type == "ORGANISATION":
                 logger.info(f"Fetched tenant ID from Xero API: {connection.tenant_id}")
@@ -36,10 +151,9 @@ async def get_xero_tenant_id(request: Request):
 async def validate_tenant_id(tenant_id: str) -> bool:
     """Validate that the tenant ID exists in available connections."""
     try:
-        identity_api = IdentityApi(api_client)
-        connections = identity_api.get_connections()
+        connections = await get_connections()
         is_valid = any(conn.tenant_id == tenant_id for conn in connections)
-        logger.info(f"Validated tenant ID {tenant_id}: {is_valid}")
+        logger.debug(f"Validated tenant ID {tenant_id}: {is_valid}")
         return is_valid
     except Exception as e:
         logger.error(f"Error validating tenant ID: {str(e)}", exc_info=True)
@@ -54,8 +168,6 @@ def store_tenant_id(request: Request, tenant_id: str):
 
 def get_stored_tenant_id(request: Request) -> Optional[str]:
     """Get the stored tenant ID from the session."""
-    tenant_id = request.session.get("xero_tenant_id")
-    logger.info(f"Retrieved tenant ID from session: {tenant_id}")
-    return tenant_id
+    return request.session.get("xero_tenant_id")
 
 
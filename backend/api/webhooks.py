@@ -0,0 +1,142 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from backend.api.job_queue import QUEUED, Job, JobQueue, job_queue
+from backend.api.local_store import LocalStore, local_store
+from backend.auth.token_store import acting_as
+from backend.config import XERO_WEBHOOK_BATCH_DELAY
+
+logger = logging.getLogger(__name__)
+
+# Xero event categories and the synced resources they change
+EVENT_RESOURCES = {"INVOICE": "invoices", "CONTACT": "contacts"}
+
+
+def verify_signature(body: bytes, signature: Optional[str], key: str) -> bool:
+    """Check ``x-xero-signature``: base64 HMAC-SHA256 of the raw body."""
+    if not key or not signature:
+        return False
+    expected = base64.b64encode(
+        hmac.new(key.encode(), body, hashlib.sha256).digest()
+    ).decode()
+    return hmac.compare_digest(expected, signature)
+
+
+class WebhookProcessor:
+    """Turns Xero webhook events into incremental syncs of what changed.
+
+    ``enqueue`` only records the affected tenant and resource, so the
+    webhook is acknowledged well inside Xero's five seconds however many
+    events arrive. A background task waits ``delay`` seconds after the
+    first event of a burst, then queues one low-priority ``sync`` job per
+    tenant and resource, skipping those that still have one waiting. The
+    sync pulls the changed records with If-Modified-Since; writing them
+    invalidates the ETags, dashboard summaries and other caches derived
+    from the store for exactly that tenant and resource.
+
+    Jobs run as the user that last synced the tenant. Events for tenants
+    nobody has synced are dropped: there is nothing stored to refresh.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue = job_queue,
+        store: LocalStore = local_store,
+        delay: float = XERO_WEBHOOK_BATCH_DELAY,
+    ):
+        self.queue = queue
+        self.store = store
+        self.delay = delay
+        self._pending: Dict[Tuple[str, str], int] = {}
+        self._queued: Dict[Tuple[str, str], Job] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.events = 0
+        self.ignored = 0
+        self.batches = 0
+        self.jobs = 0
+        self.skipped = 0
+
+    def enqueue(self, events: List[dict]) -> int:
+        """Record the events for the next batch; returns how many were kept."""
+        kept = 0
+        for event in events:
+            resource = EVENT_RESOURCES.get(str(event.get("eventCategory")).upper())
+            tenant_id = event.get("tenantId")
+            if resource is None or not tenant_id:
+                self.ignored += 1
+                continue
+            key = (tenant_id, resource)
+            self._pending[key] = self._pending.get(key, 0) + 1
+            kept += 1
+        self.events += kept
+        if kept and self._wakeup is not None:
+            self._wakeup.set()
+        return kept
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        if self._pending:
+            self._wakeup.set()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            # Let the rest of a burst arrive so it is handled as one batch
+            await asyncio.sleep(self.delay)
+            self._wakeup.clear()
+            batch, self._pending = self._pending, {}
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                logger.error(f"Webhook batch failed: {str(e)}", exc_info=True)
+
+    async def _flush(self, batch: Dict[Tuple[str, str], int]):
+        self.batches += 1
+        for (tenant_id, resource), count in batch.items():
+            waiting = self._queued.get((tenant_id, resource))
+            if waiting is not None and waiting.status == QUEUED:
+                # The waiting job has not fetched yet and will see these changes
+                self.skipped += 1
+                continue
+            user_id = await self.store.tenant_user(tenant_id)
+            if user_id is None:
+                logger.info(
+                    f"Ignoring {count} webhook events for unsynced tenant {tenant_id}"
+                )
+                self.ignored += count
+                continue
+            with acting_as(user_id):
+                job = await self.queue.submit(
+                    "sync", tenant_id, {"resource": resource, "force": True}
+                )
+            self._queued[(tenant_id, resource)] = job
+            self.jobs += 1
+            logger.info(
+                f"Queued {resource} sync for tenant {tenant_id} "
+                f"after {count} webhook events"
+            )
+
+    def stats(self) -> dict:
+        return {
+            "events": self.events,
+            "ignored": self.ignored,
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "jobs": self.jobs,
+            "skipped": self.skipped,
+        }
+
+
+webhook_processor = WebhookProcessor()
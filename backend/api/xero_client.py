@@ -1,26 +1,214 @@
+import asyncio
+import contextvars
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from urllib3.util import Retry
 from xero_python.accounting import AccountingApi
+from xero_python.exceptions import ApiException
 from xero_python.identity import IdentityApi
 
+from backend.api.rate_limiter import HIGH_PRIORITY, XeroScheduler
+from backend.api.single_flight import SingleFlight, freeze
 from backend.auth.oauth import api_client
+from backend.auth.token_store import current_user
+from backend.config import (
+    XERO_API_BASE_URL,
+    XERO_IDENTITY_BASE_URL,
+    XERO_MAX_CONCURRENCY,
+    XERO_RATE_LIMIT_RETRIES,
+)
+
+logger = logging.getLogger(__name__)
 
 
 class XeroClient:
-    def __init__(self):
-        self.accounting_api = AccountingApi(api_client)
-        self.identity_api = IdentityApi(api_client)
+    """Async gateway in front of the synchronous xero_python SDK.
+
+    Every SDK call is executed on a bounded thread pool so a slow Xero
+    response never blocks the event loop. Admission is delegated to a
+    ``XeroScheduler``, which caps calls in flight at ``max_concurrency``
+    and enforces Xero's per-tenant rate limits. Calls answered with 429
+    are retried after their ``Retry-After`` up to ``rate_limit_retries``
+    times. Identical reads issued while one is in flight share its result.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = XERO_MAX_CONCURRENCY,
+        client=api_client,
+        scheduler: XeroScheduler = None,
+        rate_limit_retries: int = XERO_RATE_LIMIT_RETRIES,
+        accounting_base_url: str = XERO_API_BASE_URL,
+        identity_base_url: str = XERO_IDENTITY_BASE_URL,
+    ):
+        self.accounting_api = AccountingApi(client, base_url=accounting_base_url)
+        self.identity_api = IdentityApi(client, base_url=identity_base_url)
+        # 429 Retry-After is handled by the scheduler, not by urllib3 sleeping
+        # inside a worker thread while holding a slot.
+        client.rest_client.pool_manager.connection_pool_kw["retries"] = Retry(
+            total=3, respect_retry_after_header=False
+        )
+        self.max_concurrency = max_concurrency
+        self.scheduler = scheduler or XeroScheduler(app_concurrency=max_concurrency)
+        self.rate_limit_retries = rate_limit_retries
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="xero-gateway"
+        )
+        self._in_flight = 0
+        self._waiting = 0
+        self.reads = SingleFlight()
+
+    @asynccontextmanager
+    async def _admitted(self, tenant_id, priority: str):
+        """Wait for a scheduler slot, tracking waiting and in-flight calls."""
+        waiting = True
+        self._waiting += 1
+        try:
+            async with self.scheduler.slot(tenant_id, priority):
+                waiting = False
+                self._waiting -= 1
+                self._in_flight += 1
+                try:
+                    yield
+                finally:
+                    self._in_flight -= 1
+        finally:
+            if waiting:
+                self._waiting -= 1
+
+    async def call(self, func, *args, priority: str = HIGH_PRIORITY, **kwargs):
+        """Run a blocking SDK method off the event loop under the rate limits."""
+        tenant_id = kwargs.get("xero_tenant_id")
+        loop = asyncio.get_running_loop()
+        # The worker thread runs in a copy of our context, so the SDK's token
+        # getter sees the current user
+        call = functools.partial(
+            contextvars.copy_context().run,
+            func,
+            *args,
+            _return_http_data_only=False,
+            **kwargs,
+        )
+        attempt = 0
+        while True:
+            try:
+                async with self._admitted(tenant_id, priority):
+                    data, _, headers = await loop.run_in_executor(self._executor, call)
+            except ApiException as e:
+                if e.status != 429 or attempt >= self.rate_limit_retries:
+                    raise
+                attempt += 1
+                # The scheduler holds the tenant back until Retry-After passes;
+                # calls without a tenant (connections) wait it out here
+                retry_after = self.scheduler.throttled(tenant_id, e.headers)
+                if tenant_id is None:
+                    await asyncio.sleep(retry_after)
+                continue
+            self.scheduler.observe(tenant_id, headers)
+            return data
+
+    async def read(self, func, priority: str = HIGH_PRIORITY, **kwargs):
+        """``call`` for a read-only SDK method, coalescing identical calls.
+
+        Concurrent calls of ``func`` by the same user with equal arguments
+        (the tenant included) make one request to Xero and get the same
+        model objects back, which callers must therefore not modify. Calls
+        by different users never share a request, since each must be made
+        with that user's token.
+        """
+        key = (current_user.get(), func.__name__, freeze(kwargs))
+        return await self.reads.do(
+            key, lambda: self.call(func, priority=priority, **kwargs)
+        )
+
+    async def call_raw(self, func, *args, **kwargs):
+        """Like ``call``, but return the unread urllib3 response, unparsed.
+
+        The SDK neither reads nor deserializes the body. Until the caller
+        reads it to the end or closes it (see ``backend.api.passthrough``),
+        the response holds on to a pooled connection.
+        """
+        return await self.call(func, *args, _preload_content=False, **kwargs)
+
+    def stats(self) -> dict:
+        """Current gateway utilisation."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
 
     async def get_connections(self):
-        return self.identity_api.get_connections()
+        return await self.call(self.identity_api.get_connections)
 
-    def get_organisations(self, tenant_id: str):
-        return self.accounting_api.get_organisations(xero_tenant_id=tenant_id)
+    async def get_organisations(self, tenant_id: str):
+        return await self.read(
+            self.accounting_api.get_organisations, xero_tenant_id=tenant_id
+        )
+
+    async def get_invoices(self, tenant_id: str, **kwargs):
+        return await self.read(
+            self.accounting_api.get_invoices, xero_tenant_id=tenant_id, **kwargs
+        )
+
+    async def get_invoice(self, tenant_id: str, invoice_id: str):
+        return await self.read(
+            self.accounting_api.get_invoice,
+            xero_tenant_id=tenant_id,
+            invoice_id=invoice_id,
+        )
+
+    async def create_invoices(self, tenant_id: str, invoices, **kwargs):
+        return await self.call(
+            self.accounting_api.create_invoices,
+            xero_tenant_id=tenant_id,
+            invoices=invoices,
+            **kwargs,
+        )
 
-    def get_invoices(self, tenant_id: str, statuses=None):
-        return self.accounting_api.get_invoices(
-            xero_tenant_id=tenant_id, statuses=statuses
+    async def create_invoice_attachment_by_file_name(
+        self, tenant_id: str, invoice_id: str, file_name: str, body, **kwargs
+    ):
+        return await self.call(
+            self.accounting_api.create_invoice_attachment_by_file_name,
+            xero_tenant_id=tenant_id,
+            invoice_id=invoice_id,
+            file_name=file_name,
+            body=body,
+            **kwargs,
         )
 
-    def get_accounts(self, tenant_id: str, where_clause: str = None):
-        return self.accounting_api.get_accounts(
-            xero_tenant_id=tenant_id, where=where_clause
+    async def get_contacts(self, tenant_id: str, **kwargs):
+        return await self.read(
+            self.accounting_api.get_contacts, xero_tenant_id=tenant_id, **kwargs
         )
+
+    async def get_contact(self, tenant_id: str, contact_id: str):
+        return await self.read(
+            self.accounting_api.get_contact,
+            xero_tenant_id=tenant_id,
+            contact_id=contact_id,
+        )
+
+    async def get_bank_transactions(self, tenant_id: str, **kwargs):
+        return await self.read(
+            self.accounting_api.get_bank_transactions,
+            xero_tenant_id=tenant_id,
+            **kwargs,
+        )
+
+    async def get_accounts(self, tenant_id: str, where_clause: str = None, **kwargs):
+        if where_clause is not None:
+            kwargs["where"] = where_clause
+        return await self.read(
+            self.accounting_api.get_accounts, xero_tenant_id=tenant_id, **kwargs
+        )
+
+
+xero_client = XeroClient()
@@ -0,0 +1,164 @@
+import logging
+import os
+import socket
+import threading
+from typing import Callable, Optional
+
+from urllib3.connection import HTTPConnection
+from xero_python.api_client import ApiClient
+from xero_python.api_client.configuration import Configuration, TypeWithDefault
+from xero_python.api_client.oauth2 import OAuth2Token
+from xero_python.rest import RESTClientObject
+
+from backend.config import (
+    XERO_HTTP_CONNECT_TIMEOUT,
+    XERO_HTTP_KEEPALIVE,
+    XERO_HTTP_POOL_SIZE,
+    XERO_HTTP_READ_TIMEOUT,
+    XERO_SDK_DEBUG,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class _NoDefault(TypeWithDefault):
+    # Configuration's metaclass hands out copies of the first instance ever
+    # created; every client built here needs its own.
+    def __call__(cls, *args, **kwargs):
+        return type.__call__(cls, *args, **kwargs)
+
+
+class PerThreadTokenConfiguration(Configuration, metaclass=_NoDefault):
+    """SDK configuration with a separate ``OAuth2Token`` for each thread.
+
+    The SDK loads the current user's token into ``oauth2_token`` right
+    before every call. With a single shared object, two gateway threads
+    working for different users could send each other's access token.
+    """
+
+    def __init__(self, client_id: str, client_secret: str, **kwargs):
+        self._client_id = client_id
+        self._client_secret = client_secret
+        self._local = threading.local()
+        super().__init__(**kwargs)
+
+    @property
+    def oauth2_token(self) -> OAuth2Token:
+        token = getattr(self._local, "token", None)
+        if token is None:
+            token = self._local.token = OAuth2Token(
+                client_id=self._client_id, client_secret=self._client_secret
+            )
+        return token
+
+    @oauth2_token.setter
+    def oauth2_token(self, token: Optional[OAuth2Token]):
+        if token is not None:
+            self._local.token = token
+
+
+class PooledRESTClient(RESTClientObject):
+    """The SDK's urllib3 client with default timeouts and a pool gauge.
+
+    urllib3 keeps up to ``pool_size`` connections open per host and reuses
+    them. When every pooled connection is busy it opens an extra one and
+    closes it after the request; such requests are counted as ``starved``,
+    a sign that the pool is smaller than the concurrency it serves.
+    """
+
+    def __init__(
+        self,
+        configuration: Configuration,
+        pool_size: int,
+        connect_timeout: float,
+        read_timeout: float,
+        keepalive: bool,
+    ):
+        super().__init__(configuration, maxsize=pool_size)
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        if keepalive:
+            self.pool_manager.connection_pool_kw["socket_options"] = (
+                HTTPConnection.default_socket_options
+                + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+            )
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.starved = 0
+
+    def request(self, method, url, *args, _request_timeout=None, **kwargs):
+        pool = self.pool_manager.connection_from_url(url).pool
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            if pool is not None and pool.empty():
+                self.starved += 1
+        try:
+            return super().request(
+                method,
+                url,
+                *args,
+                _request_timeout=_request_timeout or self.timeout,
+                **kwargs,
+            )
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def stats(self) -> dict:
+        hosts = {}
+        for key in self.pool_manager.pools.keys():
+            pool = self.pool_manager.pools.get(key)
+            if pool is None or pool.pool is None:
+                continue
+            idle = sum(1 for conn in list(pool.pool.queue) if conn is not None)
+            hosts[pool.host] = {
+                "in_use": self.pool_size - pool.pool.qsize(),
+                "idle": idle,
+                "opened": pool.num_connections,
+                "requests": pool.num_requests,
+            }
+        return {
+            "pool_size": self.pool_size,
+            "timeout": list(self.timeout),
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "starved": self.starved,
+            "hosts": hosts,
+        }
+
+
+def create_api_client(
+    token_getter: Optional[Callable[[], Optional[dict]]] = None,
+    token_saver: Optional[Callable[[Optional[dict]], None]] = None,
+    client_id: Optional[str] = os.getenv("Client_ID"),
+    client_secret: Optional[str] = os.getenv("Client_Secret_Key"),
+    pool_size: int = XERO_HTTP_POOL_SIZE,
+    connect_timeout: float = XERO_HTTP_CONNECT_TIMEOUT,
+    read_timeout: float = XERO_HTTP_READ_TIMEOUT,
+    keepalive: bool = XERO_HTTP_KEEPALIVE,
+    debug: bool = XERO_SDK_DEBUG,
+) -> ApiClient:
+    """Build an SDK client on a ``PooledRESTClient``.
+
+    Build one client per process and share it: the API objects made from
+    it, and their connections, are meant to be reused. ``debug`` makes the
+    SDK log every request and response, bodies included.
+    """
+    configuration = PerThreadTokenConfiguration(
+        client_id=client_id, client_secret=client_secret, debug=debug
+    )
+    configuration.connection_pool_maxsize = pool_size
+    client = ApiClient(
+        configuration,
+        oauth2_token_getter=token_getter,
+        oauth2_token_saver=token_saver,
+    )
+    client.rest_client = PooledRESTClient(
+        configuration, pool_size, connect_timeout, read_timeout, keepalive
+    )
+    return client
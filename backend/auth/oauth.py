@@ -1,14 +1,32 @@
+import asyncio
+import contextvars
+import functools
 import logging
 import os
+import socket
+import time
+import uuid
 from datetime import datetime
+from typing import Dict, Optional
 
 from authlib.integrations.starlette_client import OAuth
 from fastapi import HTTPException, Request
 from xero_python.api_client import ApiClient
-from xero_python.api_client.configuration import Configuration
-from xero_python.api_client.oauth2 import OAuth2Token
 
-from backend.config import SCOPE, app
+from backend.auth.client_factory import create_api_client
+from backend.auth.token_store import (
+    TokenStore,
+    acting_as,
+    create_token_store,
+    current_user,
+)
+from backend.config import (
+    SCOPE,
+    XERO_TOKEN_REFRESH_LEASE,
+    XERO_TOKEN_REFRESH_MARGIN,
+    XERO_TOKEN_REFRESH_RETRY,
+    XERO_TOKEN_STORE,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -21,16 +39,35 @@ oauth.register(
     client_kwargs={"scope": SCOPE},
 )
 
-api_client = ApiClient(
-    Configuration(
-        debug=True,
-        oauth2_token=OAuth2Token(
-            client_id=os.getenv("Client_ID"),
-            client_secret=os.getenv("Client_Secret_Key"),
-        ),
-    ),
-    pool_threads=1,
-)
+# The one SDK client of this process; its connections are shared by all routes
+api_client = create_api_client()
+
+# Tokens of every signed-in user, keyed by user id; see XERO_TOKEN_STORE
+token_store = create_token_store(XERO_TOKEN_STORE)
+
+# Callbacks run whenever the stored token changes (login, logout, refresh)
+_token_listeners = []
+
+
+def on_token_change(listener):
+    """Register a callback invoked with the new token after it is stored.
+
+    The callback runs as the user whose token changed (``current_user``).
+    """
+    _token_listeners.append(listener)
+    return listener
+
+
+def token_scope(scope) -> list:
+    """The scope as the list the SDK needs to refresh a token.
+
+    Xero and the OAuth login return it as a space-separated string; the
+    SDK's ``can_refresh_access_token`` only accepts a list or tuple.
+    """
+    if isinstance(scope, (list, tuple)):
+        return list(scope)
+    return (scope or SCOPE).split()
+
 
 def create_token_dict(token):
     """Create a complete token dictionary including scope."""
@@ -40,33 +77,41 @@ def create_token_dict(token):
         "refresh_token": token.get("refresh_token"),
         "expires_in": token.get("expires_in"),
         "expires_at": token.get("expires_at"),
-        "scope": token.get("scope", SCOPE),  # Use the scope from the token if available
+        "scope": token_scope(token.get("scope")),
     }
-    logger.info(f"Created token dict: {token_dict}")  # Add this line
     return token_dict
 
 @api_client.oauth2_token_getter
 def obtain_xero_oauth2_token():
-    """Get the token from the session."""
-    if hasattr(app.state, "token"):
-        token_dict = app.state.token
-        if "expires_at" in token_dict:
-            expiration_time = datetime.fromtimestamp(token_dict["expires_at"])
-            logger.info(f"Token expires at: {expiration_time}")
-        # Ensure scope is included in the token
-        if "scope" not in token_dict:
-            token_dict["scope"] = SCOPE
-        logger.info(f"Obtained token: {token_dict}")  # Add this line
+    """Get the current user's token from the token store."""
+    user_id = current_user.get()
+    token_dict = token_store.get(user_id) if user_id is not None else None
+    if token_dict is not None:
+        # Ensure the scope is included, as a list
+        token_dict["scope"] = token_scope(token_dict.get("scope"))
         return token_dict
     return None
 
 @api_client.oauth2_token_saver
 def store_xero_oauth2_token(token):
-    """Store the token in the session."""
+    """Store the current user's token, or clear it when ``token`` is None."""
+    user_id = current_user.get()
+    if user_id is None:
+        logger.warning("No current user, token not stored")
+        return
     token_dict = token if isinstance(token, dict) else token
-    token_dict["scope"] = SCOPE  # Ensure scope is always included
-    logger.info(f"Storing token: {token_dict}")  # Add this line
-    app.state.token = token_dict
+    if token_dict is None:
+        logger.info(f"Clearing stored token for user {user_id}")
+        token_store.delete(user_id)
+    else:
+        # Keep the scope Xero granted, as a list so the token can be refreshed
+        token_dict["scope"] = token_scope(token_dict.get("scope"))
+        if token_dict.get("expires_at"):
+            expiration_time = datetime.fromtimestamp(token_dict["expires_at"])
+            logger.info(f"Storing token for user {user_id}, expires {expiration_time}")
+        token_store.put(user_id, token_dict)
+    for listener in _token_listeners:
+        listener(token_dict)
 
 def is_token_expired(token: dict) -> bool:
     """Check if the token is expired or about to expire in the next 60 seconds."""
@@ -74,26 +119,216 @@ def is_token_expired(token: dict) -> bool:
         return True
     return datetime.now().timestamp() >= (token["expires_at"] - 60)
 
-async def refresh_token_if_expired():
-    """Refresh the token if it's expired."""
-    token = obtain_xero_oauth2_token()
+# Seconds between checks of the store while another worker refreshes a token
+LEASE_POLL_INTERVAL = 0.25
+
+
+def _in_thread(func, *args):
+    """Run a blocking token store or SDK call off the event loop as the current user."""
+    call = functools.partial(contextvars.copy_context().run, func, *args)
+    return asyncio.get_running_loop().run_in_executor(None, call)
+
+
+class TokenManager:
+    """Keeps every user's stored Xero token fresh, one refresh at a time.
+
+    A background task refreshes each token ``margin`` seconds before it
+    expires, so requests normally find a valid token and never wait. Only
+    if a token is already about to expire (e.g. the background refresh
+    kept failing) does a request refresh it itself. Xero rotates the
+    refresh token, so a spent one must never be used twice:
+
+    - within a process, concurrent refreshes of a user's token share one
+      in-flight refresh;
+    - across processes, the refresh holds a lease in the token store.
+      A worker that finds the lease taken waits for the holder to store
+      the new token and uses that; one that gets the lease re-reads the
+      token first, in case it was refreshed while it waited.
+
+    The SDK and store calls block, so they run in worker threads.
 
-    if token and is_token_expired(token):
+    A failed background refresh keeps the current token and is retried
+    after ``retry_interval`` seconds; a failed refresh of an expired token
+    clears it so the user is sent to log in again.
+    """
+
+    def __init__(
+        self,
+        client: ApiClient = api_client,
+        store: TokenStore = token_store,
+        margin: float = XERO_TOKEN_REFRESH_MARGIN,
+        retry_interval: float = XERO_TOKEN_REFRESH_RETRY,
+        lease_ttl: float = XERO_TOKEN_REFRESH_LEASE,
+    ):
+        self.client = client
+        self.store = store
+        self.margin = margin
+        self.retry_interval = retry_interval
+        self.lease_ttl = lease_ttl
+        # Identifies this process as the holder of a refresh lease
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._refreshing: Dict[str, asyncio.Future] = {}
+        self._background: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.failures = 0
+        self.coalesced = 0
+        self.lease_waits = 0
+        self.refreshed_elsewhere = 0
+        self.last_latency = None
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+        self.last_error = None
+
+    async def get_token(self) -> Optional[dict]:
+        """Return a usable token, refreshing only if it is about to expire."""
+        token = await _in_thread(obtain_xero_oauth2_token)
+        if token and is_token_expired(token):
+            return await self.refresh()
+        return token
+
+    async def refresh(self) -> Optional[dict]:
+        """Refresh the current user's token, joining a refresh already running."""
+        user_id = current_user.get()
+        if user_id is None:
+            return None
+        refreshing = self._refreshing.get(user_id)
+        if refreshing is None:
+            refreshing = asyncio.ensure_future(self._refresh(user_id))
+            self._refreshing[user_id] = refreshing
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(refreshing)
+
+    async def _refresh(self, user_id: str) -> Optional[dict]:
+        started = time.monotonic()
+        lease = f"refresh:{user_id}"
         try:
-            new_token = api_client.refresh_oauth2_token(token)
-            new_token_dict = create_token_dict(new_token)
-            logger.info(f"Refreshed token: {new_token_dict}")  # Add this line
-            store_xero_oauth2_token(new_token_dict)
-            return new_token_dict
+            stale = await _in_thread(obtain_xero_oauth2_token)
+            if stale is None:
+                return None
+            waited = False
+            while not await _in_thread(
+                self.store.acquire_lease, lease, self.owner, self.lease_ttl
+            ):
+                # Another worker is refreshing; the lease expires on its own
+                # if that worker dies before releasing it.
+                if not waited:
+                    waited = True
+                    self.lease_waits += 1
+                await asyncio.sleep(LEASE_POLL_INTERVAL)
+                token = await _in_thread(obtain_xero_oauth2_token)
+                if _rotated(stale, token):
+                    self.refreshed_elsewhere += 1
+                    return token
+            try:
+                return await self._refresh_leased(stale)
+            finally:
+                await _in_thread(self.store.release_lease, lease, self.owner)
+        finally:
+            latency = time.monotonic() - started
+            self.last_latency = latency
+            self.max_latency = max(self.max_latency, latency)
+            self.total_latency += latency
+            self._refreshing.pop(user_id, None)
+
+    async def _refresh_leased(self, stale: dict) -> Optional[dict]:
+        token = await _in_thread(obtain_xero_oauth2_token)
+        if _rotated(stale, token):
+            self.refreshed_elsewhere += 1
+            return token
+        try:
+            # The SDK hands the new token to store_xero_oauth2_token itself
+            refreshed = await _in_thread(self.client.refresh_oauth2_token)
+            if refreshed is None:
+                raise RuntimeError("Token cannot be refreshed")
+            self.refreshes += 1
+            self.last_error = None
+            logger.info(f"Refreshed Xero token for user {current_user.get()}")
+            return await _in_thread(obtain_xero_oauth2_token)
         except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
             logger.error(f"Error refreshing token: {str(e)}", exc_info=True)
-            store_xero_oauth2_token(None)
-            return None
-    return token
+            token = await _in_thread(obtain_xero_oauth2_token)
+            if token and is_token_expired(token):
+                await _in_thread(store_xero_oauth2_token, None)
+                return None
+            return token
+
+    async def _check(self, user_id: str) -> float:
+        """Refresh ``user_id``'s token if due; returns seconds until the next check."""
+        with acting_as(user_id):
+            token = await _in_thread(obtain_xero_oauth2_token)
+            if not (token and token.get("refresh_token") and token.get("expires_at")):
+                return self.retry_interval
+            due_in = token["expires_at"] - self.margin - time.time()
+            if due_in > 0:
+                return due_in
+            refreshed = await self.refresh()
+            if refreshed is not None and _rotated(token, refreshed):
+                return refreshed["expires_at"] - self.margin - time.time()
+            # After a failure the old token comes back; wait before retrying
+            return self.retry_interval
+
+    async def _run(self):
+        while True:
+            users = await _in_thread(self.store.users)
+            waits = await asyncio.gather(
+                *(self._check(user_id) for user_id in users), return_exceptions=True
+            )
+            # Poll as well, so a token stored by a new login is noticed
+            wait = self.retry_interval
+            for due_in in waits:
+                if isinstance(due_in, Exception):
+                    logger.error(f"Error checking token: {str(due_in)}")
+                else:
+                    wait = min(wait, due_in)
+            await asyncio.sleep(max(wait, 0))
+
+    def start(self):
+        if self._background is None:
+            self._background = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._background is not None:
+            self._background.cancel()
+            await asyncio.gather(self._background, return_exceptions=True)
+            self._background = None
+
+    def stats(self) -> dict:
+        attempts = self.refreshes + self.failures
+        return {
+            "store": type(self.store).__name__,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "coalesced": self.coalesced,
+            "lease_waits": self.lease_waits,
+            "refreshed_elsewhere": self.refreshed_elsewhere,
+            "last_latency": self.last_latency,
+            "max_latency": self.max_latency,
+            "avg_latency": self.total_latency / attempts if attempts else None,
+            "last_error": self.last_error,
+        }
+
+
+def _rotated(old: Optional[dict], new: Optional[dict]) -> bool:
+    """Whether ``new`` is a different token from ``old`` (or it was cleared)."""
+    if new is None:
+        return True
+    return new.get("refresh_token") != old.get("refresh_token")
+
+
+token_manager = TokenManager()
+
 
 async def require_valid_token(request: Request):
-    """Dependency to ensure a valid token exists."""
-    token = await refresh_token_if_expired()
+    """Dependency to ensure the signed-in user has a valid token.
+
+    It also makes them the current user, so the Xero calls made for the
+    request use their token.
+    """
+    current_user.set(request.session.get("user_id"))
+    token = await token_manager.get_token()
     if not token:
         raise HTTPException(
             status_code=401,
@@ -0,0 +1,283 @@
+import abc
+import contextvars
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import redis
+except ImportError:  # memory and SQLite stores only
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# The user whose Xero token SDK calls use; set per request and per job and
+# carried into the gateway's worker threads with the rest of the context
+current_user: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "current_user", default=None
+)
+
+
+@contextmanager
+def acting_as(user_id: Optional[str]):
+    """Make ``user_id`` the current user for the duration of the block."""
+    reset = current_user.set(user_id)
+    try:
+        yield
+    finally:
+        current_user.reset(reset)
+
+
+class TokenStore(abc.ABC):
+    """Where OAuth tokens live, keyed by user.
+
+    The methods are synchronous because the SDK reads and writes tokens from
+    its worker threads. Leases are short named locks with an owner and a
+    time-to-live; a lease that is not released (e.g. its process died) is
+    free again once it expires. They let one process at a time refresh a
+    user's token, which matters because Xero rotates the refresh token and
+    a spent one cannot be used twice.
+    """
+
+    @abc.abstractmethod
+    def get(self, user_id: str) -> Optional[dict]:
+        ...
+
+    @abc.abstractmethod
+    def put(self, user_id: str, token: dict):
+        ...
+
+    @abc.abstractmethod
+    def delete(self, user_id: str):
+        ...
+
+    @abc.abstractmethod
+    def users(self) -> List[str]:
+        """Users that currently have a token."""
+
+    @abc.abstractmethod
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Take the lease ``name`` for ``ttl`` seconds unless another owner holds it."""
+
+    @abc.abstractmethod
+    def release_lease(self, name: str, owner: str):
+        ...
+
+    def close(self):
+        pass
+
+
+class MemoryTokenStore(TokenStore):
+    """Tokens in a dict; only suitable for a single worker process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens: Dict[str, dict] = {}
+        self._leases: Dict[str, Tuple[str, float]] = {}
+
+    def get(self, user_id: str) -> Optional[dict]:
+        with self._lock:
+            token = self._tokens.get(user_id)
+            return dict(token) if token is not None else None
+
+    def put(self, user_id: str, token: dict):
+        with self._lock:
+            self._tokens[user_id] = dict(token)
+
+    def delete(self, user_id: str):
+        with self._lock:
+            self._tokens.pop(user_id, None)
+
+    def users(self) -> List[str]:
+        with self._lock:
+            return list(self._tokens)
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            holder = self._leases.get(name)
+            if holder is not None and holder[0] != owner and holder[1] > now:
+                return False
+            self._leases[name] = (owner, now + ttl)
+            return True
+
+    def release_lease(self, name: str, owner: str):
+        with self._lock:
+            if self._leases.get(name, (None,))[0] == owner:
+                del self._leases[name]
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tokens (
+    user_id TEXT PRIMARY KEY,
+    token TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class SQLiteTokenStore(TokenStore):
+    """Tokens in a SQLite file shared by every worker process on a host.
+
+    The database runs in WAL mode so readers never wait for a writer, and
+    writers from other processes wait up to ``busy_timeout`` seconds for the
+    write lock instead of failing. Each thread gets its own connection,
+    since the SDK calls in from the gateway's thread pool.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=self.busy_timeout, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def get(self, user_id: str) -> Optional[dict]:
+        row = (
+            self._connect()
+            .execute("SELECT token FROM tokens WHERE user_id = ?", (user_id,))
+            .fetchone()
+        )
+        return json.loads(row[0]) if row else None
+
+    def put(self, user_id: str, token: dict):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO tokens (user_id, token, updated_at) "
+                "VALUES (?, ?, ?)",
+                (user_id, json.dumps(token), time.time()),
+            )
+
+    def delete(self, user_id: str):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM tokens WHERE user_id = ?", (user_id,))
+
+    def users(self) -> List[str]:
+        rows = self._connect().execute("SELECT user_id FROM tokens").fetchall()
+        return [row[0] for row in rows]
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            # The upsert only overwrites an expired lease or our own, so the
+            # row count tells whether we got it.
+            cursor = conn.execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET "
+                "owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.expires_at < ? OR leases.owner = excluded.owner",
+                (name, owner, now + ttl, now),
+            )
+        return cursor.rowcount == 1
+
+    def release_lease(self, name: str, owner: str):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner)
+            )
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+
+
+# Deletes a lease only while it is still held by the caller
+_REDIS_RELEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisTokenStore(TokenStore):
+    """Tokens in Redis (or any server speaking its protocol), shared by hosts.
+
+    Needs the optional ``redis`` package. Leases use ``SET NX PX`` so they
+    expire on the server even if their holder disappears.
+    """
+
+    def __init__(self, url: str, prefix: str = "xero:"):
+        if redis is None:
+            raise RuntimeError(
+                "XERO_TOKEN_STORE points at Redis but the redis package is not "
+                "installed; run pip install redis or use a sqlite:/// store"
+            )
+        self._redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def _token_key(self, user_id: str) -> str:
+        return f"{self.prefix}token:{user_id}"
+
+    def get(self, user_id: str) -> Optional[dict]:
+        raw = self._redis.get(self._token_key(user_id))
+        return json.loads(raw) if raw else None
+
+    def put(self, user_id: str, token: dict):
+        self._redis.set(self._token_key(user_id), json.dumps(token))
+
+    def delete(self, user_id: str):
+        self._redis.delete(self._token_key(user_id))
+
+    def users(self) -> List[str]:
+        start = len(self._token_key(""))
+        return [
+            key.decode()[start:]
+            for key in self._redis.scan_iter(match=self._token_key("*"))
+        ]
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        key = f"{self.prefix}lease:{name}"
+        if self._redis.get(key) == owner.encode():
+            return bool(self._redis.set(key, owner, px=int(ttl * 1000), xx=True))
+        return bool(self._redis.set(key, owner, px=int(ttl * 1000), nx=True))
+
+    def release_lease(self, name: str, owner: str):
+        self._redis.eval(_REDIS_RELEASE, 1, f"{self.prefix}lease:{name}", owner)
+
+    def close(self):
+        self._redis.close()
+
+
+def create_token_store(url: str) -> TokenStore:
+    """Build the store named by ``url``.
+
+    ``memory``, ``sqlite:///path/to/file.db`` or ``redis://host:port/db``.
+    """
+    if url in ("", "memory"):
+        return MemoryTokenStore()
+    if url.startswith("sqlite:///"):
+        return SQLiteTokenStore(url[len("sqlite:///") :])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisTokenStore(url)
+    raise ValueError(f"Unsupported token store: {url}")
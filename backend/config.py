@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 from dotenv import load_dotenv
 from fastapi import FastAPI
@@ -6,6 +7,8 @@ from fastapi import FastAPI
 from fastapi.templating import Jinja2Templates
 from starlette.middleware.sessions import SessionMiddleware
 
+from backend.api.responses import FastJSONResponse
+
 load_dotenv()
 
 # OAuth scope
@@ -18,8 +21,137 @@ SCOPE = (
     "payroll.timesheets accounting.budgets.read"
 )
 
+# OAuth token refresh: refresh this many seconds before the access token
+# expires, and retry a failed background refresh after this many seconds
+XERO_TOKEN_REFRESH_MARGIN = float(os.getenv("XERO_TOKEN_REFRESH_MARGIN", "300"))
+XERO_TOKEN_REFRESH_RETRY = float(os.getenv("XERO_TOKEN_REFRESH_RETRY", "30"))
+
+# Where OAuth tokens are kept: "memory" (one worker process), "sqlite:///path.db"
+# (every worker on one host) or "redis://host:6379/0" (several hosts), and how
+# long one worker may hold a user's token while refreshing it (seconds)
+XERO_TOKEN_STORE = os.getenv("XERO_TOKEN_STORE", "memory")
+XERO_TOKEN_REFRESH_LEASE = float(os.getenv("XERO_TOKEN_REFRESH_LEASE", "30"))
+
+# Xero gateway configuration: maximum number of SDK calls in flight at once
+XERO_MAX_CONCURRENCY = int(os.getenv("XERO_MAX_CONCURRENCY", "10"))
+
+# Xero HTTP client: connections kept open per host (below XERO_MAX_CONCURRENCY
+# gateway threads open throwaway connections), TCP keep-alive on pooled
+# connections, connect/read timeouts in seconds, and SDK request/response logging
+XERO_HTTP_POOL_SIZE = int(os.getenv("XERO_HTTP_POOL_SIZE", str(XERO_MAX_CONCURRENCY)))
+XERO_HTTP_KEEPALIVE = os.getenv("XERO_HTTP_KEEPALIVE", "true").lower() == "true"
+XERO_HTTP_CONNECT_TIMEOUT = float(os.getenv("XERO_HTTP_CONNECT_TIMEOUT", "5"))
+XERO_HTTP_READ_TIMEOUT = float(os.getenv("XERO_HTTP_READ_TIMEOUT", "60"))
+XERO_SDK_DEBUG = os.getenv("XERO_SDK_DEBUG", "false").lower() == "true"
+
+# Records requested per page from paged Xero endpoints (Xero allows up to 1000)
+XERO_PAGE_SIZE = int(os.getenv("XERO_PAGE_SIZE", "100"))
+
+# Bulk invoice creation: invoices per create call and chunks sent concurrently
+XERO_BULK_CHUNK_SIZE = int(os.getenv("XERO_BULK_CHUNK_SIZE", "50"))
+XERO_BULK_CONCURRENCY = int(os.getenv("XERO_BULK_CONCURRENCY", "3"))
+
+# Concurrent organisation lookups when listing tenants
+XERO_TENANT_FANOUT_CONCURRENCY = int(os.getenv("XERO_TENANT_FANOUT_CONCURRENCY", "5"))
+
+# Xero rate limits applied client-side per tenant (calls per minute, burst size,
+# calls per day, concurrent calls) and how much of it is held back from
+# low-priority work
+XERO_TENANT_MINUTE_LIMIT = int(os.getenv("XERO_TENANT_MINUTE_LIMIT", "60"))
+XERO_TENANT_BURST = int(os.getenv("XERO_TENANT_BURST", "10"))
+XERO_TENANT_DAY_LIMIT = int(os.getenv("XERO_TENANT_DAY_LIMIT", "5000"))
+XERO_TENANT_CONCURRENCY = int(os.getenv("XERO_TENANT_CONCURRENCY", "5"))
+XERO_LOW_PRIORITY_MINUTE_RESERVE = int(
+    os.getenv("XERO_LOW_PRIORITY_MINUTE_RESERVE", "5")
+)
+XERO_LOW_PRIORITY_DAY_RESERVE = int(os.getenv("XERO_LOW_PRIORITY_DAY_RESERVE", "500"))
+XERO_LOW_PRIORITY_MAX_DEFER = float(os.getenv("XERO_LOW_PRIORITY_MAX_DEFER", "30"))
+# How many times a call answered with 429 is retried after its Retry-After
+XERO_RATE_LIMIT_RETRIES = int(os.getenv("XERO_RATE_LIMIT_RETRIES", "3"))
+
+# Override the Xero API hosts, e.g. to point at backend/tools/fake_xero.py
+XERO_API_BASE_URL = os.getenv("XERO_API_BASE_URL")
+XERO_IDENTITY_BASE_URL = os.getenv("XERO_IDENTITY_BASE_URL")
+
+# Invoice attachments: largest accepted file (Xero's limit is 25 MB), uploads
+# sent to Xero at once (each holds its file in memory while it is sent) and
+# files accepted by one batch request
+XERO_ATTACHMENT_MAX_BYTES = int(os.getenv("XERO_ATTACHMENT_MAX_BYTES", "26214400"))
+XERO_ATTACHMENT_CONCURRENCY = int(os.getenv("XERO_ATTACHMENT_CONCURRENCY", "2"))
+XERO_ATTACHMENT_BATCH_LIMIT = int(os.getenv("XERO_ATTACHMENT_BATCH_LIMIT", "50"))
+
+# Background jobs: worker tasks, optional SQLite file persisting jobs across
+# restarts (memory only when unset), where uploads are spooled while queued,
+# the largest request body spooled for one job, and how many finished jobs
+# are kept in memory
+XERO_JOB_WORKERS = int(os.getenv("XERO_JOB_WORKERS", "2"))
+XERO_JOB_DB = os.getenv("XERO_JOB_DB")
+XERO_JOB_SPOOL_DIR = os.getenv(
+    "XERO_JOB_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "xero-jobs")
+)
+XERO_JOB_SPOOL_MAX_BYTES = int(os.getenv("XERO_JOB_SPOOL_MAX_BYTES", "104857600"))
+XERO_JOB_HISTORY = int(os.getenv("XERO_JOB_HISTORY", "1000"))
+
+# Connection/organisation cache: fresh lifetime, then how long a stale entry
+# may still be served while it is refreshed in the background (seconds)
+TENANT_CACHE_TTL = float(os.getenv("TENANT_CACHE_TTL", "300"))
+TENANT_CACHE_STALE_TTL = float(os.getenv("TENANT_CACHE_STALE_TTL", "3600"))
+
+# SQLite file holding the incrementally synced copy of each tenant's records
+XERO_SYNC_DB = os.getenv("XERO_SYNC_DB", "xero_sync.db")
+# Minimum seconds between two If-Modified-Since syncs of the same collection
+XERO_SYNC_MIN_INTERVAL = float(os.getenv("XERO_SYNC_MIN_INTERVAL", "15"))
+# Seconds a tenant's tax rates are trusted for validating new invoices
+XERO_TAX_RATES_TTL = float(os.getenv("XERO_TAX_RATES_TTL", "3600"))
+
+# HTTP responses: smallest JSON/text body worth compressing, and largest body
+# held in memory to hash into an ETag (larger ones are streamed without one)
+HTTP_COMPRESS_MIN_BYTES = int(os.getenv("HTTP_COMPRESS_MIN_BYTES", "1024"))
+HTTP_ETAG_MAX_BYTES = int(os.getenv("HTTP_ETAG_MAX_BYTES", "1048576"))
+
+# Batch lookups by id: most ids per request, and ids per Xero call (they are
+# sent in the query string)
+XERO_BATCH_GET_MAX = int(os.getenv("XERO_BATCH_GET_MAX", "200"))
+XERO_BATCH_GET_CHUNK = int(os.getenv("XERO_BATCH_GET_CHUNK", "50"))
+
+# Webhooks: signing key from the Xero developer portal (webhooks are refused
+# while unset), and seconds events are collected before their syncs are queued
+XERO_WEBHOOK_KEY = os.getenv("XERO_WEBHOOK_KEY", "")
+XERO_WEBHOOK_BATCH_DELAY = float(os.getenv("XERO_WEBHOOK_BATCH_DELAY", "2"))
+
+# Bearer token GET /metrics requires (the endpoint is disabled while unset); the
+# metrics name tenants and carry error text, so keep it to operators
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Reconciliation suggestions: days between a bank transaction and an invoice
+# date still considered, and candidates examined per transaction and amount
+RECONCILE_DATE_WINDOW = int(os.getenv("RECONCILE_DATE_WINDOW", "60"))
+RECONCILE_MAX_CANDIDATES = int(os.getenv("RECONCILE_MAX_CANDIDATES", "50"))
+
+# Live updates (GET /events): messages buffered per connection before the
+# oldest are dropped, most open connections, seconds between keep-alives, and
+# seconds changes are collected before they are published
+EVENTS_BUFFER = int(os.getenv("EVENTS_BUFFER", "16"))
+EVENTS_MAX_SUBSCRIBERS = int(os.getenv("EVENTS_MAX_SUBSCRIBERS", "10000"))
+EVENTS_HEARTBEAT = float(os.getenv("EVENTS_HEARTBEAT", "15"))
+EVENTS_DEBOUNCE = float(os.getenv("EVENTS_DEBOUNCE", "1"))
+
+# Logging: level, file (rotated at LOG_MAX_BYTES, keeping LOG_BACKUP_COUNT old
+# files), console format ("text" or "json"; the file is always JSON), records
+# per second each logger may write below WARNING (0 for no limit), and the
+# share of records kept per logger as "logger.name=fraction,..."
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FILE = os.getenv("LOG_FILE", "app.log")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", "10485760"))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOG_RATE_LIMIT = float(os.getenv("LOG_RATE_LIMIT", "50"))
+LOG_SAMPLE = os.getenv("LOG_SAMPLE", "")
+
 # FastAPI app configuration
-app = FastAPI(title="Xero FastAPI Integration")
+app = FastAPI(
+    title="Xero FastAPI Integration", default_response_class=FastJSONResponse
+)
 
 
 
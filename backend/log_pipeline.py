@@ -0,0 +1,186 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.config
+import queue
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+
+# Id of the request being handled, attached to every record logged for it
+request_id: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "request_id", default="-"
+)
+
+# Token fields are masked wherever they appear in a message, whether it was
+# built from a dict repr, JSON, keyword arguments or an Authorization header
+_SECRET = re.compile(
+    r"""(?P<key>['"]?(?:access_token|refresh_token|id_token|client_secret)['"]?"""
+    r"""\s*[:=]\s*)(?P<quote>['"]?)[^'",\s})&]+"""
+    r"""|(?P<scheme>Bearer\s+)[\w\-.~+/=]+""",
+    re.IGNORECASE,
+)
+REDACTED = "***"
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+def redact(text: str) -> str:
+    def mask(match: re.Match) -> str:
+        if match.group("scheme"):
+            return match.group("scheme") + REDACTED
+        return match.group("key") + match.group("quote") + REDACTED
+
+    return _SECRET.sub(mask, text)
+
+
+class ContextFilter(logging.Filter):
+    """Stamps records with the current request id.
+
+    Runs in the thread that logs, where the request's context is visible,
+    before the record is handed to the writer thread.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id.get()
+        return True
+
+
+class RedactingQueueHandler(QueueHandler):
+    """Queues records with token fields masked.
+
+    ``prepare`` merges the message, arguments, traceback and stack into one
+    text before the record is queued, so masking that text covers secrets
+    in exception messages as well as in the log message.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = super().prepare(record)
+        record.msg = record.message = redact(record.msg)
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """Thins out chatty loggers below WARNING.
+
+    ``sample_rates`` maps a logger name (and its children) to the fraction
+    of records kept. Independently, each logger may write at most
+    ``rate_limit`` records per second (0 disables the limit). Warnings and
+    errors always pass. The first record let through after some were
+    dropped carries their number as ``suppressed``.
+    """
+
+    def __init__(
+        self, sample_rates: Optional[Dict[str, float]] = None, rate_limit: float = 0
+    ):
+        super().__init__()
+        self.sample_rates = sample_rates or {}
+        self.rate_limit = rate_limit
+        self._lock = threading.Lock()
+        self._seen: Dict[str, int] = {}
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._suppressed: Dict[str, int] = {}
+
+    def _sample_rate(self, name: str) -> float:
+        while True:
+            if name in self.sample_rates:
+                return self.sample_rates[name]
+            if "." not in name:
+                return self.sample_rates.get("", 1.0)
+            name = name.rsplit(".", 1)[0]
+
+    def _allow(self, name: str) -> bool:
+        rate = self._sample_rate(name)
+        if rate < 1.0:
+            seen = self._seen.get(name, 0) + 1
+            self._seen[name] = seen
+            # Keep every 1/rate-th record rather than drawing at random
+            if int(seen * rate) == int((seen - 1) * rate):
+                return False
+        if self.rate_limit > 0:
+            now = time.monotonic()
+            tokens, updated = self._buckets.get(name, (self.rate_limit, now))
+            tokens = min(self.rate_limit, tokens + (now - updated) * self.rate_limit)
+            if tokens < 1:
+                self._buckets[name] = (tokens, now)
+                return False
+            self._buckets[name] = (tokens - 1, now)
+        return True
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            if not self._allow(record.name):
+                self._suppressed[record.name] = (
+                    self._suppressed.get(record.name, 0) + 1
+                )
+                return False
+            suppressed = self._suppressed.pop(record.name, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse ``"logger=fraction,other.logger=fraction"``."""
+    rates = {}
+    for item in spec.split(","):
+        if item.strip():
+            name, _, rate = item.partition("=")
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+def configure_logging(
+    settings: dict,
+    sample_rates: Optional[Dict[str, float]] = None,
+    rate_limit: float = 0,
+) -> QueueListener:
+    """Apply ``settings`` and move the root handlers behind a queue.
+
+    Loggers only put records on an in-memory queue; a listener thread
+    formats them and writes them to the handlers ``settings`` configured,
+    so a slow disk never blocks the event loop. The listener is flushed
+    and stopped at exit.
+    """
+    logging.config.dictConfig(settings)
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = RedactingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_rates, rate_limit))
+    queue_handler.addFilter(ContextFilter())
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
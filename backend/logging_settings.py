@@ -1,25 +1,40 @@
+from backend.config import (
+    LOG_BACKUP_COUNT,
+    LOG_FILE,
+    LOG_FORMAT,
+    LOG_LEVEL,
+    LOG_MAX_BYTES,
+)
+
 default_settings = {
     "version": 1,
     "disable_existing_loggers": False,
     "formatters": {
-        "standard": {"format": "%(asctime)s [%(levelname)s] %(name)s: %(message)s"},
+        "standard": {
+            "format": "%(asctime)s [%(levelname)s] %(name)s [%(request_id)s]: "
+            "%(message)s"
+        },
+        "json": {"()": "backend.log_pipeline.JsonFormatter"},
     },
     "handlers": {
         "default": {
-            "level": "INFO",
-            "formatter": "standard",
+            "level": LOG_LEVEL,
+            "formatter": "json" if LOG_FORMAT == "json" else "standard",
             "class": "logging.StreamHandler",
             "stream": "ext://sys.stdout",
         },
         "file": {
-            "level": "INFO",
-            "formatter": "standard",
-            "class": "logging.FileHandler",
-            "filename": "app.log",
+            "level": LOG_LEVEL,
+            "formatter": "json",
+            "class": "logging.handlers.RotatingFileHandler",
+            "filename": LOG_FILE,
             "mode": "a",
+            "maxBytes": LOG_MAX_BYTES,
+            "backupCount": LOG_BACKUP_COUNT,
+            "encoding": "utf-8",
         },
     },
     "loggers": {
-        "": {"handlers": ["default", "file"], "level": "INFO", "propagate": True}
+        "": {"handlers": ["default", "file"], "level": LOG_LEVEL, "propagate": True}
     },
 }
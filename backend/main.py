@@ -1,11 +1,19 @@
-import logging.config
+import uuid
 from datetime import datetime
 
 from fastapi import Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
 
-from backend.config import app
+from backend.api.attachments import UploadLimitMiddleware
+from backend.api.http_cache import HTTPCacheMiddleware
+from backend.api.job_queue import job_queue
+from backend.api.local_store import local_store
+from backend.api.responses import FastJSONResponse
+from backend.api.webhooks import webhook_processor
+from backend.api.xero_client import xero_client
+from backend.auth.oauth import token_manager
+from backend.config import LOG_RATE_LIMIT, LOG_SAMPLE, app
+from backend.log_pipeline import configure_logging, parse_sample_rates, request_id
 from backend.logging_settings import default_settings
 from backend.models.tenant_models import DetailedErrorResponse, TenantError
 from backend.routes import (
@@ -13,11 +21,29 @@ from backend.routes import (
     auth,
     bank_transactions,
     contacts,
+    dashboard,
+    events,
+    export,
     invoices,
+    jobs,
+    metrics,
+    reconciliation,
+    sync,
     tenants,
+    webhooks,
 )
 
-logging.config.dictConfig(default_settings)
+configure_logging(
+    default_settings,
+    sample_rates=parse_sample_rates(LOG_SAMPLE),
+    rate_limit=LOG_RATE_LIMIT,
+)
+
+# Attachment size limit, checked before the upload is parsed
+app.add_middleware(UploadLimitMiddleware)
+
+# ETags, 304s and compression; added before CORS so its headers also reach 304s
+app.add_middleware(HTTPCacheMiddleware)
 
 # Allow CORS for all origins (adjust as needed for your use case)
 app.add_middleware(
@@ -26,21 +52,59 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "ETag"],
 )
 
 
+@app.middleware("http")
+async def assign_request_id(request: Request, call_next):
+    """Tag the request's log records and its response with a request id."""
+    current = request.headers.get("X-Request-ID", "")[:64] or uuid.uuid4().hex
+    reset = request_id.set(current)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id.reset(reset)
+    response.headers["X-Request-ID"] = current
+    return response
+
+
 app.include_router(auth.router)
 app.include_router(invoices.router)
 app.include_router(tenants.router)
 app.include_router(accounts.router)
 app.include_router(contacts.router)
 app.include_router(bank_transactions.router)
+app.include_router(dashboard.router)
+app.include_router(events.router)
+app.include_router(export.router)
+app.include_router(metrics.router)
+app.include_router(jobs.router)
+app.include_router(sync.router)
+app.include_router(reconciliation.router)
+app.include_router(webhooks.router)
+
+
+@app.on_event("startup")
+async def start_background_tasks():
+    token_manager.start()
+    await job_queue.start()
+    await webhook_processor.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_xero_gateway():
+    await token_manager.stop()
+    await webhook_processor.stop()
+    await job_queue.stop()
+    xero_client.shutdown()
+    local_store.close()
 
 
 # Exception handler for TenantError
 @app.exception_handler(TenantError)
 async def tenant_error_handler(request: Request, exc: TenantError):
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=400,
         content=DetailedErrorResponse(
             detail=str(exc.message),
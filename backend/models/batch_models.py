@@ -0,0 +1,15 @@
+from typing import List
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+from backend.config import XERO_BATCH_GET_MAX
+
+
+class BatchGetRequest(BaseModel):
+    ids: List[UUID] = Field(
+        ..., alias="IDs", min_length=1, max_length=XERO_BATCH_GET_MAX
+    )
+
+    class Config:
+        populate_by_name = True
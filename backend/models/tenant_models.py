@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel
 
 
@@ -6,6 +8,8 @@ class Tenant(BaseModel):
     tenantName: str
     tenantType: str
     lastAccessed: str
+    status: str = "ok"
+    error: Optional[str] = None
 
     class Config:   
         populate_by_name = True
@@ -1,18 +1,20 @@
 import logging
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Request
-from fastapi.responses import HTMLResponse, JSONResponse
-from xero_python.accounting import AccountingApi
-from xero_python.api_client import serialize
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request
+from fastapi.responses import HTMLResponse
 
 from backend.api.account_utils import (
+    accounts_cache,
     get_account_details,
     get_stored_account_id,
     store_account_id,
     validate_account_id,
 )
+from backend.api.http_cache import collection_etag, not_modified
+from backend.api.responses import FastJSONResponse, parse_fields, project
 from backend.api.tenant_utils import get_stored_tenant_id
-from backend.auth.oauth import api_client, require_valid_token
+from backend.auth.oauth import require_valid_token
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -21,25 +23,37 @@ logger = logging.getLogger(__name__)
 @router.get(
     "/accounts",
     dependencies=[Depends(get_stored_tenant_id)],
-    response_class=JSONResponse,
+    response_class=FastJSONResponse,
     description="Get a list of all bank accounts for the selected tenant",
 )
 async def get_tenant_accounts(
-    request: Request, token: dict = Depends(require_valid_token)
+    request: Request,
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated fields to keep in each record, "
+        "e.g. AccountID,Name,BankAccountNumber",
+    ),
+    token: dict = Depends(require_valid_token),
 ):
     try:
         xero_tenant_id = get_stored_tenant_id(request)
         if not xero_tenant_id:
             raise HTTPException(status_code=404, detail="No organisation tenant found")
 
-        accounting_api = AccountingApi(api_client)
-        accounts = accounting_api.get_accounts(
-            xero_tenant_id, where='Status=="ACTIVE" AND Type=="BANK"'
-        )
+        chart = await accounts_cache.get(xero_tenant_id)
+        etag = await collection_etag(request, xero_tenant_id, "accounts")
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
 
-        formatted_accounts = serialize(accounts)
+        paths = parse_fields(fields)
+        bank_accounts = chart.find("BANK")
+        if paths:
+            bank_accounts = [project(account, paths) for account in bank_accounts]
 
-        return JSONResponse(content=formatted_accounts)
+        return FastJSONResponse(
+            content={"Accounts": bank_accounts}, headers={"ETag": etag}
+        )
 
     except Exception as e:
         logger.error(f"Accounts error: {str(e)}", exc_info=True)
@@ -54,14 +68,14 @@ async def get_tenant_accounts(
 )
 async def get_selected_account(
     request: Request, token: dict = Depends(require_valid_token)
-) -> JSONResponse:
+) -> FastJSONResponse:
     """Get information about the currently selected bank account."""
     try:
         tenant_id = get_stored_tenant_id(request)
         account_id = get_stored_account_id(request)
 
         if not tenant_id:
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=200,
                 content={
                     "status": "no_tenant",
@@ -70,7 +84,7 @@ async def get_selected_account(
             )
 
         if not account_id:
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=200,
                 content={
                     "status": "no_account",
@@ -84,7 +98,7 @@ async def get_selected_account(
         if not account_details:
             # Clear invalid account ID
             request.session.pop("xero_bank_account_id", None)
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=200,
                 content={
                     "status": "invalid_account",
@@ -92,7 +106,7 @@ async def get_selected_account(
                 },
             )
 
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=200,
             content={
                 "status": "active",
@@ -115,7 +129,7 @@ async def select_account(
     request: Request,
     account_id: str = Path(..., description="The ID of the bank account to select"),
     token: dict = Depends(require_valid_token),
-) -> JSONResponse:
+) -> FastJSONResponse:
     """Select and store a specific bank account ID for transaction retrieval."""
     try:
         # Get the stored tenant ID
@@ -140,7 +154,7 @@ async def select_account(
         # Store the account ID in the session
         store_account_id(request, account_id)
 
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=200,
             content={
                 "status": "success",
@@ -1,4 +1,5 @@
 import logging
+import uuid
 
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
@@ -9,6 +10,7 @@ from backend.auth.oauth import (
     obtain_xero_oauth2_token,
     store_xero_oauth2_token,
 )
+from backend.auth.token_store import acting_as
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +19,8 @@ router = APIRouter()
 
 @router.get("/", response_class=HTMLResponse, description="Index page")
 async def index(request: Request):
-    token = obtain_xero_oauth2_token()
+    with acting_as(request.session.get("user_id")):
+        token = obtain_xero_oauth2_token()
     if not token:
         return RedirectResponse(url="/login")
     # Redirect to the frontend dashboard page
@@ -38,7 +41,11 @@ async def oauth_callback(request: Request):
     try:
         token = await oauth.xero.authorize_access_token(request)
         xero_token = create_token_dict(token)
-        store_xero_oauth2_token(xero_token)
+        # Tokens are stored per Xero user; the session only carries the id
+        user_id = (token.get("userinfo") or {}).get("sub") or str(uuid.uuid4())
+        request.session["user_id"] = user_id
+        with acting_as(user_id):
+            store_xero_oauth2_token(xero_token)
         return RedirectResponse(url="/")
     except Exception as e:
         logger.error(f"OAuth callback error: {str(e)}", exc_info=True)
@@ -46,6 +53,7 @@ async def oauth_callback(request: Request):
 
 
 @router.get("/logout", description="Logout")
-async def logout():
-    store_xero_oauth2_token(None)
+async def logout(request: Request):
+    with acting_as(request.session.pop("user_id", None)):
+        store_xero_oauth2_token(None)
     return RedirectResponse(url="/login")
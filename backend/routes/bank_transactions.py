@@ -1,12 +1,18 @@
 import logging
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.responses import JSONResponse
-from xero_python.accounting import AccountingApi
-from xero_python.api_client import serialize
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 
+from backend.api.http_cache import collection_etag, not_modified
+from backend.api.list_query import ListQuery, bank_transaction_query
+from backend.api.local_store import local_store
+from backend.api.pagination import encoded_response, request_key
+from backend.api.passthrough import passthrough_response
+from backend.api.responses import FastJSONResponse, parse_fields
+from backend.api.sync_engine import sync_engine
 from backend.api.tenant_utils import get_stored_tenant_id
-from backend.auth.oauth import api_client, require_valid_token
+from backend.api.xero_client import xero_client
+from backend.auth.oauth import require_valid_token
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -15,11 +21,23 @@ logger = logging.getLogger(__name__)
 @router.get(
     "/bank-transactions",
     dependencies=[Depends(get_stored_tenant_id)],
-    response_class=JSONResponse,
+    response_class=FastJSONResponse,
     description="Returns a list of bank transactions for the current tenant",
 )
 async def get_bank_transactions(
-    request: Request, token: dict = Depends(require_valid_token)
+    request: Request,
+    stream: bool = Query(False, description="Stream records as they are fetched"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    raw: bool = Query(
+        False, description="Stream one page of Xero's response as is, unparsed"
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated fields to keep in each record, "
+        "e.g. BankTransactionID,Status,Total",
+    ),
+    query: ListQuery = Depends(bank_transaction_query),
+    token: dict = Depends(require_valid_token),
 ):
     try:
         xero_tenant_id = get_stored_tenant_id(request)
@@ -27,13 +45,31 @@ async def get_bank_transactions(
         if not xero_tenant_id:
             raise HTTPException(status_code=404, detail="No organisation tenant found")
 
-        accounting_api = AccountingApi(api_client)
-        bank_transactions = accounting_api.get_bank_transactions(xero_tenant_id)
+        if raw:
+            return await passthrough_response(
+                xero_client.accounting_api.get_bank_transactions,
+                xero_tenant_id,
+                **query.xero_kwargs(),
+            )
 
-        # Serialize and return the JSON response
-        serialized_transactions = serialize(bank_transactions)
-        return JSONResponse(content=serialized_transactions)
+        await sync_engine.refresh(xero_tenant_id, "bank_transactions")
+        etag = await collection_etag(request, xero_tenant_id, "bank_transactions")
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
+        response = await encoded_response(
+            query.select(local_store, xero_tenant_id),
+            "BankTransactions",
+            stream=stream,
+            fmt=format,
+            fields=parse_fields(fields),
+            share_key=request_key(request, xero_tenant_id),
+        )
+        response.headers["ETag"] = etag
+        return response
 
+    except HTTPException as he:
+        raise he
     except Exception as e:
         logger.error(f"Bank Transactions error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -1,12 +1,22 @@
 import logging
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Request
-from fastapi.responses import HTMLResponse, JSONResponse
-from xero_python.accounting import AccountingApi
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, Request
+from fastapi.responses import HTMLResponse
 from xero_python.api_client import serialize
 
+from backend.api.batch_get import batch_getter, batch_response
+from backend.api.http_cache import collection_etag, not_modified
+from backend.api.list_query import ListQuery, contact_query
+from backend.api.local_store import local_store
+from backend.api.pagination import encoded_response, request_key
+from backend.api.passthrough import passthrough_response
+from backend.api.responses import FastJSONResponse, parse_fields
+from backend.api.sync_engine import sync_engine
 from backend.api.tenant_utils import get_stored_tenant_id
-from backend.auth.oauth import api_client, require_valid_token
+from backend.api.xero_client import xero_client
+from backend.auth.oauth import require_valid_token
+from backend.models.batch_models import BatchGetRequest
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -15,26 +25,86 @@ logger = logging.getLogger(__name__)
 @router.get(
     "/contacts",
     dependencies=[Depends(get_stored_tenant_id)],
-    response_class=JSONResponse,
+    response_class=FastJSONResponse,
     description="Returns a list of contacts for the current tenant"
 )
-async def get_contacts(request: Request, token: dict = Depends(require_valid_token)):
+async def get_contacts(
+    request: Request,
+    stream: bool = Query(False, description="Stream records as they are fetched"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    raw: bool = Query(
+        False, description="Stream one page of Xero's response as is, unparsed"
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated fields to keep in each record, "
+        "e.g. ContactID,Name,ContactStatus",
+    ),
+    query: ListQuery = Depends(contact_query),
+    token: dict = Depends(require_valid_token),
+):
     try:
         xero_tenant_id = get_stored_tenant_id(request)
         if not xero_tenant_id:
             raise HTTPException(status_code=404, detail="No organisation tenant found")
 
-        accounting_api = AccountingApi(api_client)
-        contacts = accounting_api.get_contacts(xero_tenant_id)
-        serialized_contacts = serialize(contacts)
+        if raw:
+            return await passthrough_response(
+                xero_client.accounting_api.get_contacts,
+                xero_tenant_id,
+                **query.xero_kwargs(),
+            )
 
-        return JSONResponse(content=serialized_contacts)
+        await sync_engine.refresh(xero_tenant_id, "contacts")
+        etag = await collection_etag(request, xero_tenant_id, "contacts")
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
+        response = await encoded_response(
+            query.select(local_store, xero_tenant_id),
+            "Contacts",
+            stream=stream,
+            fmt=format,
+            fields=parse_fields(fields),
+            share_key=request_key(request, xero_tenant_id),
+        )
+        response.headers["ETag"] = etag
+        return response
 
+    except HTTPException as he:
+        raise he
     except Exception as e:
         logger.error(f"Contacts error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post(
+    "/contacts/batch",
+    dependencies=[Depends(get_stored_tenant_id)],
+    response_class=FastJSONResponse,
+    description="Returns contacts by ID, in request order, with NotFound markers",
+)
+async def get_contacts_batch(
+    request: Request,
+    batch: BatchGetRequest = Body(...),
+    token: dict = Depends(require_valid_token),
+):
+    try:
+        xero_tenant_id = get_stored_tenant_id(request)
+        if not xero_tenant_id:
+            raise HTTPException(status_code=404, detail="No organisation tenant found")
+
+        ids = [str(record_id) for record_id in batch.ids]
+        records = await batch_getter.get_many(xero_tenant_id, "contacts", ids)
+        return batch_response("Contacts", "ContactID", ids, records)
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Failed to fetch contacts batch: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get(
     "/contacts/{contact_id}",
     dependencies=[Depends(get_stored_tenant_id)],
@@ -45,7 +115,7 @@ async def get_contact_by_id(
     request: Request,
     contact_id: str = Path(..., description="The ID of the contact"),
     token: dict = Depends(require_valid_token),
-) -> JSONResponse:
+) -> FastJSONResponse:
     try:
         # Get the stored tenant ID
         tenant_id = get_stored_tenant_id(request)
@@ -54,10 +124,9 @@ async def get_contact_by_id(
                 status_code=400,
                 detail="No tenant selected. Please select a tenant first.",
             )
-        accounting_api = AccountingApi(api_client)
-        contact = accounting_api.get_contact(tenant_id, contact_id=contact_id)
+        contact = await xero_client.get_contact(tenant_id, contact_id=contact_id)
 
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=200,
             content={"status": "success", "contact": serialize(contact)},
         )
@@ -0,0 +1,34 @@
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from backend.api.dashboard import dashboard_summaries
+from backend.api.responses import FastJSONResponse
+from backend.api.tenant_utils import get_stored_tenant_id
+from backend.auth.oauth import require_valid_token
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get(
+    "/dashboard/summary",
+    dependencies=[Depends(get_stored_tenant_id)],
+    response_class=FastJSONResponse,
+    description="Invoice, bank transaction and contact aggregates for the dashboard",
+)
+async def get_dashboard_summary(
+    request: Request, token: dict = Depends(require_valid_token)
+) -> FastJSONResponse:
+    try:
+        xero_tenant_id = get_stored_tenant_id(request)
+        if not xero_tenant_id:
+            raise HTTPException(status_code=404, detail="No organisation tenant found")
+
+        return FastJSONResponse(content=await dashboard_summaries.get(xero_tenant_id))
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Dashboard summary error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,48 @@
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from backend.api.dashboard import dashboard_summaries
+from backend.api.events import TooManySubscribers, event_broker, format_event
+from backend.api.tenant_utils import get_stored_tenant_id
+from backend.auth.oauth import require_valid_token
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get(
+    "/events",
+    dependencies=[Depends(get_stored_tenant_id)],
+    response_class=StreamingResponse,
+    description="Server-sent events announcing changes to the selected tenant's data",
+)
+async def stream_events(
+    request: Request, token: dict = Depends(require_valid_token)
+) -> StreamingResponse:
+    try:
+        xero_tenant_id = get_stored_tenant_id(request)
+        if not xero_tenant_id:
+            raise HTTPException(status_code=404, detail="No organisation tenant found")
+
+        subscription = event_broker.subscribe(xero_tenant_id)
+        try:
+            summary = await dashboard_summaries.get(xero_tenant_id)
+        except Exception:
+            event_broker.unsubscribe(subscription)
+            raise
+
+        return StreamingResponse(
+            event_broker.stream(subscription, format_event("summary", summary)),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    except HTTPException as he:
+        raise he
+    except TooManySubscribers as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Event stream error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,67 @@
+import logging
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request
+from fastapi.responses import StreamingResponse
+
+from backend.api.export import FORMATS, export_available, export_chunks
+from backend.api.list_query import ListQuery
+from backend.api.local_store import local_store
+from backend.api.sync_engine import sync_engine
+from backend.api.tenant_utils import get_stored_tenant_id
+from backend.auth.oauth import require_valid_token
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Export paths and the synced resources they read
+EXPORT_RESOURCES = {"invoices": "invoices", "bank-transactions": "bank_transactions"}
+
+
+@router.get(
+    "/export/{resource}",
+    dependencies=[Depends(get_stored_tenant_id)],
+    response_class=StreamingResponse,
+    description="Streams a tenant's invoices or bank transactions, one row per "
+    "line item, as CSV, Parquet or Arrow",
+)
+async def export_records(
+    request: Request,
+    resource: str = Path(..., pattern="^(invoices|bank-transactions)$"),
+    format: str = Query("csv", pattern="^(csv|parquet|arrow)$"),
+    date_from: Optional[date] = Query(
+        None, description="Only records dated on or after this day"
+    ),
+    date_to: Optional[date] = Query(
+        None, description="Only records dated on or before this day"
+    ),
+    token: dict = Depends(require_valid_token),
+) -> StreamingResponse:
+    try:
+        xero_tenant_id = get_stored_tenant_id(request)
+        if not xero_tenant_id:
+            raise HTTPException(status_code=404, detail="No organisation tenant found")
+        if not export_available(format):
+            raise HTTPException(
+                status_code=400,
+                detail=f"{format} export needs the pyarrow package on the server",
+            )
+
+        synced = EXPORT_RESOURCES[resource]
+        await sync_engine.refresh(xero_tenant_id, synced)
+        query = ListQuery(synced, date_from=date_from, date_to=date_to)
+        media_type, extension = FORMATS[format]
+        return StreamingResponse(
+            export_chunks(synced, format, query.select(local_store, xero_tenant_id)),
+            media_type=media_type,
+            headers={
+                "Content-Disposition": f'attachment; filename="{resource}.{extension}"'
+            },
+        )
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Export error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
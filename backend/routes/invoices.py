@@ -1,26 +1,56 @@
 import logging
-from typing import Optional
+from typing import List, Optional
 
 from fastapi import (
     APIRouter,
     Body,
     Depends,
     File,
+    Form,
+    Header,
     HTTPException,
     Path,
+    Query,
     Request,
     UploadFile,
 )
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse
 from pydantic import ValidationError
-from xero_python.accounting import AccountingApi, CurrencyCode
-from xero_python.accounting import Contact as XeroContact
-from xero_python.accounting import Invoice as XeroInvoice
-from xero_python.accounting import LineItem as XeroLineItem
 from xero_python.api_client import serialize
 
+from backend.api.attachments import (
+    AttachmentTooLarge,
+    attachment_uploader,
+    inspect_file,
+)
+from backend.api.batch_get import batch_getter, batch_response
+from backend.api.http_cache import collection_etag, not_modified
+from backend.api.invoice_bulk import (
+    bulk_invoice_creator,
+    invoice_chart,
+    parse_json_list,
+    parse_ndjson,
+    to_xero_invoice,
+)
+from backend.api.job_handlers import (
+    SpoolTooLarge,
+    new_spool_path,
+    queue_attachment_uploads,
+    spool_json_lines,
+    spool_stream,
+)
+from backend.api.job_queue import accepted_response, job_queue
+from backend.api.list_query import ListQuery, invoice_query
+from backend.api.local_store import local_store
+from backend.api.pagination import encoded_response, request_key
+from backend.api.passthrough import passthrough_response
+from backend.api.responses import FastJSONResponse, parse_fields
+from backend.api.sync_engine import sync_engine
 from backend.api.tenant_utils import get_stored_tenant_id
-from backend.auth.oauth import api_client, require_valid_token
+from backend.api.xero_client import xero_client
+from backend.auth.oauth import require_valid_token
+from backend.config import XERO_ATTACHMENT_BATCH_LIMIT
+from backend.models.batch_models import BatchGetRequest
 from backend.models.invoice_models import InvoiceRequest
 
 router = APIRouter()
@@ -30,28 +60,86 @@ logger = logging.getLogger(__name__)
 @router.get(
     "/invoices",
     dependencies=[Depends(get_stored_tenant_id)],
-    response_class=JSONResponse,
+    response_class=FastJSONResponse,
     description="Returns a list of invoices for the current tenant.",
 )
 async def get_tenant_invoices(
-    request: Request, token: dict = Depends(require_valid_token)
+    request: Request,
+    stream: bool = Query(False, description="Stream records as they are fetched"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    raw: bool = Query(
+        False, description="Stream one page of Xero's response as is, unparsed"
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated fields to keep in each record, "
+        "e.g. InvoiceID,Status,Contact.ContactID",
+    ),
+    query: ListQuery = Depends(invoice_query),
+    token: dict = Depends(require_valid_token),
 ):
     try:
         xero_tenant_id = get_stored_tenant_id(request)
         if not xero_tenant_id:
             raise HTTPException(status_code=404, detail="No organisation tenant found")
 
-        accounting_api = AccountingApi(api_client)
-        invoices = accounting_api.get_invoices(xero_tenant_id)
-        serialize_invoices = serialize(invoices)
+        if raw:
+            return await passthrough_response(
+                xero_client.accounting_api.get_invoices,
+                xero_tenant_id,
+                **query.xero_kwargs(),
+            )
 
-        return JSONResponse(content=serialize_invoices)
+        await sync_engine.refresh(xero_tenant_id, "invoices")
+        etag = await collection_etag(request, xero_tenant_id, "invoices")
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
+        response = await encoded_response(
+            query.select(local_store, xero_tenant_id),
+            "Invoices",
+            stream=stream,
+            fmt=format,
+            fields=parse_fields(fields),
+            share_key=request_key(request, xero_tenant_id),
+        )
+        response.headers["ETag"] = etag
+        return response
 
+    except HTTPException as he:
+        raise he
     except Exception as e:
         logger.error(f"Failed to fetch invoices: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post(
+    "/invoices/batch",
+    dependencies=[Depends(get_stored_tenant_id)],
+    response_class=FastJSONResponse,
+    description="Returns invoices by ID, in request order, with NotFound markers",
+)
+async def get_invoices_batch(
+    request: Request,
+    batch: BatchGetRequest = Body(...),
+    token: dict = Depends(require_valid_token),
+):
+    try:
+        xero_tenant_id = get_stored_tenant_id(request)
+        if not xero_tenant_id:
+            raise HTTPException(status_code=404, detail="No organisation tenant found")
+
+        ids = [str(record_id) for record_id in batch.ids]
+        records = await batch_getter.get_many(xero_tenant_id, "invoices", ids)
+        return batch_response("Invoices", "InvoiceID", ids, records)
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Failed to fetch invoices batch: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get(
     "/invoices/{invoice_id}",
     dependencies=[Depends(get_stored_tenant_id)],
@@ -62,7 +150,7 @@ async def get_invoice_by_id(
     request: Request,
     invoice_id: str = Path(..., description="The ID of the invoice"),
     token: dict = Depends(require_valid_token),
-) -> JSONResponse:
+) -> FastJSONResponse:
     try:
         # Get the stored tenant ID
         tenant_id = get_stored_tenant_id(request)
@@ -71,10 +159,9 @@ async def get_invoice_by_id(
                 status_code=400,
                 detail="No tenant selected. Please select a tenant first.",
             )
-        accounting_api = AccountingApi(api_client)
-        invoice = accounting_api.get_invoice(tenant_id, invoice_id=invoice_id)
+        invoice = await xero_client.get_invoice(tenant_id, invoice_id=invoice_id)
 
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=200,
             content={"status": "success", "invoice": serialize(invoice)},
         )
@@ -89,41 +176,22 @@ async def create_invoice(
     invoice_data: InvoiceRequest = Body(...),
     token: dict = Depends(require_valid_token),
     description="Creates a new invoice for the current tenant.",
-) -> JSONResponse:
+) -> FastJSONResponse:
     try:
         tenant_id = get_stored_tenant_id(request)
         if not tenant_id:
             raise HTTPException(status_code=400, detail="No tenant selected")
 
-        accounting_api = AccountingApi(api_client)
-
-        xero_invoices = []
-        for invoice in invoice_data.invoices:
-            xero_contact = XeroContact(contact_id=invoice.contact.contact_id)
+        chart = await invoice_chart(tenant_id)
+        errors = [
+            f"Invoice {invoice.invoice_number}: {error}"
+            for invoice in invoice_data.invoices
+            for error in (chart.check_line_items(invoice.line_items) if chart else [])
+        ]
+        if errors:
+            raise HTTPException(status_code=400, detail=errors)
 
-            xero_line_items = [
-                XeroLineItem(
-                    description=item.description,
-                    quantity=item.quantity,
-                    unit_amount=item.unit_amount,
-                    account_code=item.account_code,
-                    tax_type=item.tax_type,
-                )
-                for item in invoice.line_items
-            ]
-
-            xero_invoice = XeroInvoice(
-                type=invoice.type,
-                contact=xero_contact,
-                line_items=xero_line_items,
-                date=invoice.date,
-                due_date=invoice.due_date,
-                invoice_number=invoice.invoice_number,
-                status=invoice.status,
-                currency_code=CurrencyCode(invoice.currency_code),
-                reference=invoice.reference,
-            )
-            xero_invoices.append(xero_invoice)
+        xero_invoices = [to_xero_invoice(invoice) for invoice in invoice_data.invoices]
 
         # Create the request body in the format Xero expects
         logger.info(
@@ -131,11 +199,17 @@ async def create_invoice(
         )
         request_body = {"Invoices": xero_invoices}
 
-        created_invoices = accounting_api.create_invoices(
+        created_invoices = await xero_client.create_invoices(
             tenant_id, invoices=request_body
         )
         logger.info(f"Successfully created {len(created_invoices.invoices)} invoices")
-        return JSONResponse(
+        try:
+            await sync_engine.store_records(
+                tenant_id, "invoices", created_invoices.invoices
+            )
+        except Exception as e:
+            logger.warning(f"Failed to store created invoices locally: {str(e)}")
+        return FastJSONResponse(
             status_code=201,
             content={
                 "status": "success",
@@ -144,6 +218,8 @@ async def create_invoice(
             },
         )
 
+    except HTTPException as he:
+        raise he
     except ValidationError as e:
         logger.error(f"Validation error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=400, detail=str(e))
@@ -152,14 +228,87 @@ async def create_invoice(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post(
+    "/create-invoices/bulk",
+    response_class=FastJSONResponse,
+    description=(
+        "Creates many invoices in chunks and reports the outcome of each one. "
+        "Accepts a JSON body like /create-invoices or an application/x-ndjson "
+        "body with one invoice per line. With background=true the body is "
+        "queued as a job and 202 is returned with the job's status URL."
+    ),
+)
+async def create_invoices_bulk(
+    request: Request,
+    token: dict = Depends(require_valid_token),
+    idempotency_key: Optional[str] = Header(
+        None, description="Reuse to safely resend a batch after a failure"
+    ),
+    background: bool = Query(False, description="Run as a background job"),
+) -> FastJSONResponse:
+    try:
+        tenant_id = get_stored_tenant_id(request)
+        if not tenant_id:
+            raise HTTPException(status_code=400, detail="No tenant selected")
+
+        content_type = request.headers.get("content-type", "")
+        is_ndjson = content_type.startswith("application/x-ndjson")
+        if background and is_ndjson:
+            path = new_spool_path(".ndjson")
+            total = await spool_stream(request.stream(), path)
+            job = await job_queue.submit(
+                "bulk_invoices",
+                tenant_id,
+                {"path": path, "total": total, "spool": [path]},
+            )
+            return accepted_response(job)
+
+        if is_ndjson:
+            invoices = parse_ndjson(request.stream())
+        else:
+            try:
+                body = await request.json()
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid JSON body")
+            items = body.get("Invoices") if isinstance(body, dict) else body
+            if not isinstance(items, list):
+                raise HTTPException(
+                    status_code=400, detail="Expected a list of Invoices"
+                )
+            if background:
+                path = new_spool_path(".ndjson")
+                total = await spool_json_lines(items, path)
+                job = await job_queue.submit(
+                    "bulk_invoices",
+                    tenant_id,
+                    {"path": path, "total": total, "spool": [path]},
+                )
+                return accepted_response(job)
+            invoices = parse_json_list(items)
+
+        result = await bulk_invoice_creator.create(
+            tenant_id, invoices, batch_key=idempotency_key
+        )
+        return FastJSONResponse(status_code=200, content=result)
+
+    except SpoolTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Failed to create invoice batch: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.put("/invoice-attachment/{invoice_id}")
 async def create_invoice_attachment(
     request: Request,
     invoice_id: str,
     file: Optional[UploadFile] = File(None, description="File to upload"),
     token: dict = Depends(require_valid_token),
+    background: bool = Query(False, description="Upload as a background job"),
     description="Creates a new invoice attachment for the current tenant.",
-) -> JSONResponse:
+) -> FastJSONResponse:
     try:
         logger.info(f"Starting attachment upload process for invoice ID: {invoice_id}")
 
@@ -168,37 +317,22 @@ async def create_invoice_attachment(
             logger.error(f"No tenant ID found for invoice {invoice_id}")
             raise HTTPException(status_code=400, detail="No tenant selected")
 
-        accounting_api = AccountingApi(api_client)
-
-        # Handle file upload
-        if file:
-            logger.info(
-                f"Processing file upload - Filename: {file.filename}, Content-Type: {file.content_type}"
-            )
-            file_content = await file.read()
-            filename = file.filename
-            body = file_content
-            mime_type = file.content_type
-        else:
+        if not file:
             raise HTTPException(status_code=400, detail="Please provide a file.")
 
-        # Include online parameter and generate an idempotency key
-        include_online = True
-        idempotency_key = f"attachment_{invoice_id}_{filename}"
-
         logger.info(
-            f"Sending attachment to Xero API - Filename: {filename}, MIME type: {mime_type}"
+            f"Processing file upload - Filename: {file.filename}, Content-Type: {file.content_type}"
         )
-        try:
-            attachment = accounting_api.create_invoice_attachment_by_file_name(
-                xero_tenant_id=tenant_id,
-                invoice_id=invoice_id,
-                file_name=filename,
-                body=body,
-                include_online=include_online,
-                idempotency_key=idempotency_key,
+        inspected = await inspect_file(file.file, file.filename, known_size=file.size)
+
+        if background:
+            job = await queue_attachment_uploads(
+                tenant_id, [(0, invoice_id, inspected)]
             )
-            logger.info(f"Successfully created attachment for invoice {invoice_id}")
+            return accepted_response(job)
+
+        try:
+            outcome = await attachment_uploader.upload(tenant_id, invoice_id, inspected)
         except Exception as e:
             logger.error(
                 f"Error uploading attachment to Xero API: {str(e)}",
@@ -209,17 +343,95 @@ async def create_invoice_attachment(
                 detail=f"Error uploading to Xero API: {str(e)}",
             )
 
-        return JSONResponse(
+        if outcome["status"] == "duplicate":
+            return FastJSONResponse(
+                status_code=200,
+                content={
+                    "status": "success",
+                    "message": "Identical attachment already uploaded",
+                    "data": outcome["data"],
+                },
+            )
+        return FastJSONResponse(
             status_code=201,
             content={
                 "status": "success",
                 "message": "Attachment uploaded successfully",
-                "data": serialize(attachment),
+                "data": outcome["data"],
             },
         )
+    except AttachmentTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except HTTPException as he:
+        raise he
     except Exception as e:
         logger.error(
             f"Error processing attachment for invoice {invoice_id}: {str(e)}",
             exc_info=True,
         )
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.put(
+    "/invoice-attachments",
+    response_class=FastJSONResponse,
+    description=(
+        "Uploads several attachments in one request. The n-th file is attached "
+        "to the n-th invoice_ids entry; each file gets its own result."
+    ),
+)
+async def create_invoice_attachments(
+    request: Request,
+    files: List[UploadFile] = File(..., description="Files to upload"),
+    invoice_ids: List[str] = Form(..., description="Invoice ID for each file"),
+    token: dict = Depends(require_valid_token),
+    background: bool = Query(False, description="Upload as a background job"),
+) -> FastJSONResponse:
+    try:
+        tenant_id = get_stored_tenant_id(request)
+        if not tenant_id:
+            raise HTTPException(status_code=400, detail="No tenant selected")
+        if len(files) != len(invoice_ids):
+            raise HTTPException(
+                status_code=400,
+                detail="Provide exactly one invoice_ids entry per file",
+            )
+        if len(files) > XERO_ATTACHMENT_BATCH_LIMIT:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {XERO_ATTACHMENT_BATCH_LIMIT} files per request",
+            )
+
+        rejected = []
+        uploads = []
+        for index, (file, invoice_id) in enumerate(zip(files, invoice_ids)):
+            try:
+                inspected = await inspect_file(
+                    file.file, file.filename, known_size=file.size
+                )
+            except AttachmentTooLarge as e:
+                rejected.append(
+                    {
+                        "index": index,
+                        "invoice_id": invoice_id,
+                        "file_name": file.filename,
+                        "status": "failed",
+                        "error": str(e),
+                    }
+                )
+                continue
+            uploads.append((index, invoice_id, inspected))
+
+        if background:
+            job = await queue_attachment_uploads(tenant_id, uploads)
+            return accepted_response(job, rejected=rejected)
+
+        results = rejected + await attachment_uploader.upload_many(tenant_id, uploads)
+        results.sort(key=lambda result: result["index"])
+        return FastJSONResponse(status_code=200, content={"results": results})
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Error processing attachment batch: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
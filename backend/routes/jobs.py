@@ -0,0 +1,80 @@
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Request
+
+from backend.api.job_queue import Job, job_queue
+from backend.api.responses import FastJSONResponse
+from backend.api.tenant_utils import get_stored_tenant_id
+from backend.auth.oauth import require_valid_token
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+def _caller(request: Request):
+    """The signed-in user and selected tenant whose jobs may be seen."""
+    tenant_id = get_stored_tenant_id(request)
+    if not tenant_id:
+        raise HTTPException(status_code=404, detail="No organisation tenant found")
+    return request.session.get("user_id"), tenant_id
+
+
+def _owned(job: Optional[Job], request: Request, job_id: str) -> Job:
+    """``job`` if the caller submitted it for the selected tenant, else 404.
+
+    Other users' jobs are reported as missing rather than forbidden, so job
+    ids cannot be probed.
+    """
+    user_id, tenant_id = _caller(request)
+    if job is None or job.user_id != user_id or job.tenant_id != tenant_id:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+@router.get(
+    "/jobs",
+    response_class=FastJSONResponse,
+    description="Lists your recent background jobs for the selected tenant, "
+    "newest first",
+)
+async def list_jobs(
+    request: Request, token: dict = Depends(require_valid_token)
+) -> FastJSONResponse:
+    user_id, tenant_id = _caller(request)
+    jobs = [job.to_dict() for job in job_queue.list(tenant_id, user_id)]
+    for job in jobs:
+        # Results can be large; fetch them from /jobs/{job_id}
+        job.pop("result")
+    return FastJSONResponse(content={"Jobs": jobs})
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_class=FastJSONResponse,
+    description="Returns the status, progress and result of a background job",
+)
+async def get_job(
+    request: Request,
+    job_id: str = Path(..., description="The job ID returned when it was queued"),
+    token: dict = Depends(require_valid_token),
+) -> FastJSONResponse:
+    job = _owned(await job_queue.find(job_id), request, job_id)
+    return FastJSONResponse(content=job.to_dict())
+
+
+@router.delete(
+    "/jobs/{job_id}",
+    response_class=FastJSONResponse,
+    description="Cancels a queued or running background job",
+)
+async def cancel_job(
+    request: Request,
+    job_id: str = Path(..., description="The job ID returned when it was queued"),
+    token: dict = Depends(require_valid_token),
+) -> FastJSONResponse:
+    job = _owned(await job_queue.find(job_id), request, job_id)
+    # Jobs only found in the store have finished and are left as they are
+    job = await job_queue.cancel(job_id) or job
+    logger.info(f"Cancellation requested for job {job_id}")
+    return FastJSONResponse(status_code=202, content=job.to_dict())
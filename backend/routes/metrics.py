@@ -0,0 +1,69 @@
+import hmac
+import logging
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from backend.api.account_utils import accounts_cache
+from backend.api.attachments import attachment_uploader
+from backend.api.batch_get import batch_getter
+from backend.api.dashboard import dashboard_summaries
+from backend.api.events import event_broker
+from backend.api.job_queue import job_queue
+from backend.api.pagination import list_responses
+from backend.api.reconciliation import reconciliation_matcher
+from backend.api.responses import FastJSONResponse
+from backend.api.sync_engine import sync_engine
+from backend.api.tenant_utils import connection_cache
+from backend.api.webhooks import webhook_processor
+from backend.api.xero_client import xero_client
+from backend.auth.oauth import api_client, token_manager
+from backend.config import METRICS_TOKEN
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+def require_metrics_token(authorization: str = Header("")):
+    """Only operators holding ``METRICS_TOKEN`` may read the metrics."""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        token.encode(), METRICS_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@router.get(
+    "/metrics",
+    dependencies=[Depends(require_metrics_token)],
+    response_class=FastJSONResponse,
+    description="Returns runtime metrics for the Xero gateway and caches",
+)
+async def get_metrics() -> FastJSONResponse:
+    return FastJSONResponse(
+        content={
+            "gateway": xero_client.stats(),
+            "http_pool": api_client.rest_client.stats(),
+            "rate_limits": xero_client.scheduler.stats(),
+            "tenant_cache": connection_cache.stats(),
+            "attachments": attachment_uploader.stats(),
+            "dashboard_cache": dashboard_summaries.stats(),
+            "accounts_cache": accounts_cache.stats(),
+            "jobs": job_queue.stats(),
+            "token": token_manager.stats(),
+            "batch_get": batch_getter.stats(),
+            "webhooks": webhook_processor.stats(),
+            "events": event_broker.stats(),
+            "reconciliation": reconciliation_matcher.stats(),
+            "coalescing": {
+                "xero_reads": xero_client.reads.stats(),
+                "syncs": sync_engine.flights.stats(),
+                "list_responses": list_responses.stats(),
+            },
+        }
+    )
@@ -0,0 +1,56 @@
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+
+from backend.api.reconciliation import MatchOptions, reconciliation_matcher
+from backend.api.responses import FastJSONResponse
+from backend.api.tenant_utils import get_stored_tenant_id
+from backend.auth.oauth import require_valid_token
+from backend.config import RECONCILE_DATE_WINDOW
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get(
+    "/reconciliation/suggestions",
+    dependencies=[Depends(get_stored_tenant_id)],
+    response_class=FastJSONResponse,
+    description="Ranked invoices each unreconciled bank transaction may settle",
+)
+async def get_reconciliation_suggestions(
+    request: Request,
+    amount_tolerance: float = Query(
+        0.0, ge=0, le=5, description="Largest difference from the amount due"
+    ),
+    date_window: int = Query(
+        RECONCILE_DATE_WINDOW,
+        ge=0,
+        le=366,
+        description="Most days between the transaction and the invoice date",
+    ),
+    min_score: float = Query(0.5, ge=0, le=1, description="Lowest score to return"),
+    limit: int = Query(3, ge=1, le=20, description="Matches per bank transaction"),
+    token: dict = Depends(require_valid_token),
+) -> FastJSONResponse:
+    try:
+        xero_tenant_id = get_stored_tenant_id(request)
+        if not xero_tenant_id:
+            raise HTTPException(status_code=404, detail="No organisation tenant found")
+
+        suggestions = await reconciliation_matcher.suggest(
+            xero_tenant_id,
+            MatchOptions(
+                amount_tolerance=amount_tolerance,
+                date_window=date_window,
+                min_score=min_score,
+                limit=limit,
+            ),
+        )
+        return FastJSONResponse(content={"Suggestions": suggestions})
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Reconciliation error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,75 @@
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+
+from backend.api.job_queue import accepted_response, job_queue
+from backend.api.responses import FastJSONResponse
+from backend.api.sync_engine import RESOURCES, sync_engine
+from backend.api.tenant_utils import get_stored_tenant_id
+from backend.auth.oauth import require_valid_token
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.post(
+    "/sync",
+    dependencies=[Depends(get_stored_tenant_id)],
+    response_class=FastJSONResponse,
+    description="Pull changes from Xero into the local store for the selected tenant",
+)
+async def sync_tenant(
+    request: Request,
+    token: dict = Depends(require_valid_token),
+    resource: str = Query(
+        None, description=f"One of {', '.join(RESOURCES)}; all when omitted"
+    ),
+    force: bool = Query(False, description="Sync even if one ran moments ago"),
+    background: bool = Query(
+        False, description="Run as a low-priority background job and return 202"
+    ),
+) -> FastJSONResponse:
+    try:
+        xero_tenant_id = get_stored_tenant_id(request)
+        if not xero_tenant_id:
+            raise HTTPException(status_code=404, detail="No organisation tenant found")
+        if resource is not None and resource not in RESOURCES:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown sync resource: {resource}"
+            )
+
+        if background:
+            job = await job_queue.submit(
+                "sync", xero_tenant_id, {"resource": resource, "force": force}
+            )
+            return accepted_response(job)
+
+        if resource is None:
+            changed = await sync_engine.sync_all(xero_tenant_id, force=force)
+        else:
+            changed = {
+                resource: await sync_engine.sync(xero_tenant_id, resource, force=force)
+            }
+
+        return FastJSONResponse(content={"changed": changed})
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Sync error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get(
+    "/sync/status",
+    dependencies=[Depends(get_stored_tenant_id)],
+    response_class=FastJSONResponse,
+    description="Record counts and last sync times of the local store",
+)
+async def get_sync_status(
+    request: Request, token: dict = Depends(require_valid_token)
+) -> FastJSONResponse:
+    xero_tenant_id = get_stored_tenant_id(request)
+    if not xero_tenant_id:
+        raise HTTPException(status_code=404, detail="No organisation tenant found")
+    return FastJSONResponse(content=await sync_engine.status(xero_tenant_id))
@@ -3,17 +3,18 @@ import logging
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
-from fastapi.responses import JSONResponse
-from xero_python.accounting import AccountingApi
 from xero_python.api_client import serialize
-from xero_python.identity import IdentityApi
 
+from backend.api.responses import FastJSONResponse
 from backend.api.tenant_utils import (
+    get_connections,
+    get_organisation,
     get_stored_tenant_id,
     store_tenant_id,
     validate_tenant_id,
 )
-from backend.auth.oauth import api_client, require_valid_token
+from backend.auth.oauth import require_valid_token
+from backend.config import XERO_TENANT_FANOUT_CONCURRENCY
 from backend.models.tenant_models import TenantError
 
 router = APIRouter()
@@ -32,66 +33,68 @@ async def retry_with_backoff(func, max_retries=3, initial_delay=1):
             await asyncio.sleep(delay)
 
 
+async def fetch_tenant_info(connection, semaphore: asyncio.Semaphore) -> dict:
+    """Look up one organisation, retrying only this tenant on failure."""
+    tenant_info = {
+        "tenantId": connection.tenant_id,
+        "tenantName": "Unknown",
+        "tenantType": connection.tenant_type,
+        "lastAccessed": datetime.utcnow().isoformat(),
+        "status": "ok",
+        "error": None,
+    }
+    try:
+        async with semaphore:
+            organisations = await retry_with_backoff(
+                lambda: get_organisation(connection.tenant_id)
+            )
+        if organisations.organisations:
+            tenant_info["tenantName"] = organisations.organisations[0].name
+    except Exception as e:
+        logger.warning(
+            f"Failed to fetch organisation details for tenant {connection.tenant_id}: {str(e)}"
+        )
+        tenant_info["status"] = "error"
+        tenant_info["error"] = str(e)
+    return tenant_info
+
+
 @router.get("/tenants")
 async def get_tenants(
     request: Request,
     token: dict = Depends(require_valid_token),
     description="Returns a list of tenants for the current user.",
 ):
-    async def fetch_tenants():
-        try:
-            identity_api = IdentityApi(api_client)
-            accounting_api = AccountingApi(api_client)
-            available_tenants = []
-
-            connections = identity_api.get_connections()
-
-            for connection in connections:
-                if connection.tenant_type == "ORGANISATION":
-                    try:
-                        organisations = accounting_api.get_organisations(
-                            xero_tenant_id=connection.tenant_id
-                        )
-                        tenant_info = {
-                            "tenantId": connection.tenant_id,
-                            "tenantName": organisations.organisations[0].name
-                            if organisations.organisations
-                            else "Unknown",
-                            "tenantType": connection.tenant_type,
-                            "lastAccessed": datetime.utcnow().isoformat(),
-                        }
-                        available_tenants.append(tenant_info)
-                    except Exception as e:
-                        logger.warning(
-                            f"Failed to fetch organisation details for tenant {connection.tenant_id}: {str(e)}"
-                        )
-                        continue
-
-            if not available_tenants:
-                raise TenantError(
-                    message="No available organizations found", error_code="NO_TENANTS"
-                )
-
-            return available_tenants
-
-        except Exception as e:
-            logger.error(f"Tenants error: {str(e)}", exc_info=True)
-            raise TenantError(
-                logger.error(f"Failed to fetch organizations: {str(e)}", exc_info=True),
-                message="Failed to fetch organizations",
-                error_code="FETCH_ERROR",
-            )
-
     try:
-        tenants = await retry_with_backoff(fetch_tenants)
-        return JSONResponse(content={"tenants": tenants})
+        connections = await retry_with_backoff(get_connections)
     except Exception as e:
+        logger.error(f"Failed to fetch connections: {str(e)}", exc_info=True)
         raise HTTPException(
-            logger.error(f"Error selecting tenant: {str(e)}", exc_info=True),
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e),
         )
 
+    organisations = [
+        connection
+        for connection in connections
+        if connection.tenant_type == "ORGANISATION"
+    ]
+    if not organisations:
+        raise TenantError(
+            message="No available organizations found", error_code="NO_TENANTS"
+        )
+
+    # Organisation lookups run concurrently, capped to stay within Xero's
+    # per-app limits; each tenant reports its own status.
+    semaphore = asyncio.Semaphore(XERO_TENANT_FANOUT_CONCURRENCY)
+    tenants = await asyncio.gather(
+        *(fetch_tenant_info(connection, semaphore) for connection in organisations)
+    )
+    failed = sum(1 for tenant in tenants if tenant["status"] == "error")
+    if failed:
+        logger.warning(f"Fetched {len(tenants)} tenants, {failed} with errors")
+    return FastJSONResponse(content={"tenants": tenants})
+
 
 @router.post("/select-tenant/{tenant_id}")
 async def select_tenant(
@@ -99,7 +102,7 @@ async def select_tenant(
     tenant_id: str,
     token: dict = Depends(require_valid_token),
     description="Selects a specific Xero tenant ID.",
-) -> JSONResponse:
+) -> FastJSONResponse:
     """Select and store a specific Xero tenant ID."""
     try:
         # Validate the tenant ID
@@ -111,7 +114,7 @@ async def select_tenant(
             )
         # Store the tenant ID in the session
         store_tenant_id(request, tenant_id)
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=200,
             content={
                 "status": "success",
@@ -131,12 +134,12 @@ async def get_selected_tenant(
     request: Request,
     token: dict = Depends(require_valid_token),
     description="Returns the currently selected tenant ID.",
-) -> JSONResponse:
+) -> FastJSONResponse:
     """Get information about the currently selected tenant."""
     try:
         tenant_id = get_stored_tenant_id(request)
         if not tenant_id:
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=200,
                 content={
                     "status": "no_tenant",
@@ -144,9 +147,8 @@ async def get_selected_tenant(
                 },
             )
 
-        # Get tenant details from Xero
-        identity_api = IdentityApi(api_client)
-        connections = identity_api.get_connections()
+        # Get tenant details from the connection cache
+        connections = await get_connections()
         tenant_info = next(
             (serialize(conn) for conn in connections if conn.tenant_id == tenant_id),
             None,
@@ -155,7 +157,7 @@ async def get_selected_tenant(
         if not tenant_info:
             # Clear invalid tenant ID
             request.session.pop("xero_tenant_id", None)
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=200,
                 content={
                     "status": "invalid_tenant",
@@ -163,7 +165,7 @@ async def get_selected_tenant(
                 },
             )
 
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=200,
             content={
                 "status": "active",
@@ -0,0 +1,34 @@
+import logging
+
+import orjson
+from fastapi import APIRouter, Request
+from fastapi.responses import Response
+
+from backend.api.webhooks import verify_signature, webhook_processor
+from backend.config import XERO_WEBHOOK_KEY
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.post(
+    "/webhooks/xero",
+    status_code=200,
+    description="Receives Xero webhook events and queues syncs of what changed",
+)
+async def receive_xero_webhook(request: Request) -> Response:
+    # Xero's intent-to-receive check sends correctly and incorrectly signed
+    # payloads without events and expects 200 and 401 respectively, with
+    # empty bodies, so nothing else may be sent back
+    body = await request.body()
+    if not verify_signature(
+        body, request.headers.get("x-xero-signature"), XERO_WEBHOOK_KEY
+    ):
+        return Response(status_code=401)
+    try:
+        events = orjson.loads(body).get("events") or []
+    except (orjson.JSONDecodeError, AttributeError):
+        logger.warning("Ignoring signed webhook with an unreadable body")
+        return Response(status_code=200)
+    webhook_processor.enqueue(events)
+    return Response(status_code=200)
@@ -0,0 +1,38 @@
+import asyncio
+
+from backend.api.tenant_utils import ConnectionCache
+
+
+def _load_during_invalidation(invalidated_key):
+    """Load ``connections:alice`` while ``invalidated_key`` is invalidated."""
+    cache = ConnectionCache(ttl=60, stale_ttl=0)
+
+    async def main():
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def loader():
+            started.set()
+            await release.wait()
+            return "alice's connections"
+
+        load = asyncio.create_task(cache.get("connections:alice", loader))
+        await started.wait()
+        cache.invalidate(invalidated_key)
+        release.set()
+        await load
+
+    asyncio.run(main())
+    return cache.stats()["entries"]
+
+
+def test_invalidating_another_key_keeps_an_in_flight_load():
+    assert _load_during_invalidation("connections:bob") == 1
+
+
+def test_invalidating_the_same_key_discards_an_in_flight_load():
+    assert _load_during_invalidation("connections:alice") == 0
+
+
+def test_invalidating_everything_discards_an_in_flight_load():
+    assert _load_during_invalidation(None) == 0
@@ -0,0 +1,41 @@
+from backend.api.invoice_bulk import chunk_key
+from backend.models.invoice_models import Invoice
+
+
+def _invoice(number: str, quantity: int = 1) -> Invoice:
+    return Invoice(
+        Type="ACCREC",
+        Contact={"ContactID": "c1"},
+        LineItems=[
+            {
+                "Description": "Consulting",
+                "Quantity": quantity,
+                "UnitAmount": 100.0,
+                "AccountCode": "200",
+                "TaxType": "OUTPUT",
+            }
+        ],
+        Date="2024-08-01",
+        DueDate="2024-08-31",
+        InvoiceNumber=number,
+        Status="AUTHORISED",
+        Reference=None,
+    )
+
+
+def test_unchanged_chunk_keeps_its_key():
+    items = [(0, _invoice("INV-1")), (1, _invoice("INV-2"))]
+    again = [(0, _invoice("INV-1")), (1, _invoice("INV-2"))]
+    assert chunk_key("batch", items) == chunk_key("batch", again)
+
+
+def test_corrected_invoice_changes_the_key():
+    rejected = [(0, _invoice("INV-1")), (1, _invoice("INV-2", quantity=0))]
+    corrected = [(0, _invoice("INV-1")), (1, _invoice("INV-2", quantity=2))]
+    assert chunk_key("batch", rejected) != chunk_key("batch", corrected)
+
+
+def test_key_depends_on_input_positions():
+    first = [(0, _invoice("INV-1"))]
+    moved = [(3, _invoice("INV-1"))]
+    assert chunk_key("batch", first) != chunk_key("batch", moved)
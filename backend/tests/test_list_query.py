@@ -0,0 +1,138 @@
+import asyncio
+import uuid
+from datetime import date, datetime
+
+import orjson
+import pytest
+from fastapi import HTTPException
+
+from backend.api.list_query import ListQuery, _parse_order
+
+CONTACT = "5b96e86b-418e-48e8-8949-308c14aec278"
+
+
+class _Store:
+    """Serves records from memory in batches, like ``LocalStore.iter_json``."""
+
+    def __init__(self, records, batch_size=2):
+        self.rows = [orjson.dumps(record) for record in records]
+        self.batch_size = batch_size
+
+    async def iter_json(self, tenant_id, resource, modified_since=None):
+        for start in range(0, len(self.rows), self.batch_size):
+            yield self.rows[start : start + self.batch_size]
+
+
+def _select(query: ListQuery, records) -> list:
+    async def collect():
+        store = _Store(records)
+        return [
+            orjson.loads(data)
+            async for batch in query.select(store, "tenant")
+            for data in batch
+        ]
+
+    return asyncio.run(collect())
+
+
+def _ms(day: date) -> str:
+    moment = datetime(day.year, day.month, day.day)
+    return f"/Date({int((moment - datetime(1970, 1, 1)).total_seconds() * 1000)}+0000)/"
+
+
+def test_matches_status_date_contact_and_reconciled():
+    query = ListQuery(
+        "bank_transactions",
+        statuses=["AUTHORISED"],
+        date_from=date(2024, 8, 1),
+        date_to=date(2024, 8, 31),
+        contact_id=uuid.UUID(CONTACT),
+        is_reconciled=False,
+    )
+    record = {
+        "Status": "AUTHORISED",
+        "Date": _ms(date(2024, 8, 15)),
+        "Contact": {"ContactID": CONTACT.upper()},
+        "IsReconciled": False,
+    }
+    assert query.matches(record)
+    assert not query.matches({**record, "Status": "VOIDED"})
+    assert not query.matches({**record, "Date": _ms(date(2024, 9, 1))})
+    assert not query.matches({**record, "Date": None})
+    assert not query.matches({**record, "Contact": {"ContactID": str(uuid.uuid4())}})
+    assert not query.matches({**record, "IsReconciled": True})
+
+
+def test_select_pages_without_order():
+    records = [{"InvoiceID": str(i), "Status": "PAID"} for i in range(7)]
+    query = ListQuery("invoices", page=2, page_size=3)
+    assert [r["InvoiceID"] for r in _select(query, records)] == ["3", "4", "5"]
+
+
+def test_select_filters_before_paging():
+    records = [
+        {"InvoiceID": str(i), "Status": "PAID" if i % 2 else "DRAFT"}
+        for i in range(8)
+    ]
+    query = ListQuery("invoices", statuses=["PAID"], page=1, page_size=3)
+    assert [r["InvoiceID"] for r in _select(query, records)] == ["1", "3", "5"]
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_missing_values_sort_last_in_both_directions(descending):
+    records = [
+        {"InvoiceID": "a", "Total": 20},
+        {"InvoiceID": "b"},
+        {"InvoiceID": "c", "Total": 10},
+        {"InvoiceID": "d", "Total": None},
+        {"InvoiceID": "e", "Total": 30},
+    ]
+    query = ListQuery("invoices", order=("Total", descending))
+    ids = [r["InvoiceID"] for r in _select(query, records)]
+    present = ["e", "a", "c"] if descending else ["c", "a", "e"]
+    assert ids == present + ["b", "d"]
+
+
+def test_select_orders_dates_and_mixed_types():
+    records = [
+        {"InvoiceID": "late", "Date": _ms(date(2024, 9, 1))},
+        {"InvoiceID": "early", "Date": _ms(date(2024, 1, 1))},
+        {"InvoiceID": "text", "Date": "not a date"},
+        {"InvoiceID": "number", "Date": 5},
+    ]
+    query = ListQuery("invoices", order=("Date", False))
+    ids = [r["InvoiceID"] for r in _select(query, records)]
+    assert ids == ["number", "early", "late", "text"]
+
+
+def test_select_pages_after_ordering():
+    records = [{"InvoiceID": str(i), "Total": i} for i in range(6)]
+    query = ListQuery("invoices", order=("Total", True), page=2, page_size=2)
+    assert [r["InvoiceID"] for r in _select(query, records)] == ["3", "2"]
+
+
+def test_parse_order_accepts_known_fields_in_any_case():
+    assert _parse_order("invoices", None) is None
+    assert _parse_order("invoices", "Date") == ("Date", False)
+    assert _parse_order("invoices", "duedate desc") == ("DueDate", True)
+    assert _parse_order("contacts", "Name ASC") == ("Name", False)
+    assert _parse_order("bank_transactions", "Contact.Name DESC") == (
+        "Contact.Name",
+        True,
+    )
+
+
+@pytest.mark.parametrize(
+    "resource, order",
+    [
+        ("invoices", "Contact"),
+        ("invoices", "LineItems"),
+        ("invoices", "Date SIDEWAYS"),
+        ("invoices", "Date; DROP"),
+        ("contacts", "Total"),
+    ],
+)
+def test_parse_order_rejects_unsortable_fields(resource, order):
+    with pytest.raises(HTTPException) as error:
+        _parse_order(resource, order)
+    assert error.value.status_code == 400
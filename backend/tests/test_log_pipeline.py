@@ -0,0 +1,39 @@
+import logging
+import queue
+
+from backend.log_pipeline import ContextFilter, RedactingQueueHandler
+
+
+def _queued(log):
+    records = queue.SimpleQueue()
+    handler = RedactingQueueHandler(records)
+    handler.addFilter(ContextFilter())
+    logger = logging.getLogger("test_log_pipeline")
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        log(logger)
+    finally:
+        logger.removeHandler(handler)
+    return records.get_nowait()
+
+
+def test_token_in_message_is_masked():
+    record = _queued(
+        lambda logger: logger.error("Stored %s", {"access_token": "SECRETVALUE"})
+    )
+    assert "SECRETVALUE" not in record.getMessage()
+    assert "'access_token': '***'" in record.getMessage()
+
+
+def test_token_in_traceback_is_masked():
+    def log(logger):
+        try:
+            raise RuntimeError("refresh failed: {'refresh_token': 'SECRETVALUE'}")
+        except RuntimeError:
+            logger.error("Token refresh failed", exc_info=True)
+
+    record = _queued(log)
+    assert "Traceback" in record.getMessage()
+    assert "SECRETVALUE" not in record.getMessage()
+    assert record.exc_info is None
@@ -0,0 +1,73 @@
+import asyncio
+import json
+import time
+
+from xero_python.api_client.oauth2 import TokenApi
+
+from backend.auth.client_factory import create_api_client
+from backend.auth.oauth import (
+    TokenManager,
+    obtain_xero_oauth2_token,
+    store_xero_oauth2_token,
+    token_store,
+)
+from backend.auth.token_store import acting_as
+from backend.config import SCOPE
+
+
+class _TokenResponse:
+    def __init__(self, token: dict):
+        self.data = json.dumps(token).encode()
+
+
+def _client_with_token_endpoint(calls: list):
+    """An SDK client whose token endpoint is answered locally."""
+    client = create_api_client(
+        obtain_xero_oauth2_token,
+        store_xero_oauth2_token,
+        client_id="client-id",
+        client_secret="client-secret",
+    )
+
+    def call_api(url, method, post_params=None, **kwargs):
+        assert url == TokenApi.refresh_token_url
+        calls.append(post_params)
+        token = {
+            "access_token": "new-access",
+            "refresh_token": "new-refresh",
+            "token_type": "Bearer",
+            "expires_in": 1800,
+            "scope": post_params["scope"],
+        }
+        return _TokenResponse(token), 200, {}
+
+    client.call_api = call_api
+    return client
+
+
+def test_expired_token_is_refreshed_through_the_sdk():
+    calls = []
+    manager = TokenManager(client=_client_with_token_endpoint(calls), store=token_store)
+    with acting_as("refresh-test-user"):
+        # Stored as the login stores it: Xero sends the scope as a string
+        store_xero_oauth2_token(
+            {
+                "access_token": "old-access",
+                "refresh_token": "old-refresh",
+                "token_type": "Bearer",
+                "expires_in": 1800,
+                "expires_at": time.time() - 10,
+                "scope": SCOPE,
+            }
+        )
+        refreshed = asyncio.run(manager.refresh())
+
+    assert manager.failures == 0
+    assert manager.refreshes == 1
+    assert len(calls) == 1
+    assert calls[0]["refresh_token"] == "old-refresh"
+    assert calls[0]["scope"] == " ".join(SCOPE.split())
+    assert refreshed["access_token"] == "new-access"
+    assert isinstance(refreshed["scope"], list)
+    assert token_store.get("refresh-test-user")["refresh_token"] == "new-refresh"
+    token_store.delete("refresh-test-user")
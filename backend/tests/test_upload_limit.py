@@ -0,0 +1,57 @@
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from backend.api.attachments import FORM_OVERHEAD, UploadLimitMiddleware
+
+MAX_BYTES = 1024
+
+
+def _client(reached: list) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(UploadLimitMiddleware, max_bytes=MAX_BYTES, batch_limit=2)
+
+    @app.put("/invoice-attachment/{invoice_id}")
+    async def upload(invoice_id: str, file: UploadFile = File(...)):
+        reached.append(invoice_id)
+        return {"size": len(await file.read())}
+
+    return TestClient(app)
+
+
+def test_small_upload_reaches_the_route():
+    reached = []
+    response = _client(reached).put(
+        "/invoice-attachment/inv-1", files={"file": ("a.txt", b"x" * MAX_BYTES)}
+    )
+    assert response.status_code == 200
+    assert reached == ["inv-1"]
+
+
+def test_content_length_over_the_limit_is_refused_unread():
+    reached = []
+    body = b"x" * (MAX_BYTES + FORM_OVERHEAD + 1)
+    response = _client(reached).put(
+        "/invoice-attachment/inv-1",
+        content=body,
+        headers={"Content-Type": "multipart/form-data; boundary=b"},
+    )
+    assert response.status_code == 413
+    assert reached == []
+
+
+def test_streamed_body_is_cut_off_at_the_limit():
+    reached = []
+    chunks = [b"x" * 4096] * ((MAX_BYTES + FORM_OVERHEAD) // 4096 + 2)
+    response = _client(reached).put(
+        "/invoice-attachment/inv-1",
+        content=iter(chunks),
+        headers={"Content-Type": "multipart/form-data; boundary=b"},
+    )
+    assert response.status_code == 413
+    assert reached == []
+
+
+def test_other_routes_are_not_limited():
+    middleware = UploadLimitMiddleware(None, max_bytes=MAX_BYTES, batch_limit=2)
+    scope = {"type": "http", "method": "PUT", "path": "/create-invoices"}
+    assert middleware._limit(scope) is None
@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+from xero_python.exceptions import ApiException
+
+from backend.api import xero_client as gateway
+from backend.api.xero_client import XeroClient
+from backend.auth.token_store import acting_as, current_user
+
+
+class _Response:
+    status = 429
+    reason = "Too Many Requests"
+    data = b""
+
+    def __init__(self, headers: dict):
+        self._headers = headers
+
+    def getheaders(self):
+        return self._headers
+
+
+def test_call_without_tenant_waits_for_retry_after(monkeypatch):
+    client = XeroClient(max_concurrency=1, rate_limit_retries=2)
+    answers = [
+        ApiException(http_resp=_Response({"Retry-After": "7"})),
+        ("connections", 200, {}),
+    ]
+    slept = []
+
+    def get_connections(**kwargs):
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    async def sleep(seconds):
+        slept.append(seconds)
+
+    monkeypatch.setattr(gateway.asyncio, "sleep", sleep)
+    try:
+        result = asyncio.run(client.call(get_connections))
+    finally:
+        client.shutdown()
+
+    assert result == "connections"
+    assert slept == [7.0]
+
+
+def test_reads_are_only_shared_by_the_same_user():
+    client = XeroClient(max_concurrency=4)
+    calls = []
+
+    def get_invoices(**kwargs):
+        calls.append(current_user.get())
+        time.sleep(0.05)
+        return (current_user.get(), 200, {})
+
+    async def read_as(user_id):
+        with acting_as(user_id):
+            return await client.read(get_invoices, xero_tenant_id="tenant")
+
+    async def main():
+        return await asyncio.gather(
+            read_as("alice"), read_as("alice"), read_as("bob")
+        )
+
+    try:
+        results = asyncio.run(main())
+    finally:
+        client.shutdown()
+
+    assert results == ["alice", "alice", "bob"]
+    assert sorted(calls) == ["alice", "bob"]
@@ -0,0 +1,144 @@
+"""Compare CPU time and peak memory of the SDK read path with raw passthrough.
+
+Generates one page of realistic Xero invoice JSON and processes it three
+ways, as the backend would after receiving it:
+
+- ``sdk``: deserialize into SDK models, ``serialize()`` them back and
+  encode each record (the sync path before raw fetching);
+- ``raw``: ``json.loads`` the body and encode each record (the sync path
+  now, see ``backend.api.passthrough.fetch_raw_page``);
+- ``passthrough``: hand the body on in chunks unchanged (``?raw=true``).
+
+    python -m backend.tools.bench_passthrough --invoices 1000 --repeat 5
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+import uuid
+
+from urllib3 import HTTPResponse
+from xero_python.accounting import AccountingApi
+from xero_python.api_client import serialize
+from xero_python.rest import RESTResponse
+
+from backend.api.passthrough import RAW_CHUNK_SIZE, decode_page
+from backend.auth.client_factory import create_api_client
+
+
+def invoice(i: int) -> dict:
+    ms = 1723161600000 + i * 86400000
+    return {
+        "Type": "ACCREC",
+        "InvoiceID": str(uuid.UUID(int=i + 1)),
+        "InvoiceNumber": f"INV-{i:06d}",
+        "Reference": f"Order {i}",
+        "Contact": {
+            "ContactID": str(uuid.UUID(int=10**6 + i % 50)),
+            "Name": f"Customer {i % 50}",
+            "ContactStatus": "ACTIVE",
+            "Addresses": [],
+            "Phones": [],
+            "HasAttachments": False,
+        },
+        "DateString": "2024-08-09T00:00:00",
+        "Date": f"/Date({ms}+0000)/",
+        "DueDateString": "2024-09-09T00:00:00",
+        "DueDate": f"/Date({ms + 30 * 86400000}+0000)/",
+        "Status": "AUTHORISED",
+        "LineAmountTypes": "Exclusive",
+        "LineItems": [
+            {
+                "LineItemID": str(uuid.UUID(int=10**7 + i * 3 + n)),
+                "Description": f"Consulting services, item {n}",
+                "Quantity": 2.0,
+                "UnitAmount": 150.25,
+                "TaxType": "OUTPUT",
+                "TaxAmount": 45.08,
+                "LineAmount": 300.5,
+                "AccountCode": "200",
+                "Tracking": [],
+            }
+            for n in range(3)
+        ],
+        "SubTotal": 901.5,
+        "TotalTax": 135.24,
+        "Total": 1036.74,
+        "AmountDue": 1036.74,
+        "AmountPaid": 0.0,
+        "AmountCredited": 0.0,
+        "UpdatedDateUTC": f"/Date({ms + 3600000}+0000)/",
+        "CurrencyCode": "NZD",
+        "HasAttachments": False,
+        "HasErrors": False,
+    }
+
+
+def page_body(invoices: int) -> bytes:
+    return json.dumps(
+        {
+            "Id": str(uuid.uuid4()),
+            "Status": "OK",
+            "ProviderName": "bench",
+            "DateTimeUTC": "/Date(1723161600000)/",
+            "pagination": {
+                "page": 1,
+                "pageSize": invoices,
+                "pageCount": 1,
+                "itemCount": invoices,
+            },
+            "Invoices": [invoice(i) for i in range(invoices)],
+        }
+    ).encode()
+
+
+def sdk_path(body: bytes, api_client, model_finder) -> int:
+    response = RESTResponse(HTTPResponse(body=body, status=200))
+    result = api_client.deserialize(response, "Invoices", model_finder)
+    return sum(len(json.dumps(serialize(record))) for record in result.invoices)
+
+
+def raw_path(body: bytes) -> int:
+    page = decode_page(body, "Invoices")
+    return sum(len(json.dumps(record)) for record in page.records)
+
+
+def passthrough_path(body: bytes) -> int:
+    return sum(
+        len(body[start : start + RAW_CHUNK_SIZE])
+        for start in range(0, len(body), RAW_CHUNK_SIZE)
+    )
+
+
+def measure(name: str, func, repeat: int):
+    cpu = []
+    for _ in range(repeat):
+        started = time.process_time()
+        func()
+        cpu.append(time.process_time() - started)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    best = min(cpu)
+    print(f"{name:<12} cpu {best * 1000:9.1f} ms   peak memory {peak / 2**20:8.1f} MiB")
+    return best
+
+
+def main(args):
+    body = page_body(args.invoices)
+    api_client = create_api_client(client_id="bench", client_secret="bench")
+    model_finder = AccountingApi(api_client).get_model_finder()
+    print(f"{args.invoices} invoices, {len(body) / 2**20:.1f} MiB of JSON")
+    sdk = measure("sdk", lambda: sdk_path(body, api_client, model_finder), args.repeat)
+    raw = measure("raw", lambda: raw_path(body), args.repeat)
+    measure("passthrough", lambda: passthrough_path(body), args.repeat)
+    print(f"raw is {sdk / raw:.1f}x faster than sdk")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--invoices", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
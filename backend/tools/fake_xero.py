@@ -0,0 +1,188 @@
+"""Local stand-in for the Xero API used to load-test the rate-limit scheduler.
+
+It serves ``/Connections`` and a handful of Accounting API collections with
+generated data, and enforces Xero-style per-tenant limits: a rolling minute
+window, a daily allowance and a concurrent-call cap. Requests over a limit
+get a 429 with ``Retry-After`` and ``X-Rate-Limit-Problem``; every other
+response carries ``X-MinLimit-Remaining`` and ``X-DayLimit-Remaining``.
+
+Run it on its own with::
+
+    python -m backend.tools.fake_xero --port 8900
+
+and point the backend at it with ``XERO_API_BASE_URL=http://localhost:8900/api.xro/2.0``
+and ``XERO_IDENTITY_BASE_URL=http://localhost:8900``.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from collections import defaultdict, deque
+from typing import Optional
+
+from fastapi import FastAPI, Header, Request
+from fastapi.responses import JSONResponse
+
+RESOURCES = {
+    "Invoices": "InvoiceID",
+    "Contacts": "ContactID",
+    "BankTransactions": "BankTransactionID",
+    "Accounts": "AccountID",
+}
+
+
+class FakeXeroLimits:
+    """Per-tenant limit bookkeeping mirroring Xero's published quotas."""
+
+    def __init__(self, minute_limit=60, day_limit=5000, concurrency=5, window=60.0):
+        self.minute_limit = minute_limit
+        self.day_limit = day_limit
+        self.concurrency = concurrency
+        self.window = window
+        self.calls = defaultdict(deque)
+        self.day_calls = defaultdict(int)
+        self.in_flight = defaultdict(int)
+        self.served = 0
+        self.rejected = defaultdict(int)
+
+    def check(self, tenant_id: str):
+        """Return ``(problem, retry_after)`` if the call must be rejected."""
+        now = time.monotonic()
+        calls = self.calls[tenant_id]
+        while calls and now - calls[0] >= self.window:
+            calls.popleft()
+        if self.in_flight[tenant_id] >= self.concurrency:
+            return "concurrent", 1
+        if len(calls) >= self.minute_limit:
+            return "minute", max(1, int(self.window - (now - calls[0])) + 1)
+        if self.day_calls[tenant_id] >= self.day_limit:
+            return "daily", 3600
+        calls.append(now)
+        self.day_calls[tenant_id] += 1
+        return None, 0
+
+    def headers(self, tenant_id: str) -> dict:
+        return {
+            "X-MinLimit-Remaining": str(
+                max(0, self.minute_limit - len(self.calls[tenant_id]))
+            ),
+            "X-DayLimit-Remaining": str(
+                max(0, self.day_limit - self.day_calls[tenant_id])
+            ),
+            "X-AppMinLimit-Remaining": "9999",
+        }
+
+
+def create_app(
+    tenants: int = 5,
+    records: int = 250,
+    latency: float = 0.05,
+    limits: FakeXeroLimits = None,
+) -> FastAPI:
+    """Build a fake Xero app serving ``tenants`` organisations."""
+    app = FastAPI(title="Fake Xero")
+    app.state.limits = limits or FakeXeroLimits()
+    tenant_ids = [str(uuid.UUID(int=i + 1)) for i in range(tenants)]
+
+    @app.get("/Connections")
+    async def connections():
+        return [
+            {
+                "id": str(uuid.uuid4()),
+                "tenantId": tenant_id,
+                "tenantType": "ORGANISATION",
+                "tenantName": f"Fake Org {i + 1}",
+            }
+            for i, tenant_id in enumerate(tenant_ids)
+        ]
+
+    @app.get("/api.xro/2.0/{resource}")
+    async def collection(
+        request: Request,
+        resource: str,
+        xero_tenant_id: str = Header(..., alias="xero-tenant-id"),
+        page: int = 1,
+        pageSize: int = 100,
+        IDs: Optional[str] = None,
+    ):
+        limits = app.state.limits
+        problem, retry_after = limits.check(xero_tenant_id)
+        if problem:
+            limits.rejected[problem] += 1
+            return JSONResponse(
+                status_code=429,
+                content={"Message": "Rate limit exceeded"},
+                headers={
+                    "Retry-After": str(retry_after),
+                    "X-Rate-Limit-Problem": problem,
+                    **limits.headers(xero_tenant_id),
+                },
+            )
+
+        limits.in_flight[xero_tenant_id] += 1
+        try:
+            await asyncio.sleep(random.uniform(latency / 2, latency * 1.5))
+        finally:
+            limits.in_flight[xero_tenant_id] -= 1
+        limits.served += 1
+
+        if resource == "Organisation":
+            body = {"Organisations": [{"Name": f"Fake Org {xero_tenant_id[-4:]}"}]}
+        elif resource in RESOURCES and IDs:
+            known = [
+                record_id
+                for record_id in IDs.split(",")
+                if 0 < uuid.UUID(record_id).int <= records
+            ]
+            body = {resource: [{RESOURCES[resource]: record_id} for record_id in known]}
+        elif resource in RESOURCES:
+            start = (page - 1) * pageSize
+            count = max(0, min(pageSize, records - start))
+            body = {
+                resource: [
+                    {RESOURCES[resource]: str(uuid.UUID(int=start + i + 1))}
+                    for i in range(count)
+                ],
+                "pagination": {
+                    "page": page,
+                    "pageSize": pageSize,
+                    "pageCount": -(-records // pageSize),
+                    "itemCount": records,
+                },
+            }
+        else:
+            return JSONResponse(status_code=404, content={"Message": "Not found"})
+        return JSONResponse(content=body, headers=limits.headers(xero_tenant_id))
+
+    @app.get("/fake/stats")
+    async def stats():
+        limits = app.state.limits
+        return {"served": limits.served, "rejected": dict(limits.rejected)}
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--tenants", type=int, default=5)
+    parser.add_argument("--records", type=int, default=250)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--minute-limit", type=int, default=60)
+    parser.add_argument("--window", type=float, default=60.0)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        create_app(
+            tenants=args.tenants,
+            records=args.records,
+            latency=args.latency,
+            limits=FakeXeroLimits(minute_limit=args.minute_limit, window=args.window),
+        ),
+        host="localhost",
+        port=args.port,
+    )
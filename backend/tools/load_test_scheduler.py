@@ -0,0 +1,124 @@
+"""Offline load test of the Xero gateway and its rate-limit scheduler.
+
+Starts ``backend.tools.fake_xero`` on a local port with a compressed minute
+window, then fires a burst of concurrent list calls spread across several
+tenants through a dedicated ``XeroClient``. It reports how many calls the
+fake server rejected with 429 and what the scheduler saw per tenant. A
+well-behaved scheduler keeps the ``minute`` rejections at or near zero.
+
+    python -m backend.tools.load_test_scheduler --calls 300 --tenants 5
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+
+import uvicorn
+
+from backend.api.rate_limiter import LOW_PRIORITY, RateLimitExceeded, XeroScheduler
+from backend.api.xero_client import XeroClient
+from backend.auth.client_factory import create_api_client
+from backend.tools.fake_xero import FakeXeroLimits, create_app
+
+FAKE_TOKEN = {
+    "access_token": "fake-access-token",
+    "token_type": "Bearer",
+    "expires_in": 1800,
+    "scope": "accounting.transactions",
+}
+
+
+def start_fake_xero(port: int, tenants: int, minute_limit: int, window: float):
+    config = uvicorn.Config(
+        create_app(
+            tenants=tenants,
+            limits=FakeXeroLimits(minute_limit=minute_limit, window=window),
+        ),
+        host="127.0.0.1",
+        port=port,
+        log_level="warning",
+    )
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def build_client(port: int, minute_limit: int, window: float) -> XeroClient:
+    client = create_api_client(
+        token_getter=lambda: dict(FAKE_TOKEN),
+        token_saver=lambda token: None,
+        client_id="fake",
+        client_secret="fake",
+    )
+    return XeroClient(
+        client=client,
+        scheduler=XeroScheduler(minute_limit=minute_limit, period=window),
+        accounting_base_url=f"http://127.0.0.1:{port}/api.xro/2.0",
+        identity_base_url=f"http://127.0.0.1:{port}",
+    )
+
+
+async def run(args):
+    server = start_fake_xero(args.port, args.tenants, args.minute_limit, args.window)
+    gateway = build_client(args.port, args.minute_limit, args.window)
+    connections = await gateway.get_connections()
+    tenant_ids = [connection.tenant_id for connection in connections]
+
+    outcomes = {"ok": 0, "shed": 0, "error": 0}
+    latencies = []
+
+    async def one(i: int):
+        tenant_id = tenant_ids[i % len(tenant_ids)]
+        priority = LOW_PRIORITY if i % 4 == 0 else "high"
+        started = time.monotonic()
+        try:
+            await gateway.call(
+                gateway.accounting_api.get_invoices,
+                xero_tenant_id=tenant_id,
+                page=1,
+                priority=priority,
+            )
+            outcomes["ok"] += 1
+        except RateLimitExceeded:
+            outcomes["shed"] += 1
+        except Exception:
+            outcomes["error"] += 1
+        latencies.append(time.monotonic() - started)
+
+    started = time.monotonic()
+    await asyncio.gather(*(one(i) for i in range(args.calls)))
+    elapsed = time.monotonic() - started
+
+    fake = server.config.app.state.limits
+    latencies.sort()
+    print(f"{args.calls} calls across {len(tenant_ids)} tenants in {elapsed:.1f}s")
+    print(f"outcomes: {outcomes}")
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"latency p50 {p50:.2f}s, p99 {p99:.2f}s")
+    print(f"fake xero served {fake.served}, rejected {dict(fake.rejected)}")
+    for tenant_id, stats in gateway.scheduler.stats().items():
+        print(f"  {tenant_id}: {stats}")
+    print(f"http pool: {gateway.accounting_api.api_client.rest_client.stats()}")
+
+    server.should_exit = True
+    gateway.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--tenants", type=int, default=5)
+    parser.add_argument("--minute-limit", type=int, default=60)
+    parser.add_argument(
+        "--window",
+        type=float,
+        default=6.0,
+        help="Length of the rate-limit 'minute' in seconds (compressed clock)",
+    )
+    asyncio.run(run(parser.parse_args()))
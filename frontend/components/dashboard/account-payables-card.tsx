@@ -9,12 +9,14 @@ import {
   CardDescription,
 } from "@/components/ui/card";
 import { useContacts } from "@/components/hooks/use-contacts";
+import { useTenant } from "@/components/hooks/use-tenant";
 import { RadialBarChart, RadialBar, PolarRadiusAxis, Label } from "recharts";
 import LoadingSpinner from "@/components/ui/loading-spinner";
 import { FaDollarSign, FaExclamationTriangle } from "react-icons/fa"; 
 
 export function AccountPayablesCard() {
-  const { outstandingPayables, overduePayables, loading, error } = useContacts();
+  const { selectedTenant } = useTenant();
+  const { outstandingPayables, overduePayables, loading, error } = useContacts(selectedTenant?.tenantId || null);
 
   if (loading) {
     return <div className="col-span-full"> <LoadingSpinner /> </div>;
@@ -9,12 +9,14 @@ import {
   CardDescription,
 } from "@/components/ui/card";
 import { useContacts } from "@/components/hooks/use-contacts";
+import { useTenant } from "@/components/hooks/use-tenant";
 import { RadialBarChart, RadialBar, PolarRadiusAxis, Label } from "recharts";
 import LoadingSpinner from "@/components/ui/loading-spinner";
 import { FaDollarSign, FaExclamationTriangle } from "react-icons/fa"; // Import icons
 
 export function AccountReceivablesCard() {
-  const { outstandingReceivables, overdueReceivables, loading, error } = useContacts();
+  const { selectedTenant } = useTenant();
+  const { outstandingReceivables, overdueReceivables, loading, error } = useContacts(selectedTenant?.tenantId || null);
 
   if (loading) {
     return <div className="col-span-full"> <LoadingSpinner /> </div>;
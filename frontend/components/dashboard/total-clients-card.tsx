@@ -9,11 +9,13 @@ import {
   CardDescription,
 } from "@/components/ui/card";
 import { useContacts } from "@/components/hooks/use-contacts";
+import { useTenant } from "@/components/hooks/use-tenant";
 import { BarChart, Bar, XAxis, YAxis, Tooltip, Legend } from "recharts";
 import LoadingSpinner from "@/components/ui/loading-spinner";
 
 export function TotalClientsCard() {
-  const { contactsCount, activeClientsCount, suppliersCount, customersCount, loading, error } = useContacts();
+  const { selectedTenant } = useTenant();
+  const { contactsCount, activeClientsCount, suppliersCount, customersCount, loading, error } = useContacts(selectedTenant?.tenantId || null);
 
   if (loading) {
     return <div className="col-span-full"> <LoadingSpinner /> </div>;
@@ -2,6 +2,7 @@
 import { useState, useEffect } from 'react';
 import axios from 'axios';
 import config from '@/app/config';
+import { useLiveUpdates } from './use-live-updates';
 
 interface Contact {
   ContactID: string;
@@ -20,7 +21,7 @@ interface Contact {
   };
 }
 
-export const useContacts = () => {
+export const useContacts = (selectedTenantId: string | null = null) => {
   const [contactsCount, setContactsCount] = useState<number>(0);
   const [activeClientsCount, setActiveClientsCount] = useState<number>(0);
   const [suppliersCount, setSuppliersCount] = useState<number>(0);
@@ -32,12 +33,15 @@ export const useContacts = () => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<Error | null>(null);
   const { apiBaseUrl } = config;
+  const revision = useLiveUpdates(selectedTenantId, 'contacts');
 
   useEffect(() => {
     const fetchData = async () => {
       try {
-        setLoading(true);
+        // Live refreshes keep the current data on screen while refetching
+        if (revision === 0) setLoading(true);
         const response = await axios.get(`${apiBaseUrl}/contacts`, {
+          params: { fields: 'ContactID,ContactStatus,IsSupplier,IsCustomer,Balances' },
           withCredentials: true,
         });
 
@@ -88,7 +92,7 @@ export const useContacts = () => {
     };
 
     fetchData();
-  }, [apiBaseUrl]);
+  }, [apiBaseUrl, revision]);
 
   return {
     contactsCount,
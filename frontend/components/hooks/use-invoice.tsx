@@ -2,12 +2,14 @@
 import { useState, useEffect } from 'react';
 import axios from 'axios';
 import config from '@/app/config';
+import { useLiveUpdates } from './use-live-updates';
 
 export const useInvoices = (selectedTenantId: string | null) => {
   const [invoices, setInvoices] = useState<any[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<Error | null>(null);
   const { apiBaseUrl } = config;
+  const revision = useLiveUpdates(selectedTenantId, 'invoices');
 
   useEffect(() => {
     const fetchData = async () => {
@@ -18,7 +20,8 @@ export const useInvoices = (selectedTenantId: string | null) => {
           return;
         }
 
-        setLoading(true);
+        // Live refreshes keep the current data on screen while refetching
+        if (revision === 0) setLoading(true);
         const response = await axios.get(`${apiBaseUrl}/invoices`, {
           withCredentials: true
         });
@@ -43,7 +46,7 @@ export const useInvoices = (selectedTenantId: string | null) => {
     };
 
     fetchData();
-  }, [selectedTenantId, apiBaseUrl]);
+  }, [selectedTenantId, apiBaseUrl, revision]);
 
   return { invoices, loading, error };
 };
\ No newline at end of file
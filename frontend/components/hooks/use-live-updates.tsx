@@ -0,0 +1,76 @@
+// hooks/use-live-updates.tsx
+import { useState, useEffect } from 'react';
+import config from '@/app/config';
+
+type Listener = (event: string, data: any) => void;
+
+interface Stream {
+  source: EventSource;
+  listeners: Set<Listener>;
+}
+
+// One /events connection per tenant, shared by every hook on the page
+const streams = new Map<string, Stream>();
+
+const subscribe = (tenantId: string, listener: Listener) => {
+  let stream = streams.get(tenantId);
+  if (!stream) {
+    const source = new EventSource(`${config.apiBaseUrl}/events`, {
+      withCredentials: true
+    });
+    const current: Stream = { source, listeners: new Set() };
+    for (const name of ['change', 'summary']) {
+      source.addEventListener(name, (event) => {
+        const data = JSON.parse((event as MessageEvent).data);
+        current.listeners.forEach((notify) => notify(name, data));
+      });
+    }
+    streams.set(tenantId, current);
+    stream = current;
+  }
+  stream.listeners.add(listener);
+
+  return () => {
+    const current = streams.get(tenantId);
+    if (!current) return;
+    current.listeners.delete(listener);
+    if (current.listeners.size === 0) {
+      current.source.close();
+      streams.delete(tenantId);
+    }
+  };
+};
+
+// Counts the server's change notifications for `resource`; add it to an
+// effect's dependencies to refetch when the backend data changes
+export const useLiveUpdates = (selectedTenantId: string | null, resource: string) => {
+  const [revision, setRevision] = useState(0);
+
+  useEffect(() => {
+    if (!selectedTenantId || typeof window === 'undefined') return;
+    return subscribe(selectedTenantId, (event, data) => {
+      if (event === 'change' && data.resources.includes(resource)) {
+        setRevision((value) => value + 1);
+      }
+    });
+  }, [selectedTenantId, resource]);
+
+  return revision;
+};
+
+// The dashboard summary pushed by the server, null until one arrives
+export const useLiveSummary = <T,>(selectedTenantId: string | null) => {
+  const [summary, setSummary] = useState<T | null>(null);
+
+  useEffect(() => {
+    setSummary(null);
+    if (!selectedTenantId || typeof window === 'undefined') return;
+    return subscribe(selectedTenantId, (event, data) => {
+      if (event === 'summary') {
+        setSummary(data);
+      }
+    });
+  }, [selectedTenantId]);
+
+  return summary;
+};
@@ -2,10 +2,14 @@
 import { useState, useEffect } from 'react'
 import axios from 'axios'
 import config from '@/app/config'
-
-interface BankTransaction {
-  IsReconciled: boolean;
-  Date: string; // Date in the format "/Date(1723161600000)/"
+import { useLiveSummary } from './use-live-updates'
+
+interface DashboardSummary {
+  bank_transactions: {
+    total: number;
+    unreconciled: number;
+    unreconciled_by_month: { month: string; unreconciled_count: number }[];
+  };
   // Add other properties as needed
 }
 
@@ -17,6 +21,28 @@ export const useUnreconciledBankTransactions = (selectedTenantId: string | null)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<Error | null>(null)
   const { apiBaseUrl } = config
+  // Pushed by the backend whenever the tenant's data changes
+  const liveSummary = useLiveSummary<DashboardSummary>(selectedTenantId)
+
+  const applySummary = (data: DashboardSummary) => {
+    const unreconciled = data.bank_transactions.unreconciled
+    const total = data.bank_transactions.total
+
+    // Months arrive sorted, one entry per month with unreconciled transactions
+    const trendDataArray = data.bank_transactions.unreconciled_by_month.map(entry => ({
+      month: entry.month,
+      unreconciledCount: entry.unreconciled_count
+    }))
+
+    // Placeholder for previous period calculation
+    const previousUnreconciled = unreconciled - 1
+    const trendValue = unreconciled - previousUnreconciled
+
+    setUnreconciledCount(unreconciled)
+    setTotalTransactions(total)
+    setTrend(trendValue)
+    setTrendData(trendDataArray)
+  }
 
   useEffect(() => {
     const fetchData = async () => {
@@ -31,7 +57,9 @@ export const useUnreconciledBankTransactions = (selectedTenantId: string | null)
         }
 
         setLoading(true)
-        const response = await axios.get(`${apiBaseUrl}/bank-transactions`, {
+        // Aggregates are computed by the backend, so only a few hundred
+        // bytes come back instead of every bank transaction
+        const response = await axios.get(`${apiBaseUrl}/dashboard/summary`, {
           withCredentials: true
         })
 
@@ -39,59 +67,13 @@ export const useUnreconciledBankTransactions = (selectedTenantId: string | null)
           throw new Error('Network response was not ok')
         }
 
-        const data = response.data
-        console.log('Fetched Unreconciled transactions:', data) // Debugging statement
+        const data: DashboardSummary = response.data
 
-        if (!data || !Array.isArray(data.BankTransactions)) {
+        if (!data || !data.bank_transactions) {
           throw new Error('Invalid response structure')
         }
 
-        const transactions: BankTransaction[] = data.BankTransactions
-        const unreconciled = transactions.filter(tx => tx.IsReconciled === false).length
-        const total = transactions.length
-
-        // Debugging statements
-        console.log('Unreconciled transactions count:', unreconciled)
-        console.log('Total transactions count:', total)
-
-        // Group transactions by month and calculate unreconciled count for each month
-        const groupedByMonth: { [key: string]: number } = {}
-        transactions.forEach(tx => {
-          const timestamp = parseInt(tx.Date.match(/\d+/)?.[0] || '0', 10)
-          const date = new Date(timestamp)
-          const month = `${date.getFullYear()}-${date.getMonth() + 1}`
-          if (!groupedByMonth[month]) {
-            groupedByMonth[month] = 0
-          }
-          if (!tx.IsReconciled) {
-            groupedByMonth[month] += 1
-          }
-        })
-
-        // Convert grouped data to array for line graph
-        const trendDataArray = Object.keys(groupedByMonth).map(month => ({
-          month,
-          unreconciledCount: groupedByMonth[month]
-        }))
-
-        // Sort trendDataArray by month
-        trendDataArray.sort((a, b) => {
-          const [yearA, monthA] = a.month.split('-').map(Number)
-          const [yearB, monthB] = b.month.split('-').map(Number)
-          if (yearA !== yearB) {
-            return yearA - yearB
-          }
-          return monthA - monthB
-        })
-
-        // Placeholder for previous period calculation
-        const previousUnreconciled = unreconciled - 1
-        const trendValue = unreconciled - previousUnreconciled
-
-        setUnreconciledCount(unreconciled)
-        setTotalTransactions(total)
-        setTrend(trendValue)
-        setTrendData(trendDataArray)
+        applySummary(data)
       } catch (error: any) {
         setError(error)
       } finally {
@@ -102,5 +84,11 @@ export const useUnreconciledBankTransactions = (selectedTenantId: string | null)
     fetchData()
   }, [selectedTenantId, apiBaseUrl])
 
+  useEffect(() => {
+    if (liveSummary?.bank_transactions) {
+      applySummary(liveSummary)
+    }
+  }, [liveSummary])
+
   return { unreconciledCount, totalTransactions, trend, trendData, loading, error }
 }
\ No newline at end of file